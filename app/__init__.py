@@ -1,17 +1,36 @@
 """
 Inicialização da aplicação Flask
 """
+from importlib import import_module
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from config import config
+from .utils.read_replica import RoutingSession
 
 # Inicializar extensões
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 migrate = Migrate()
 
+# Blueprints da aplicação: (módulo em app/routes, atributo)
+BLUEPRINTS = (
+    ('auth', 'auth_bp'),
+    ('admin', 'admin_bp'),
+    ('user', 'user_bp'),
+    ('manager', 'manager_bp'),
+    ('purchaser', 'purchaser_bp'),
+    ('finance', 'finance_bp'),
+    ('main', 'main_bp'),
+    ('supplier', 'supplier_bp'),
+    ('purchase_request', 'purchase_request_bp'),
+    ('quotation', 'quotation_bp'),
+    ('purchase_order', 'purchase_order_bp'),
+    ('invoice', 'invoice_bp'),
+    ('payment_request', 'payment_request_bp')
+)
+
 def create_app(config_name='development'):
     """
     Factory para criar a aplicação Flask
@@ -27,6 +46,16 @@ def create_app(config_name='development'):
     # Carregar configuração
     app.config.from_object(config[config_name])
     
+    # IP/esquema do cliente atrás de proxy reverso (só os saltos confiáveis)
+    proxy_hops = app.config.get('PROXY_FIX_X_FOR', 0)
+    if proxy_hops:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops)
+    
+    # Cache de bytecode dos templates (antes de qualquer uso do ambiente Jinja)
+    from .utils.template_cache import init_template_cache
+    init_template_cache(app)
+    
     # Inicializar extensões com a app
     db.init_app(app)
     login_manager.init_app(app)
@@ -44,60 +73,80 @@ def create_app(config_name='development'):
         return User.query.get(int(user_id))
     
     # Registrar blueprints
-    from .routes.auth import auth_bp
-    from .routes.admin import admin_bp
-    from .routes.user import user_bp
-    from .routes.manager import manager_bp
-    from .routes.purchaser import purchaser_bp
-    from .routes.finance import finance_bp
-    from .routes.main import main_bp
-    from .routes.supplier import supplier_bp
-    from .routes.purchase_request import purchase_request_bp
-    from .routes.quotation import quotation_bp
-    from .routes.purchase_order import purchase_order_bp
-    from .routes.invoice import invoice_bp
-    from .routes.payment_request import payment_request_bp
-    
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(admin_bp)
-    app.register_blueprint(user_bp)
-    app.register_blueprint(manager_bp)
-    app.register_blueprint(purchaser_bp)
-    app.register_blueprint(finance_bp)
-    app.register_blueprint(main_bp)
-    app.register_blueprint(supplier_bp)
-    app.register_blueprint(purchase_request_bp)
-    app.register_blueprint(quotation_bp)
-    app.register_blueprint(purchase_order_bp)
-    app.register_blueprint(invoice_bp)
-    app.register_blueprint(payment_request_bp)
+    register_blueprints(app)
     
     # Registrar filtros de template
     from .utils.filters import register_filters
     register_filters(app)
     
+    # CSS/JS gerados por "flask assets build" (asset_url nos templates)
+    from .utils.assets import init_assets
+    init_assets(app)
+    
+    # Configurar cache de estatísticas dos dashboards
+    from .utils.stats_cache import init_stats_cache
+    init_stats_cache(app)
+    
+    # Configurar atualizações em tempo real dos dashboards
+    from .utils.live_updates import init_live_updates
+    init_live_updates(app, lambda: db.engine)
+    
+    # Hash de senhas em pool de processos e limite de tentativas de login
+    from .utils.passwords import init_password_hasher
+    from .utils.login_throttle import init_login_throttle
+    init_password_hasher(app)
+    init_login_throttle(app)
+    
+    # Repositório de documentos (arquivos por SHA-256, metadados em stored_files)
+    from .utils.document_store import init_document_store
+    init_document_store(app)
+    
+    # Miniaturas dos anexos (pool de processos, fora do request)
+    from .utils.thumbnails import init_thumbnails
+    init_thumbnails(app)
+    
+    # Leitura na réplica: manter no primário quem acabou de escrever
+    from .utils.read_replica import init_read_replica
+    init_read_replica(app)
+    
+    # Sessão no servidor (SESSION_BACKEND); 'cookie' mantém a sessão padrão do Flask
+    from .utils.server_session import init_server_session
+    init_server_session(app)
+    
     # Registrar contexto de template
     @app.context_processor
     def inject_environment():
         """Injeta informações do ambiente atual no contexto dos templates"""
-        from flask import session
-        from environment_config import get_available_environments
-        
-        current_env = session.get('selected_environment', 'HOM')
-        environments = get_available_environments()
-        current_env_config = environments.get(current_env, environments['HOM'])
-        
-        return {
-            'current_environment': current_env,
-            'current_environment_name': current_env_config['name'],
-            'available_environments': environments
-        }
+        from .utils.environment_context import environment_context
+        return environment_context()
+    
+    @app.context_processor
+    def inject_inbox():
+        """Injeta a contagem da caixa de entrada (a consulta só roda se o template chamar)"""
+        from .utils.inbox import current_inbox_count
+        return {'inbox_count': current_inbox_count}
     
     # Registrar error handlers
     register_error_handlers(app)
     
+    # Compressão gzip/brotli das respostas (middleware WSGI, por último)
+    from .utils.compression import init_compression
+    init_compression(app)
+    
     return app
 
+def register_blueprints(app):
+    """
+    Importa e registra os blueprints listados em BLUEPRINTS
+    
+    Todos são registrados na inicialização (url_for precisa do mapa de rotas
+    completo); o custo de cada módulo de rotas fica baixo porque dependências
+    pesadas (ReportLab etc.) são importadas dentro das views que as usam.
+    """
+    for module_name, attribute in BLUEPRINTS:
+        module = import_module(f'.routes.{module_name}', __name__)
+        app.register_blueprint(getattr(module, attribute))
+
 def register_error_handlers(app):
     """Registra handlers de erro personalizados"""
     
@@ -5,6 +5,7 @@ from .user import User
 from .department import Department
 from .product import Product
 from .purchase_request import PurchaseRequest
+from .purchase_request_item import PurchaseRequestItem
 from .quotation import Quotation
 from .quotation_item import QuotationItem
 from .purchase_order import PurchaseOrder
@@ -12,8 +13,12 @@ from .invoice import Invoice
 from .payment_request import PaymentRequest
 from .payment import Payment
 from .system_parameter import SystemParameter
+from .document_lookup import DocumentLookup
+from .stored_file import StoredFile
+from .invoice_attachment import InvoiceAttachment
 
 __all__ = [
-    'User', 'Department', 'Product', 'PurchaseRequest', 
-    'Quotation', 'QuotationItem', 'PurchaseOrder', 'Invoice', 'PaymentRequest', 'Payment', 'SystemParameter'
+    'User', 'Department', 'Product', 'PurchaseRequest', 'PurchaseRequestItem',
+    'Quotation', 'QuotationItem', 'PurchaseOrder', 'Invoice', 'PaymentRequest', 'Payment', 'SystemParameter',
+    'DocumentLookup', 'StoredFile', 'InvoiceAttachment'
 ]
\ No newline at end of file
@@ -11,6 +11,7 @@ class Department(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     status = db.Column(db.String(20), nullable=False, default='ATIVO')
+    auto_approve_limit = db.Column(db.Numeric(15, 2), nullable=True)  # Sobrepõe o parâmetro global
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
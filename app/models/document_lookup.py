@@ -0,0 +1,219 @@
+"""
+Modelo de índice global de documentos (número do documento -> tipo, id, status)
+"""
+from datetime import datetime
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db
+from .purchase_request import PurchaseRequest
+from .purchase_order import PurchaseOrder, purchase_order_requests
+from .invoice import Invoice
+from .payment_request import PaymentRequest
+
+# Documentos indexados: modelo -> (tipo, coluna do número)
+TRACKED_DOCUMENTS = {
+    PurchaseRequest: ('PURCHASE_REQUEST', 'request_number'),
+    PurchaseOrder: ('PURCHASE_ORDER', 'order_number'),
+    Invoice: ('INVOICE', 'invoice_number'),
+    PaymentRequest: ('PAYMENT_REQUEST', 'request_number')
+}
+
+# Modelos cujo número é gerado por trigger no INSERT (generate_request_number/
+# generate_order_number): o valor enviado pelo Python é descartado pelo banco
+TRIGGER_NUMBERED = {
+    PurchaseRequest: 'request_number',
+    PurchaseOrder: 'order_number'
+}
+
+# Rota de visualização de cada tipo: (endpoint, argumento do id)
+DOCUMENT_VIEWS = {
+    'PURCHASE_REQUEST': ('purchase_request.view', 'request_id'),
+    'PURCHASE_ORDER': ('purchase_order.view', 'order_id'),
+    'INVOICE': ('invoice.view', 'invoice_id'),
+    'PAYMENT_REQUEST': ('payment_request.view', 'request_id')
+}
+
+def normalize_document_number(value):
+    """Normaliza o número do documento para busca (sem espaços, maiúsculas)"""
+    return (value or '').strip().upper()
+
+class DocumentLookup(db.Model):
+    """Modelo de índice global de documentos"""
+    __tablename__ = 'document_lookup'
+    __table_args__ = (
+        db.UniqueConstraint('document_type', 'document_id', name='uq_document_lookup_document'),
+        # varchar_pattern_ops permite usar o índice em LIKE 'prefixo%' no PostgreSQL
+        db.Index('idx_document_lookup_number', 'document_number',
+                 postgresql_ops={'document_number': 'varchar_pattern_ops'}),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    document_number = db.Column(db.String(50), nullable=False)
+    document_type = db.Column(db.String(30), nullable=False)
+    document_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(30), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DocumentLookup {self.document_type} {self.document_number}>'
+    
+    def get_type_label(self):
+        """Retorna o label do tipo de documento"""
+        labels = {
+            'PURCHASE_REQUEST': 'Requisição de Compra',
+            'PURCHASE_ORDER': 'Pedido de Compra',
+            'INVOICE': 'Nota Fiscal',
+            'PAYMENT_REQUEST': 'Solicitação de Pagamento'
+        }
+        return labels.get(self.document_type, self.document_type)
+    
+    def get_view_endpoint(self):
+        """Retorna (endpoint, kwargs) da página do documento"""
+        endpoint, arg = DOCUMENT_VIEWS[self.document_type]
+        return endpoint, {arg: self.document_id}
+    
+    @classmethod
+    def visibility_filter(cls, user):
+        """
+        Critério dos documentos que o usuário pode abrir (mesmas regras das listas)
+        
+        Solicitantes veem as próprias requisições e os pedidos, notas e
+        pagamentos ligados a elas; gerentes, os do seu departamento; compras,
+        financeiro e administradores, todos (retorna None).
+        """
+        if user.role in ('ADMIN', 'PURCHASER', 'FINANCE'):
+            return None
+        from .user import User
+        if user.role == 'MANAGER':
+            requests = select(PurchaseRequest.id).join(User, PurchaseRequest.user_id == User.id).where(
+                User.department_id == user.department_id
+            )
+        else:
+            requests = select(PurchaseRequest.id).where(PurchaseRequest.user_id == user.id)
+        # Pedidos da requisição principal ou consolidados
+        orders = select(PurchaseOrder.id).where(or_(
+            PurchaseOrder.purchase_request_id.in_(requests),
+            PurchaseOrder.id.in_(select(purchase_order_requests.c.purchase_order_id).where(
+                purchase_order_requests.c.purchase_request_id.in_(requests)
+            ))
+        ))
+        visible_ids = {
+            'PURCHASE_REQUEST': requests,
+            'PURCHASE_ORDER': orders,
+            'INVOICE': select(Invoice.id).where(Invoice.purchase_order_id.in_(orders)),
+            'PAYMENT_REQUEST': select(PaymentRequest.id).where(PaymentRequest.purchase_order_id.in_(orders))
+        }
+        return or_(*[
+            (cls.document_type == document_type) & cls.document_id.in_(ids)
+            for document_type, ids in visible_ids.items()
+        ])
+    
+    @classmethod
+    def _visible(cls, query, user):
+        """Aplica o filtro de visibilidade (user None = sem restrição)"""
+        criteria = cls.visibility_filter(user) if user is not None else None
+        return query if criteria is None else query.filter(criteria)
+    
+    @classmethod
+    def resolve(cls, document_number, user=None):
+        """Retorna as entradas com o número exato (notas de fornecedores diferentes podem repetir)"""
+        number = normalize_document_number(document_number)
+        if not number:
+            return []
+        query = cls._visible(cls.query.filter_by(document_number=number), user)
+        return query.order_by(cls.document_type).all()
+    
+    @classmethod
+    def search(cls, prefix, limit=20, user=None):
+        """Busca documentos pelo prefixo do número (índice varchar_pattern_ops)"""
+        number = normalize_document_number(prefix)
+        if not number:
+            return []
+        # Escapar curingas do LIKE digitados pelo usuário
+        number = number.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = cls._visible(cls.query.filter(cls.document_number.like(f'{number}%', escape='\\')), user)
+        return query.order_by(cls.document_number, cls.document_type).limit(limit).all()
+    
+    @classmethod
+    def rebuild(cls):
+        """Recria o índice a partir das tabelas de documentos (retorna o total indexado)"""
+        cls.query.delete()
+        total = 0
+        for model, (document_type, number_column) in TRACKED_DOCUMENTS.items():
+            for document in model.query.yield_per(1000):
+                db.session.add(cls(
+                    document_number=normalize_document_number(getattr(document, number_column)),
+                    document_type=document_type,
+                    document_id=document.id,
+                    status=getattr(document, 'status', None)
+                ))
+                total += 1
+        db.session.commit()
+        return total
+
+# ==================== MANUTENÇÃO DO ÍNDICE ====================
+# Os eventos executam na mesma conexão/transação do flush do documento
+
+def _document_values(target):
+    """Retorna o tipo e os valores indexados do documento"""
+    document_type, number_column = TRACKED_DOCUMENTS[type(target)]
+    return document_type, {
+        'document_number': normalize_document_number(getattr(target, number_column)),
+        'status': getattr(target, 'status', None),
+        'updated_at': datetime.utcnow()
+    }
+
+def load_generated_number(connection, target):
+    """
+    Devolve ao objeto recém-inserido o número gravado pelo trigger
+    
+    Executado uma única vez por INSERT (no after_insert abaixo); quem roda depois
+    no mesmo flush (ex.: os eventos de tempo real) já encontra o valor no objeto.
+    """
+    number_column = TRIGGER_NUMBERED.get(type(target))
+    if not number_column:
+        return
+    table = inspect(target).mapper.local_table
+    number = connection.execute(
+        select(table.c[number_column]).where(table.c.id == target.id)
+    ).scalar_one()
+    set_committed_value(target, number_column, number)
+
+def _after_insert(mapper, connection, target):
+    """Indexa o documento recém-criado (com o número já gravado pelo banco)"""
+    load_generated_number(connection, target)
+    document_type, values = _document_values(target)
+    connection.execute(DocumentLookup.__table__.insert().values(
+        document_type=document_type,
+        document_id=target.id,
+        created_at=values['updated_at'],
+        **values
+    ))
+
+def _after_update(mapper, connection, target):
+    """Atualiza o índice quando número ou status mudam"""
+    number_column = TRACKED_DOCUMENTS[type(target)][1]
+    state = inspect(target)
+    changed = [name for name in (number_column, 'status')
+               if name in state.attrs and state.attrs[name].history.has_changes()]
+    if not changed:
+        return
+    document_type, values = _document_values(target)
+    table = DocumentLookup.__table__
+    connection.execute(table.update().where(
+        (table.c.document_type == document_type) & (table.c.document_id == target.id)
+    ).values(**values))
+
+def _after_delete(mapper, connection, target):
+    """Remove o documento do índice"""
+    document_type = TRACKED_DOCUMENTS[type(target)][0]
+    table = DocumentLookup.__table__
+    connection.execute(table.delete().where(
+        (table.c.document_type == document_type) & (table.c.document_id == target.id)
+    ))
+
+for _model in TRACKED_DOCUMENTS:
+    event.listen(_model, 'after_insert', _after_insert)
+    event.listen(_model, 'after_update', _after_update)
+    event.listen(_model, 'after_delete', _after_delete)
@@ -27,6 +27,14 @@ class Invoice(db.Model):
     def __repr__(self):
         return f'<Invoice {self.invoice_number}>'
     
+    def get_order_difference(self):
+        """Retorna a diferença entre o valor da nota e o total das linhas do pedido"""
+        return Decimal(str(self.total_value)) - self.purchase_order.get_total_value()
+    
+    def matches_order(self, tolerance=Decimal('0.01')):
+        """Verifica se o valor da nota confere com o total do pedido"""
+        return abs(self.get_order_difference()) <= tolerance
+    
     @classmethod
     def get_pending_invoices(cls):
         """Retorna todas as notas fiscais pendentes"""
@@ -0,0 +1,39 @@
+"""
+Modelo de anexo de nota fiscal (PDF/imagem da NF-e)
+"""
+from datetime import datetime
+from app import db
+
+class InvoiceAttachment(db.Model):
+    """Arquivo anexado a uma nota fiscal (conteúdo no repositório de documentos)"""
+    __tablename__ = 'invoice_attachments'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoices.id', ondelete='CASCADE'), nullable=False)
+    file_id = db.Column(db.Integer, db.ForeignKey('stored_files.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    thumbnail_file_id = db.Column(db.Integer, db.ForeignKey('stored_files.id'), nullable=True)
+    thumbnail_status = db.Column(db.String(20), nullable=False, default='PENDING')
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relacionamentos
+    invoice = db.relationship('Invoice', backref=db.backref('attachments', lazy=True,
+                                                            order_by='InvoiceAttachment.created_at'))
+    file = db.relationship('StoredFile', foreign_keys=[file_id])
+    thumbnail_file = db.relationship('StoredFile', foreign_keys=[thumbnail_file_id])
+    uploader = db.relationship('User', backref='invoice_attachments')
+    
+    def __repr__(self):
+        return f'<InvoiceAttachment {self.filename}>'
+    
+    def get_thumbnail_status_label(self):
+        """Retorna o label do status da miniatura"""
+        labels = {
+            'PENDING': 'Gerando prévia',
+            'READY': 'Prévia disponível',
+            'FAILED': 'Prévia indisponível',
+            'NONE': 'Sem prévia'
+        }
+        return labels.get(self.thumbnail_status, self.thumbnail_status)
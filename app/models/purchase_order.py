@@ -5,6 +5,13 @@ from datetime import datetime
 from decimal import Decimal
 from app import db
 
+# Requisições atendidas por um pedido de compra (pedidos consolidados)
+purchase_order_requests = db.Table(
+    'purchase_order_requests',
+    db.Column('purchase_order_id', db.Integer, db.ForeignKey('purchase_orders.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('purchase_request_id', db.Integer, db.ForeignKey('purchase_requests.id', ondelete='CASCADE'), primary_key=True)
+)
+
 class PurchaseOrder(db.Model):
     """Modelo de pedido de compra"""
     __tablename__ = 'purchase_orders'
@@ -14,14 +21,18 @@ class PurchaseOrder(db.Model):
     purchase_request_id = db.Column(db.Integer, db.ForeignKey('purchase_requests.id'), nullable=False)
     quotation_item_id = db.Column(db.Integer, db.ForeignKey('quotation_items.id'), nullable=False)
     purchaser_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    pdf_path = db.Column(db.String(500))
+    pdf_path = db.Column(db.String(500))  # legado: PDFs anteriores ao repositório de documentos
+    pdf_file_id = db.Column(db.Integer, db.ForeignKey('stored_files.id'), nullable=True)
     status = db.Column(db.String(20), nullable=False, default='CREATED')
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relacionamentos
     purchaser = db.relationship('User', foreign_keys=[purchaser_id], backref='created_purchase_orders')
+    pdf_file = db.relationship('StoredFile')
     invoices = db.relationship('Invoice', backref='purchase_order', lazy=True)
+    source_requests = db.relationship('PurchaseRequest', secondary=purchase_order_requests,
+                                      backref=db.backref('consolidated_orders', lazy='dynamic'))
     
     def __repr__(self):
         return f'<PurchaseOrder {self.order_number}>'
@@ -46,6 +57,31 @@ class PurchaseOrder(db.Model):
         }
         return colors.get(self.status, 'gray')
     
+    def get_order_lines(self):
+        """Retorna os itens de cotação atendidos pelo pedido (um por linha da requisição)"""
+        from ..models import QuotationItem
+        if self.quotation_item.purchase_request_item_id is None:
+            return [self.quotation_item]
+        return QuotationItem.query.filter(
+            QuotationItem.quotation_id == self.quotation_item.quotation_id,
+            QuotationItem.vendor_name == self.quotation_item.vendor_name,
+            QuotationItem.is_selected.is_(True),
+            QuotationItem.purchase_request_item_id.isnot(None)
+        ).order_by(QuotationItem.purchase_request_item_id).all()
+    
+    def get_total_value(self):
+        """Calcula o valor total do pedido somando as linhas"""
+        return sum(Decimal(str(line.total_value)) for line in self.get_order_lines())
+    
+    def get_source_requests(self):
+        """Retorna as requisições atendidas por este pedido"""
+        return list(self.source_requests) or [self.purchase_request]
+    
+    def update_requests_status(self, status):
+        """Propaga o status para todas as requisições de origem"""
+        for purchase_request in self.get_source_requests():
+            purchase_request.status = status
+    
     @classmethod
     def get_created_orders(cls):
         """Retorna todos os pedidos criados"""
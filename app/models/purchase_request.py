@@ -25,6 +25,7 @@ class PurchaseRequest(db.Model):
     rejected_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     rejected_at = db.Column(db.DateTime)
     rejected_reason = db.Column(db.Text)
+    auto_approved = db.Column(db.Boolean, nullable=False, default=False)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relacionamentos
@@ -34,6 +35,9 @@ class PurchaseRequest(db.Model):
     rejector = db.relationship('User', foreign_keys=[rejected_by], backref='rejected_requests')
     quotations = db.relationship('Quotation', backref='purchase_request', lazy='dynamic')
     purchase_orders = db.relationship('PurchaseOrder', backref='purchase_request', lazy=True)
+    items = db.relationship('PurchaseRequestItem', backref='purchase_request', lazy=True,
+                            order_by='PurchaseRequestItem.line_number',
+                            cascade='all, delete-orphan')
     
     @property
     def department(self):
@@ -43,6 +47,54 @@ class PurchaseRequest(db.Model):
     def __repr__(self):
         return f'<PurchaseRequest {self.request_number}>'
     
+    def is_multi_line(self):
+        """Verifica se a requisição possui mais de um item"""
+        return len(self.items) > 1
+    
+    def get_consolidated_quotation(self):
+        """Retorna a cotação consolidada ativa que inclui esta requisição (ou None)"""
+        from ..models import Quotation
+        return self.consolidated_quotations.filter(
+            Quotation.status != 'CANCELLED'
+        ).order_by(Quotation.created_at.desc()).first()
+    
+    def get_approved_items(self):
+        """Retorna os itens aprovados da requisição"""
+        return [item for item in self.items if item.is_approved()]
+    
+    def add_item(self, product, quantity, unit='UN'):
+        """
+        Adiciona uma linha à requisição
+        
+        A primeira linha também é gravada em product_id/quantity/unit da
+        requisição, mantendo compatíveis as telas e relatórios de item único
+        (na aprovação passa a ser a primeira linha aprovada).
+        """
+        from ..models import PurchaseRequestItem
+        unit_value = Decimal(str(product.average_unit_value or 0))
+        item = PurchaseRequestItem(
+            line_number=len(self.items) + 1,
+            product_id=product.id,
+            quantity=quantity,
+            unit=unit,
+            estimated_unit_value=unit_value,
+            estimated_total=unit_value * quantity,
+            status='PENDING'
+        )
+        self.items.append(item)
+        
+        if item.line_number == 1:
+            self._mirror_item(item)
+        
+        self.estimated_total = sum(Decimal(str(i.estimated_total or 0)) for i in self.items)
+        return item
+    
+    def _mirror_item(self, item):
+        """Grava a linha nos campos de item único da requisição"""
+        self.product_id = item.product_id
+        self.quantity = item.quantity
+        self.unit = item.unit
+    
     def is_pending(self):
         """Verifica se a solicitação está pendente"""
         return self.status == 'PENDING'
@@ -129,14 +181,46 @@ class PurchaseRequest(db.Model):
         """Retorna todas as requisições rejeitadas"""
         return cls.query.filter_by(status='REJECTED').order_by(cls.created_at).all()
     
+    @classmethod
+    def get_auto_approved_stats(cls):
+        """Retorna quantidade e valor total das requisições aprovadas automaticamente"""
+        count, total = db.session.query(
+            db.func.count(cls.id),
+            db.func.coalesce(db.func.sum(cls.estimated_total), 0)
+        ).filter(cls.auto_approved.is_(True)).one()
+        return count, total
+    
     def can_be_approved_by(self, user):
         """Verifica se o usuário pode aprovar esta requisição"""
         return (self.status == 'PENDING' and 
                 user.role in ['MANAGER', 'ADMIN'] and
                 self.requester.department_id == user.department_id)
     
-    def approve(self, user):
-        """Aprova a requisição"""
+    def approve(self, user, item_ids=None):
+        """
+        Aprova a requisição
+        
+        Args:
+            user: Usuário aprovador
+            item_ids: IDs dos itens aprovados (None aprova todos); os demais
+                itens pendentes são rejeitados
+        """
+        for item in self.items:
+            if item_ids is None or item.id in item_ids:
+                item.status = 'APPROVED'
+            elif item.is_pending():
+                item.status = 'REJECTED'
+        
+        if self.items and not self.get_approved_items():
+            self.reject(user, 'Nenhum item aprovado')
+            return
+        
+        # Valor estimado e campos de item único passam a considerar só as linhas aprovadas
+        approved_items = self.get_approved_items()
+        if approved_items:
+            self.estimated_total = sum(Decimal(str(i.estimated_total or 0)) for i in approved_items)
+            self._mirror_item(approved_items[0])
+        
         self.status = 'APPROVED'
         self.approved_by = user.id
         self.approved_at = datetime.utcnow()
@@ -144,6 +228,10 @@ class PurchaseRequest(db.Model):
     
     def reject(self, user, reason):
         """Rejeita a requisição"""
+        for item in self.items:
+            if item.is_pending():
+                item.status = 'REJECTED'
+        
         self.status = 'REJECTED'
         self.rejected_by = user.id
         self.rejected_at = datetime.utcnow()
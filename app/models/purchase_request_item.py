@@ -0,0 +1,59 @@
+"""
+Modelo de item (linha) de solicitação de compra
+"""
+from datetime import datetime
+from decimal import Decimal
+from app import db
+
+class PurchaseRequestItem(db.Model):
+    """Modelo de item de solicitação de compra"""
+    __tablename__ = 'purchase_request_items'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    purchase_request_id = db.Column(db.Integer, db.ForeignKey('purchase_requests.id', ondelete='CASCADE'), nullable=False)
+    line_number = db.Column(db.Integer, nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit = db.Column(db.String(20), nullable=False, default='UN')
+    estimated_unit_value = db.Column(db.Numeric(15, 2), default=Decimal('0.00'))
+    estimated_total = db.Column(db.Numeric(15, 2), default=Decimal('0.00'))
+    status = db.Column(db.String(20), nullable=False, default='PENDING')
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relacionamentos
+    product = db.relationship('Product')
+    quotation_items = db.relationship('QuotationItem', backref='purchase_request_item', lazy=True)
+    
+    def __repr__(self):
+        return f'<PurchaseRequestItem {self.purchase_request_id}/{self.line_number}>'
+    
+    def is_pending(self):
+        """Verifica se a linha está pendente"""
+        return self.status == 'PENDING'
+    
+    def is_approved(self):
+        """Verifica se a linha foi aprovada"""
+        return self.status == 'APPROVED'
+    
+    def get_status_label(self):
+        """Retorna o label do status"""
+        labels = {
+            'PENDING': 'Aguardando Aprovação',
+            'APPROVED': 'Aprovada',
+            'REJECTED': 'Rejeitada'
+        }
+        return labels.get(self.status, self.status)
+    
+    def get_status_color(self):
+        """Retorna a cor do status"""
+        colors = {
+            'PENDING': 'yellow',
+            'APPROVED': 'green',
+            'REJECTED': 'red'
+        }
+        return colors.get(self.status, 'gray')
+    
+    def calculate_total(self):
+        """Calcula o valor estimado da linha"""
+        return Decimal(str(self.estimated_unit_value or 0)) * self.quantity
@@ -5,6 +5,13 @@ from datetime import datetime
 from decimal import Decimal
 from app import db
 
+# Requisições de origem de uma cotação consolidada
+quotation_requests = db.Table(
+    'quotation_requests',
+    db.Column('quotation_id', db.Integer, db.ForeignKey('quotations.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('purchase_request_id', db.Integer, db.ForeignKey('purchase_requests.id', ondelete='CASCADE'), primary_key=True)
+)
+
 class Quotation(db.Model):
     """Modelo de cotação"""
     __tablename__ = 'quotations'
@@ -18,8 +25,13 @@ class Quotation(db.Model):
     approved_at = db.Column(db.DateTime)
     approved_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     notes = db.Column(db.Text)
+    quantity = db.Column(db.Integer, nullable=True)  # Quantidade consolidada (None = quantidade da requisição)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Relacionamentos
+    source_requests = db.relationship('PurchaseRequest', secondary=quotation_requests,
+                                      backref=db.backref('consolidated_quotations', lazy='dynamic'))
+    
     def __repr__(self):
         return f'<Quotation {self.id} - Request {self.purchase_request_id}>'
     
@@ -74,12 +86,25 @@ class Quotation(db.Model):
         selected_item = QuotationItem.query.get(selected_item_id)
         if selected_item:
             selected_item.is_selected = True
+            
+            # Requisição multi-linha: o fornecedor escolhido atende todas as linhas cotadas
+            if selected_item.purchase_request_item_id is not None:
+                QuotationItem.query.filter(
+                    QuotationItem.quotation_id == self.id,
+                    QuotationItem.vendor_name == selected_item.vendor_name,
+                    QuotationItem.purchase_request_item_id.isnot(None)
+                ).update({'is_selected': True}, synchronize_session='fetch')
         
         db.session.commit()
     
     def cancel(self):
         """Cancela a cotação"""
         self.status = 'CANCELLED'
+        
+        # Requisições consolidadas voltam para a fila de consolidação
+        if self.is_consolidated():
+            self.update_requests_status('APPROVED')
+        
         db.session.commit()
     
     def get_sorted_items(self):
@@ -87,6 +112,16 @@ class Quotation(db.Model):
         from ..models import QuotationItem
         return QuotationItem.query.filter_by(quotation_id=self.id).order_by(QuotationItem.total_value.asc()).all()
     
+    def get_selected_items(self):
+        """Retorna os itens do fornecedor selecionado"""
+        from ..models import QuotationItem
+        return QuotationItem.query.filter_by(quotation_id=self.id, is_selected=True).order_by(QuotationItem.id).all()
+    
+    def get_selected_item(self):
+        """Retorna o primeiro item do fornecedor selecionado"""
+        items = self.get_selected_items()
+        return items[0] if items else None
+    
     def get_total_value(self):
         """Calcula o valor total da cotação baseado nos itens"""
         from ..models import QuotationItem
@@ -94,6 +129,25 @@ class Quotation(db.Model):
         total = sum(item.total_value for item in items)
         return total
     
+    def is_consolidated(self):
+        """Verifica se a cotação consolida mais de uma requisição"""
+        return len(self.source_requests) > 1
+    
+    def get_source_requests(self):
+        """Retorna as requisições atendidas por esta cotação"""
+        return list(self.source_requests) or [self.purchase_request]
+    
+    def get_total_quantity(self):
+        """Retorna a quantidade a ser cotada"""
+        if self.quantity is not None:
+            return self.quantity
+        return self.purchase_request.quantity
+    
+    def update_requests_status(self, status):
+        """Propaga o status para todas as requisições de origem"""
+        for purchase_request in self.get_source_requests():
+            purchase_request.status = status
+    
     @property
     def purchaser(self):
         """Retorna o comprador da cotação"""
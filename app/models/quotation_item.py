@@ -11,6 +11,7 @@ class QuotationItem(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     quotation_id = db.Column(db.Integer, db.ForeignKey('quotations.id'), nullable=False)
+    purchase_request_item_id = db.Column(db.Integer, db.ForeignKey('purchase_request_items.id'), nullable=True)
     vendor_name = db.Column(db.String(200), nullable=False)
     vendor_cnpj = db.Column(db.String(18))
     description = db.Column(db.Text)
@@ -0,0 +1,19 @@
+"""
+Modelo de arquivo armazenado (conteúdo endereçado pelo SHA-256)
+"""
+from datetime import datetime
+from app import db
+
+class StoredFile(db.Model):
+    """Metadados de um arquivo do repositório de documentos (um registro por conteúdo distinto)"""
+    __tablename__ = 'stored_files'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    backend = db.Column(db.String(20), nullable=False, default='local')
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StoredFile {self.sha256[:12]}>'
@@ -16,4 +16,12 @@ class SystemParameter(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f'<SystemParameter {self.param_key}>'
\ No newline at end of file
+        return f'<SystemParameter {self.param_key}>'
+    
+    @classmethod
+    def get_value(cls, param_key, default=None):
+        """Retorna o valor de um parâmetro ou o valor padrão"""
+        parameter = cls.query.filter_by(param_key=param_key).first()
+        if parameter is None or parameter.param_value is None:
+            return default
+        return parameter.param_value
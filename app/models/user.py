@@ -4,9 +4,9 @@ Modelo de usuário
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from app import db
+from app.utils.passwords import hash_password, verify_password, needs_rehash
 
 class User(UserMixin, db.Model):
     """Modelo de usuário"""
@@ -32,11 +32,21 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Define a senha do usuário"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Verifica se a senha está correta"""
-        return check_password_hash(self.password_hash, password)
+        """
+        Verifica se a senha está correta
+        
+        Com a senha correta e o hash fora da política atual (bcrypt legado,
+        método ou custo antigo), o hash é refeito; a alteração é gravada no
+        próximo commit (update_last_login no login).
+        """
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
     
     def is_active(self):
         """Verifica se o usuário está ativo"""
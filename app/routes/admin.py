@@ -6,35 +6,46 @@ from flask_login import login_required, current_user
 from .. import db
 from ..models import User, Department, Product, SystemParameter, PurchaseRequest
 from ..utils.decorators import login_required_only
-from werkzeug.security import generate_password_hash
+from ..utils.read_replica import read_replica
+from ..utils.auto_approval import clear_auto_approve_cache
+from ..utils.product_search import search_products, invalidate_product_index, MAX_SEARCH_LIMIT
+from ..utils.stats_cache import get_cached_stats
+from ..utils.read_models import list_users
+from ..utils.streaming import render_listing, streaming_enabled
+from ..utils.passwords import hash_password
 from sqlalchemy import func
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 @admin_bp.route('/dashboard')
 @login_required_only
+@read_replica
 def dashboard():
     """Dashboard do administrador"""
-    # Estatísticas gerais
-    total_users = User.query.count()
-    active_users = User.query.filter_by(status='ATIVO').count()
-    total_departments = Department.query.count()
-    total_products = Product.query.filter_by(status='ATIVO').count()
-    total_requests = PurchaseRequest.query.count()
-    
+    stats = get_cached_stats('global', None, _load_dashboard_stats)
+    return render_template('admin/dashboard.html', **stats)
+
+def _load_dashboard_stats():
+    """Calcula as estatísticas do dashboard do administrador (valores simples para cache)"""
     # Requisições por status
     requests_by_status = db.session.query(
         PurchaseRequest.status,
         func.count(PurchaseRequest.id)
     ).group_by(PurchaseRequest.status).all()
     
-    return render_template('admin/dashboard.html',
-                         total_users=total_users,
-                         active_users=active_users,
-                         total_departments=total_departments,
-                         total_products=total_products,
-                         total_requests=total_requests,
-                         requests_by_status=requests_by_status)
+    # Volume aprovado automaticamente
+    auto_approved_count, auto_approved_total = PurchaseRequest.get_auto_approved_stats()
+    
+    return {
+        'total_users': User.query.count(),
+        'active_users': User.query.filter_by(status='ATIVO').count(),
+        'total_departments': Department.query.count(),
+        'total_products': Product.query.filter_by(status='ATIVO').count(),
+        'total_requests': PurchaseRequest.query.count(),
+        'requests_by_status': [(status, count) for status, count in requests_by_status],
+        'auto_approved_count': auto_approved_count,
+        'auto_approved_total': float(auto_approved_total or 0)
+    }
 
 # ==================== USUÁRIOS ====================
 
@@ -43,9 +54,9 @@ def dashboard():
 @login_required_only
 def users():
     """Lista de usuários"""
-    users = User.query.order_by(User.created_at.desc()).all()
+    users = list_users(stream=streaming_enabled())
     departments = Department.get_active_departments()
-    return render_template('admin/users.html', users=users, departments=departments)
+    return render_listing('admin/users.html', users=users, departments=departments)
 
 @admin_bp.route('/users/create', methods=['POST'])
 @login_required
@@ -73,7 +84,7 @@ def create_user():
         user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password),
+            password_hash=hash_password(password),
             role=role,
             department_id=int(department_id) if department_id else None,
             status=status
@@ -106,7 +117,7 @@ def edit_user(user_id):
         # Atualizar senha se fornecida
         password = request.form.get('password')
         if password:
-            user.password_hash = generate_password_hash(password)
+            user.password_hash = hash_password(password)
         
         db.session.commit()
         flash(f'Usuário {user.username} atualizado com sucesso!', 'success')
@@ -162,7 +173,12 @@ def create_department():
             flash('Departamento já existe.', 'danger')
             return redirect(url_for('admin.departments'))
         
-        department = Department(name=name, status=status)
+        auto_approve_limit = request.form.get('auto_approve_limit')
+        department = Department(
+            name=name,
+            status=status,
+            auto_approve_limit=float(auto_approve_limit) if auto_approve_limit else None
+        )
         db.session.add(department)
         db.session.commit()
         
@@ -182,8 +198,11 @@ def edit_department(dept_id):
         department = Department.query.get_or_404(dept_id)
         department.name = request.form.get('name')
         department.status = request.form.get('status')
+        auto_approve_limit = request.form.get('auto_approve_limit')
+        department.auto_approve_limit = float(auto_approve_limit) if auto_approve_limit else None
         
         db.session.commit()
+        clear_auto_approve_cache()
         flash(f'Departamento atualizado com sucesso!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -198,8 +217,25 @@ def edit_department(dept_id):
 @login_required_only
 def products():
     """Lista de produtos"""
-    products = Product.query.order_by(Product.product_name).all()
-    return render_template('admin/products.html', products=products)
+    page = request.args.get('page', 1, type=int)
+    search = request.args.get('q', '').strip()
+    
+    if search:
+        # Busca ranqueada (SKU exato/prefixo primeiro), sem paginação
+        ids = [r['id'] for r in search_products(search, limit=MAX_SEARCH_LIMIT, include_inactive=True)]
+        found = {p.id: p for p in Product.query.filter(Product.id.in_(ids)).all()} if ids else {}
+        products = [found[i] for i in ids if i in found]
+        pagination = None
+    else:
+        pagination = Product.query.order_by(Product.product_name).paginate(
+            page=page, per_page=50, error_out=False
+        )
+        products = pagination.items
+    
+    return render_template('admin/products.html',
+                         products=products,
+                         pagination=pagination,
+                         search=search)
 
 @admin_bp.route('/products/create', methods=['POST'])
 @login_required
@@ -227,6 +263,7 @@ def create_product():
         
         db.session.add(product)
         db.session.commit()
+        invalidate_product_index(product)
         
         flash(f'Produto {product_name} criado com sucesso!', 'success')
     except Exception as e:
@@ -249,6 +286,7 @@ def edit_product(product_id):
         product.status = request.form.get('status')
         
         db.session.commit()
+        invalidate_product_index(product)
         flash(f'Produto atualizado com sucesso!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -277,6 +315,7 @@ def edit_parameter(param_id):
         parameter.updated_by = current_user.id
         
         db.session.commit()
+        clear_auto_approve_cache()
         flash('Parâmetro atualizado com sucesso!', 'success')
     except Exception as e:
         db.session.rollback()
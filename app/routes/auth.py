@@ -5,6 +5,9 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_user, logout_user, current_user
 from .. import db
 from ..models import User
+from ..utils.passwords import HashingBusy
+from ..utils.login_throttle import login_retry_after, record_login_attempt
+from ..utils.environment_context import set_current_environment
 from environment_config import get_available_environments
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -42,15 +45,28 @@ def login():
             db.engine.dispose()
             
             # Armazenar ambiente na sessão
-            session['selected_environment'] = environment
+            set_current_environment(environment)
             
         except Exception as e:
             flash(f'Erro ao conectar com o ambiente {environment}: {str(e)}', 'danger')
             return render_template('auth/login.html', environments=available_envs)
         
+        # Tentativas acima do limite não chegam a calcular o hash
+        retry_after = login_retry_after(username, request.remote_addr)
+        if retry_after:
+            flash(f'Muitas tentativas de login. Tente novamente em {retry_after} segundos.', 'danger')
+            return render_template('auth/login.html', environments=available_envs), 429
+        
         user = User.query.filter_by(username=username).first()
         
-        if user and user.check_password(password):
+        try:
+            authenticated = bool(user and user.check_password(password))
+        except HashingBusy:
+            flash('Sistema ocupado no momento. Tente novamente em alguns segundos.', 'warning')
+            return render_template('auth/login.html', environments=available_envs), 503
+        record_login_attempt(username, request.remote_addr, authenticated)
+        
+        if authenticated:
             if not user.is_active():
                 flash('Sua conta está inativa. Entre em contato com o administrador.', 'danger')
                 return render_template('auth/login.html', environments=available_envs)
@@ -94,7 +110,7 @@ def switch_environment():
         db.engine.dispose()
         
         # Atualizar ambiente na sessão
-        session['selected_environment'] = environment
+        set_current_environment(environment)
         
         env_config = available_envs[environment]
         flash(f'Ambiente alterado para {env_config["name"]} com sucesso!', 'success')
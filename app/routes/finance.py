@@ -6,6 +6,8 @@ from flask_login import login_required, current_user
 from .. import db
 from ..models import PaymentRequest, Invoice, PurchaseOrder, PurchaseRequest
 from ..utils.decorators import login_required_only
+from ..utils.inbox import current_inbox_sections
+from ..utils.read_replica import read_replica
 from sqlalchemy import func
 from datetime import datetime, timedelta
 
@@ -14,33 +16,29 @@ finance_bp = Blueprint('finance', __name__, url_prefix='/finance')
 @finance_bp.route('/dashboard')
 @login_required
 @login_required_only
+@read_replica
 def dashboard():
     """Dashboard do financeiro"""
-    # Pagamentos pendentes (aguardando liberação do manager)
-    pending_payments = Payment.query.filter_by(status='PENDING').all()
+    # Notas aguardando solicitação de pagamento: caixa de entrada (reaproveitada pelo badge)
+    pending_invoices = current_inbox_sections()['INVOICE_PAYMENT_REQUEST']
     
-    # Pagamentos liberados (aguardando pagamento)
-    released_payments = Payment.query.filter_by(status='RELEASED').all()
-    
-    # Pagamentos realizados (últimos 30 dias)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    paid_payments = Payment.query.filter(
-        Payment.status == 'PAID',
-        Payment.paid_at >= thirty_days_ago
-    ).all()
-    
-    # Calcular totais
-    total_pending = sum([float(p.invoice.total_value) for p in pending_payments])
-    total_released = sum([float(p.invoice.total_value) for p in released_payments])
-    total_paid = sum([float(p.invoice.total_value) for p in paid_payments])
+    # Totais das solicitações de pagamento em uma única consulta
+    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    pending_count, pending_amount, approved_payments = db.session.query(
+        func.count(PaymentRequest.id).filter(PaymentRequest.status == 'AGUARDANDO_PAGAMENTO'),
+        func.coalesce(func.sum(PaymentRequest.approved_value).filter(
+            PaymentRequest.status == 'AGUARDANDO_PAGAMENTO'
+        ), 0),
+        func.count(PaymentRequest.id).filter(
+            PaymentRequest.status == 'PAGO', PaymentRequest.updated_at >= month_start
+        )
+    ).one()
     
     return render_template('finance/dashboard.html',
-                         pending_payments=pending_payments,
-                         released_payments=released_payments,
-                         paid_payments=paid_payments,
-                         total_pending=total_pending,
-                         total_released=total_released,
-                         total_paid=total_paid)
+                         pending_invoices=pending_invoices,
+                         pending_count=pending_count,
+                         pending_amount=float(pending_amount),
+                         approved_payments=approved_payments)
 
 @finance_bp.route('/payments')
 @login_required
@@ -102,6 +100,7 @@ def pay(payment_id):
 @finance_bp.route('/reports')
 @login_required
 @login_required_only
+@read_replica
 def reports():
     """Relatórios financeiros"""
     # Pagamentos por status
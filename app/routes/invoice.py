@@ -1,27 +1,41 @@
 """
 Rotas de notas fiscais
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort
 from flask_login import login_required, current_user
-from datetime import datetime
+from decimal import Decimal
+from urllib.parse import unquote
+from werkzeug.exceptions import RequestEntityTooLarge
 from .. import db
-from ..models import Invoice, PurchaseOrder, QuotationItem
+from ..models import Invoice, InvoiceAttachment, PurchaseOrder, QuotationItem, PaymentRequest, Payment, User
 from ..utils.decorators import login_required_only
+from ..utils.document_store import send_document
+from ..utils.http_cache import conditional_get, source, related
+from ..utils.thumbnails import schedule_thumbnail
+from ..utils.uploads import UploadRejected, store_upload
 
 invoice_bp = Blueprint('invoice', __name__, url_prefix='/invoices')
 
+def _index_criteria():
+    """Filtros da lista (parâmetros da URL), usados também no ETag"""
+    status_filter = request.args.get('status', '')
+    return [Invoice.status == status_filter] if status_filter else []
+
+def _index_sources():
+    """Notas do filtro e pedidos exibidos"""
+    invoices = source(Invoice, *_index_criteria())
+    return [invoices, related(PurchaseOrder, Invoice.purchase_order_id, invoices)]
+
 @invoice_bp.route('/')
 @login_required
 @login_required_only
+@conditional_get(_index_sources)
 def index():
     """Lista de notas fiscais"""
     page = request.args.get('page', 1, type=int)
     status_filter = request.args.get('status', '')
     
-    query = Invoice.query
-    
-    if status_filter:
-        query = query.filter_by(status=status_filter)
+    query = Invoice.query.filter(*_index_criteria())
     
     invoices = query.order_by(Invoice.created_at.desc()).paginate(
         page=page, per_page=20, error_out=False
@@ -51,46 +65,35 @@ def create_from_order(order_id):
 def create():
     """Criar nota fiscal"""
     try:
-        purchase_order_id = request.form.get('purchase_order_id')
-        supplier_id = request.form.get('supplier_id')
-        invoice_number = request.form.get('invoice_number')
-        issue_date = request.form.get('issue_date')
-        receipt_date = request.form.get('receipt_date')
+        purchase_order_id = request.form.get('purchase_order_id', type=int)
+        invoice_number = request.form.get('invoice_number', '').strip()
         total_value = request.form.get('total_value')
         notes = request.form.get('notes')
         
         # Buscar o pedido para comparar valores
-        order = PurchaseOrder.query.get(purchase_order_id)
-        
-        # Converter datas
-        issue_date = datetime.strptime(issue_date, '%Y-%m-%d').date()
-        receipt_date = datetime.strptime(receipt_date, '%Y-%m-%d').date()
+        order = PurchaseOrder.query.get_or_404(purchase_order_id)
         
         invoice = Invoice(
             invoice_number=invoice_number,
-            purchase_order_id=purchase_order_id,
-            supplier_id=supplier_id,
-            issue_date=issue_date,
-            receipt_date=receipt_date,
-            total_value=float(total_value),
-            order_value=float(order.total_value),
+            purchase_order=order,
+            vendor_cnpj=request.form.get('vendor_cnpj') or order.quotation_item.vendor_cnpj,
+            total_value=Decimal(total_value),
             notes=notes,
-            created_by=current_user.id
+            informed_by=current_user.id
         )
         
-        # Calcular diferenças
-        invoice.calculate_difference()
-        
-        # Definir status baseado na diferença
-        if invoice.has_significant_difference():
-            invoice.status = 'DIVERGENCIA_DETECTADA'
-        else:
-            invoice.status = 'PENDENTE_CONFERENCIA'
+        # Conferência com o total das linhas do pedido (inclusive pedidos consolidados)
+        matches = invoice.matches_order()
         
         db.session.add(invoice)
         db.session.commit()
         
-        flash(f'Nota fiscal {invoice_number} registrada com sucesso!', 'success')
+        if matches:
+            flash(f'Nota fiscal {invoice_number} registrada com sucesso!', 'success')
+        else:
+            difference = invoice.get_order_difference()
+            flash(f'Nota fiscal {invoice_number} registrada com divergência de R$ {difference:.2f} '
+                  f'em relação ao pedido {order.order_number}.', 'warning')
         return redirect(url_for('invoice.view', invoice_id=invoice.id))
         
     except Exception as e:
@@ -101,6 +104,14 @@ def create():
 @invoice_bp.route('/<int:invoice_id>')
 @login_required
 @login_required_only
+@conditional_get(lambda invoice_id: [
+    source(Invoice, Invoice.id == invoice_id),
+    source(PaymentRequest, PaymentRequest.invoice_id == invoice_id),
+    source(Payment, Payment.invoice_id == invoice_id),
+    source(InvoiceAttachment, InvoiceAttachment.invoice_id == invoice_id),
+    related(PurchaseOrder, Invoice.purchase_order_id, source(Invoice, Invoice.id == invoice_id)),
+    related(User, Invoice.informed_by, source(Invoice, Invoice.id == invoice_id))
+])
 def view(invoice_id):
     """Visualizar nota fiscal"""
     invoice = Invoice.query.get_or_404(invoice_id)
@@ -146,5 +157,80 @@ def reject(invoice_id):
     
     return redirect(url_for('invoice.view', invoice_id=invoice_id))
 
+@invoice_bp.route('/<int:invoice_id>/attachments', methods=['POST'])
+@login_required
+@login_required_only
+def upload_attachment(invoice_id):
+    """
+    Anexar arquivo à nota fiscal
+    
+    O arquivo pode vir como corpo da requisição (fetch com o File como body e
+    o nome no cabeçalho X-File-Name, resposta JSON) ou em formulário multipart
+    (campo "file", resposta com redirect). No primeiro caso o conteúdo é
+    gravado direto do stream, sem passar pelo parser de multipart.
+    """
+    invoice = Invoice.query.get_or_404(invoice_id)
+    multipart = request.mimetype == 'multipart/form-data'
+    
+    try:
+        if multipart:
+            upload = request.files.get('file')
+            if upload is None or not upload.filename:
+                raise UploadRejected('Selecione um arquivo.')
+            stream, filename = upload.stream, upload.filename
+        else:
+            stream, filename = request.stream, unquote(request.headers.get('X-File-Name', ''))
+        
+        stored_file, filename = store_upload(stream, filename)
+        attachment = InvoiceAttachment(
+            invoice_id=invoice.id,
+            file=stored_file,
+            filename=filename,
+            uploaded_by=current_user.id
+        )
+        db.session.add(attachment)
+        db.session.commit()
+    except (UploadRejected, RequestEntityTooLarge) as e:
+        db.session.rollback()
+        too_large = isinstance(e, RequestEntityTooLarge)
+        message = 'Arquivo maior que o limite permitido.' if too_large else str(e)
+        if not multipart:
+            return jsonify({'error': message}), 413 if too_large else 400
+        flash(message, 'danger')
+        return redirect(url_for('invoice.view', invoice_id=invoice_id))
+    except Exception as e:
+        db.session.rollback()
+        if not multipart:
+            return jsonify({'error': f'Erro ao anexar arquivo: {str(e)}'}), 500
+        flash(f'Erro ao anexar arquivo: {str(e)}', 'danger')
+        return redirect(url_for('invoice.view', invoice_id=invoice_id))
+    
+    # A miniatura é gerada em segundo plano; a resposta não espera por ela
+    schedule_thumbnail(attachment)
+    
+    if not multipart:
+        return jsonify({
+            'id': attachment.id,
+            'filename': attachment.filename,
+            'thumbnail_status': attachment.thumbnail_status
+        }), 201
+    flash(f'Arquivo {attachment.filename} anexado com sucesso!', 'success')
+    return redirect(url_for('invoice.view', invoice_id=invoice_id))
 
+@invoice_bp.route('/attachments/<int:attachment_id>')
+@login_required
+@login_required_only
+def download_attachment(attachment_id):
+    """Download do anexo da nota fiscal"""
+    attachment = InvoiceAttachment.query.get_or_404(attachment_id)
+    return send_document(attachment.file, attachment.filename)
 
+@invoice_bp.route('/attachments/<int:attachment_id>/thumbnail')
+@login_required
+@login_required_only
+def attachment_thumbnail(attachment_id):
+    """Miniatura do anexo (404 enquanto não estiver pronta)"""
+    attachment = InvoiceAttachment.query.get_or_404(attachment_id)
+    if attachment.thumbnail_file is None:
+        abort(404)
+    return send_document(attachment.thumbnail_file, f'{attachment.id}.png', as_attachment=False)
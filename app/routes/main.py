@@ -1,10 +1,14 @@
 """
 Rotas principais da aplicação
 """
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, render_template, redirect, url_for, request, jsonify, Response, stream_with_context, abort
 from flask_login import login_required, current_user
 from .. import db
-from ..models import PurchaseRequest, Department
+from ..models import PurchaseRequest, Department, DocumentLookup
+from ..utils.product_search import search_products, DEFAULT_SEARCH_LIMIT
+from ..utils.inbox import get_inbox
+from ..utils.live_updates import get_broker, channels_for, stream, is_enabled as live_updates_enabled
+from ..utils.health import health_report, health_status, can_view_details
 from sqlalchemy import func, extract
 from datetime import datetime, timedelta
 
@@ -32,3 +36,91 @@ def dashboard():
     dashboard_route = role_dashboards.get(current_user.role, 'main.index')
     return redirect(url_for(dashboard_route))
 
+@main_bp.route('/api/products/search')
+@login_required
+def search_products_api():
+    """Autocomplete de produtos (SKU, nome ou descrição)"""
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    
+    # Evita varrer o catálogo com termos de um único caractere
+    if len(query) < 2:
+        return jsonify({'query': query, 'results': []})
+    
+    return jsonify({'query': query, 'results': search_products(query, limit=limit)})
+
+@main_bp.route('/search')
+@login_required
+def search_documents():
+    """Busca global por número de documento (requisição, pedido, nota, pagamento)"""
+    query = request.args.get('q', '').strip()
+    
+    # Número exato e único: ir direto para o documento
+    exact = DocumentLookup.resolve(query, user=current_user)
+    if len(exact) == 1:
+        endpoint, kwargs = exact[0].get_view_endpoint()
+        return redirect(url_for(endpoint, **kwargs))
+    
+    results = exact or DocumentLookup.search(query, limit=50, user=current_user)
+    return render_template('search.html', query=query, results=results)
+
+@main_bp.route('/api/documents/search')
+@login_required
+def search_documents_api():
+    """Busca de documentos por prefixo do número (JSON)"""
+    query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int), 50))
+    
+    results = []
+    for entry in DocumentLookup.search(query, limit=limit, user=current_user):
+        endpoint, kwargs = entry.get_view_endpoint()
+        results.append({
+            'document_number': entry.document_number,
+            'document_type': entry.document_type,
+            'document_type_label': entry.get_type_label(),
+            'document_id': entry.document_id,
+            'status': entry.status,
+            'url': url_for(endpoint, **kwargs)
+        })
+    
+    return jsonify({'query': query, 'results': results})
+
+@main_bp.route('/inbox')
+@login_required
+def inbox():
+    """Caixa de entrada: itens aguardando ação do usuário"""
+    items = get_inbox(current_user)
+    total_value = sum(item.value for item in items)
+    return render_template('inbox.html', items=items, total_value=total_value)
+
+@main_bp.route('/events/stream')
+@login_required
+def event_stream():
+    """Stream SSE com as atualizações do workflow para o usuário logado"""
+    if not live_updates_enabled():
+        abort(404)
+    # Canais resolvidos antes do stream: o gerador não usa a sessão do banco
+    subscription = get_broker().subscribe(channels_for(current_user))
+    db.session.remove()
+    
+    response = Response(stream_with_context(stream(subscription)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: não bufferizar o stream
+    return response
+
+@main_bp.route('/health')
+def health():
+    """
+    Saúde da aplicação (sem login, para o balanceador): apenas ok/error do banco principal
+    
+    Administradores ou requisições com o HEALTH_TOKEN recebem o relatório completo
+    (pool de conexões e SELECT 1 por ambiente).
+    """
+    if can_view_details():
+        report, healthy = health_report()
+    else:
+        report, healthy = {}, health_status()
+    response = jsonify(dict(report, status='ok' if healthy else 'error'))
+    response.status_code = 200 if healthy else 503
+    response.headers['Cache-Control'] = 'no-store'
+    return response
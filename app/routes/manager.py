@@ -4,8 +4,14 @@ Rotas do gerente (manager)
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from .. import db
-from ..models import PurchaseRequest, Quotation, PaymentRequest, Payment
+from ..models import PurchaseRequest, Quotation, PaymentRequest, Payment, PurchaseOrder, User
 from ..utils.decorators import login_required_only
+from ..utils.read_replica import read_replica
+from ..utils.stats_cache import get_cached_stats
+from ..utils.inbox import current_inbox_sections
+from ..utils.read_models import list_department_requests
+from ..utils.request_lines import parse_approved_item_ids
+from ..utils.streaming import render_listing, streaming_enabled
 from sqlalchemy import func
 from datetime import datetime
 
@@ -14,71 +20,47 @@ manager_bp = Blueprint('manager', __name__, url_prefix='/manager')
 @manager_bp.route('/dashboard')
 @login_required
 @login_required_only
+@read_replica
 def dashboard():
     """Dashboard do gerente"""
-    # Requisições pendentes de aprovação do departamento
-    pending_requests = PurchaseRequest.query.join(
-        PurchaseRequest.requester
-    ).filter(
-        PurchaseRequest.status == 'PENDING',
-        PurchaseRequest.requester.has(department_id=current_user.department_id)
-    ).order_by(PurchaseRequest.created_at.asc()).all()
-    
-    # Cotações pendentes de aprovação
-    pending_quotations = Quotation.query.join(
-        Quotation.purchase_request
-    ).join(
-        PurchaseRequest.requester
-    ).filter(
-        Quotation.status == 'RELEASED',
-        PurchaseRequest.requester.has(department_id=current_user.department_id)
-    ).order_by(Quotation.released_at.asc()).all()
-    
-    # Pagamentos pendentes de liberação
-    pending_payments = PaymentRequest.query.filter(
-        PaymentRequest.status == 'AGUARDANDO_PAGAMENTO'
-    ).all()
-    
-    # Filtrar por departamento
-    dept_payments = []
-    for payment in pending_payments:
-        if (payment.purchase_order and 
-            payment.purchase_order.purchase_request and 
-            payment.purchase_order.purchase_request.requester and
-            payment.purchase_order.purchase_request.requester.department_id == current_user.department_id):
-            dept_payments.append(payment)
-    
-    pending_payments = dept_payments
+    # Seções a partir da caixa de entrada (uma consulta, reaproveitada pelo badge da navbar)
+    sections = current_inbox_sections()
+    pending_requests = sections['PURCHASE_REQUEST_APPROVAL']
+    pending_quotations = sections['QUOTATION_APPROVAL']
+    pending_payments = sections['PAYMENT_APPROVAL']
     
     # Estatísticas do departamento
-    dept_requests = PurchaseRequest.query.join(
-        PurchaseRequest.requester
-    ).filter(
-        PurchaseRequest.requester.has(department_id=current_user.department_id)
-    ).all()
-    
-    total_requests = len(dept_requests)
-    approved_requests = len([r for r in dept_requests if r.status not in ['PENDING', 'REJECTED', 'CANCELLED']])
+    department_id = current_user.department_id
+    stats = get_cached_stats('department', department_id, lambda: _load_department_stats(department_id))
     
     return render_template('manager/dashboard.html',
                          pending_requests=pending_requests,
                          pending_quotations=pending_quotations,
                          pending_payments=pending_payments,
-                         total_requests=total_requests,
-                         approved_requests=approved_requests)
+                         **stats)
+
+def _load_department_stats(department_id):
+    """Calcula as estatísticas do departamento (valores simples para cache)"""
+    counts = dict(db.session.query(
+        PurchaseRequest.status,
+        func.count(PurchaseRequest.id)
+    ).join(User, PurchaseRequest.user_id == User.id).filter(
+        User.department_id == department_id
+    ).group_by(PurchaseRequest.status).all())
+    
+    return {
+        'total_requests': sum(counts.values()),
+        'approved_requests': sum(c for s, c in counts.items() if s not in ['PENDING', 'REJECTED', 'CANCELLED'])
+    }
 
 @manager_bp.route('/requests')
 @login_required
 @login_required_only
 def requests():
     """Lista de requisições do departamento"""
-    dept_requests = PurchaseRequest.query.join(
-        PurchaseRequest.requester
-    ).filter(
-        PurchaseRequest.requester.has(department_id=current_user.department_id)
-    ).order_by(PurchaseRequest.created_at.desc()).all()
+    dept_requests = list_department_requests(current_user.department_id, stream=streaming_enabled())
     
-    return render_template('manager/requests.html', requests=dept_requests)
+    return render_listing('manager/requests.html', requests=dept_requests)
 
 @manager_bp.route('/requests/<int:request_id>/approve', methods=['POST'])
 @login_required
@@ -93,8 +75,13 @@ def approve_request(request_id):
             flash('Você não pode aprovar esta requisição.', 'danger')
             return redirect(url_for('manager.requests'))
         
-        purchase_request.approve(current_user)
-        flash(f'Requisição {purchase_request.request_number} aprovada com sucesso!', 'success')
+        # Aprovação por linha: apenas os itens marcados são aprovados
+        purchase_request.approve(current_user, parse_approved_item_ids(request.form))
+        
+        if purchase_request.is_rejected():
+            flash(f'Requisição {purchase_request.request_number} rejeitada: nenhum item aprovado.', 'warning')
+        else:
+            flash(f'Requisição {purchase_request.request_number} aprovada com sucesso!', 'success')
         
     except Exception as e:
         db.session.rollback()
@@ -7,21 +7,31 @@ from datetime import datetime
 from .. import db
 from ..models import PaymentRequest, Invoice, PurchaseOrder
 from ..utils.decorators import login_required_only
+from ..utils.read_replica import read_replica
+from ..utils.http_cache import conditional_get, source, related
 
 payment_request_bp = Blueprint('payment_request', __name__, url_prefix='/payment-requests')
 
+def _index_criteria():
+    """Filtros da lista (parâmetros da URL), usados também no ETag"""
+    status_filter = request.args.get('status', '')
+    return [PaymentRequest.status == status_filter] if status_filter else []
+
+def _index_sources():
+    """Solicitações do filtro e notas exibidas"""
+    requests = source(PaymentRequest, *_index_criteria())
+    return [requests, related(Invoice, PaymentRequest.invoice_id, requests)]
+
 @payment_request_bp.route('/')
 @login_required
 @login_required_only
+@conditional_get(_index_sources)
 def index():
     """Lista de solicitações de pagamento"""
     page = request.args.get('page', 1, type=int)
     status_filter = request.args.get('status', '')
     
-    query = PaymentRequest.query
-    
-    if status_filter:
-        query = query.filter_by(status=status_filter)
+    query = PaymentRequest.query.filter(*_index_criteria())
     
     requests = query.order_by(PaymentRequest.created_at.desc()).paginate(
         page=page, per_page=20, error_out=False
@@ -146,6 +156,7 @@ def cancel(request_id):
 @payment_request_bp.route('/export')
 @login_required
 @login_required_only
+@read_replica
 def export():
     """Exportar relatório de pagamentos"""
     start_date = request.args.get('start_date')
@@ -4,23 +4,36 @@ Rotas de pedidos de compra
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from .. import db
-from ..models import PurchaseOrder, PurchaseRequest, Quotation, QuotationItem
+from ..models import PurchaseOrder, PurchaseRequest, Quotation, QuotationItem, User
 from ..utils.decorators import login_required_only
+from ..utils.http_cache import conditional_get, source, related
 
 purchase_order_bp = Blueprint('purchase_order', __name__, url_prefix='/purchase-orders')
 
+def _index_criteria():
+    """Filtros da lista (parâmetros da URL), usados também no ETag"""
+    status_filter = request.args.get('status', '')
+    return [PurchaseOrder.status == status_filter] if status_filter else []
+
+def _index_sources():
+    """Pedidos do filtro, requisições e compradores exibidos"""
+    orders = source(PurchaseOrder, *_index_criteria())
+    return [
+        orders,
+        related(PurchaseRequest, PurchaseOrder.purchase_request_id, orders),
+        related(User, PurchaseOrder.purchaser_id, orders)
+    ]
+
 @purchase_order_bp.route('/')
 @login_required
 @login_required_only
+@conditional_get(_index_sources)
 def index():
     """Lista de pedidos de compra"""
     page = request.args.get('page', 1, type=int)
     status_filter = request.args.get('status', '')
     
-    query = PurchaseOrder.query
-    
-    if status_filter:
-        query = query.filter_by(status=status_filter)
+    query = PurchaseOrder.query.filter(*_index_criteria())
     
     orders = query.order_by(PurchaseOrder.created_at.desc()).paginate(
         page=page, per_page=20, error_out=False
@@ -91,11 +104,17 @@ def create():
             created_by=current_user.id
         )
         
+        # Requisição consolidada: o pedido atende todo o grupo
+        request_obj = PurchaseRequest.query.get(purchase_request_id)
+        consolidated = request_obj.get_consolidated_quotation()
+        if consolidated is not None:
+            order.source_requests.extend(consolidated.get_source_requests())
+        
         db.session.add(order)
+        db.session.flush()
         
-        # Atualizar status da requisição
-        request_obj = PurchaseRequest.query.get(purchase_request_id)
-        request_obj.status = 'ORDENADA'
+        # Atualizar status das requisições
+        order.update_requests_status('ORDENADA')
         
         db.session.commit()
         
@@ -3,33 +3,81 @@ Rotas de requisições de compra
 """
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy import select
 from .. import db
-from ..models import PurchaseRequest, Product, Department, User
+from ..models import PurchaseRequest, PurchaseRequestItem, Department, User, Quotation, Product
 from ..utils.decorators import login_required_only
+from ..utils.auto_approval import try_auto_approve
+from ..utils.request_lines import parse_request_lines, parse_approved_item_ids
+from ..utils.http_cache import conditional_get, source, related
 
 purchase_request_bp = Blueprint('purchase_request', __name__, url_prefix='/purchase-requests')
 
-@purchase_request_bp.route('/')
-@login_required
-def index():
-    """Lista de requisições de compra"""
-    page = request.args.get('page', 1, type=int)
-    status_filter = request.args.get('status', '')
-    department_filter = request.args.get('department', '')
-    
-    query = PurchaseRequest.query
+def _department_users(department_id):
+    """Subconsulta com os IDs dos usuários do departamento"""
+    return select(User.id).where(User.department_id == department_id)
+
+def _index_criteria():
+    """Filtros da lista (papel do usuário e parâmetros da URL), usados também no ETag"""
+    criteria = []
     
     # Filtros baseados no role do usuário
     if current_user.role == 'USER':
-        query = query.filter_by(user_id=current_user.id)
+        criteria.append(PurchaseRequest.user_id == current_user.id)
     elif current_user.role == 'MANAGER':
-        query = query.join(User).filter(User.department_id == current_user.department_id)
+        criteria.append(PurchaseRequest.user_id.in_(_department_users(current_user.department_id)))
     
+    status_filter = request.args.get('status', '')
     if status_filter:
-        query = query.filter_by(status=status_filter)
+        criteria.append(PurchaseRequest.status == status_filter)
     
+    department_filter = request.args.get('department', '')
     if department_filter:
-        query = query.join(User).filter(User.department_id == department_filter)
+        criteria.append(PurchaseRequest.user_id.in_(_department_users(department_filter)))
+    
+    return criteria
+
+def _index_sources():
+    """Requisições do filtro, produtos e solicitantes exibidos e departamentos do filtro"""
+    requests = source(PurchaseRequest, *_index_criteria())
+    return [
+        requests,
+        related(Product, PurchaseRequest.product_id, requests),
+        related(User, PurchaseRequest.user_id, requests),
+        source(Department, Department.status == 'ATIVO')
+    ]
+
+def _view_sources(request_id):
+    """Requisição, itens, cotações e os cadastros que a página mostra"""
+    request_row = PurchaseRequest.id == request_id
+    users = select(PurchaseRequest.user_id).where(request_row).union(
+        select(PurchaseRequest.approved_by).where(request_row),
+        select(PurchaseRequest.rejected_by).where(request_row)
+    )
+    products = select(PurchaseRequest.product_id).where(request_row).union(
+        select(PurchaseRequestItem.product_id).where(PurchaseRequestItem.purchase_request_id == request_id)
+    )
+    return [
+        source(PurchaseRequest, request_row),
+        source(PurchaseRequestItem, PurchaseRequestItem.purchase_request_id == request_id),
+        source(Quotation, Quotation.purchase_request_id == request_id),
+        source(Product, Product.id.in_(products)),
+        source(User, User.id.in_(users)),
+        source(Department, Department.id.in_(
+            select(User.department_id).where(User.id.in_(select(PurchaseRequest.user_id).where(request_row)))
+        ))
+    ]
+
+@purchase_request_bp.route('/')
+@login_required
+@conditional_get(_index_sources)
+def index():
+    """Lista de requisições de compra"""
+    page = request.args.get('page', 1, type=int)
+    status_filter = request.args.get('status', '')
+    department_filter = request.args.get('department', '')
+    
+    query = PurchaseRequest.query.filter(*_index_criteria())
     
     requests = query.order_by(PurchaseRequest.created_at.desc()).paginate(
         page=page, per_page=20, error_out=False
@@ -50,45 +98,52 @@ def create():
     """Criar nova requisição de compra"""
     if request.method == 'POST':
         try:
-            product_id = request.form.get('product_id')
-            quantity = request.form.get('quantity')
+            lines = parse_request_lines(request.form)
             justification = request.form.get('justification')
             notes = request.form.get('notes')
             
             # Gerar número da requisição
             request_number = PurchaseRequest.generate_request_number()
             
-            # Calcular valor estimado (usando preço médio do produto)
-            product = Product.query.get(product_id)
-            estimated_total = float(product.average_unit_value) * int(quantity) if product else 0
-            
             request_obj = PurchaseRequest(
                 request_number=request_number,
                 user_id=current_user.id,
-                product_id=product_id,
-                quantity=int(quantity),
-                unit='UN',
                 justification=justification,
-                estimated_total=estimated_total,
                 notes=notes,
                 status='PENDING'
             )
             
+            # Adicionar linhas (valor estimado pelo preço médio de cada produto)
+            for product, quantity, unit in lines:
+                request_obj.add_item(product, quantity, unit)
+            
             db.session.add(request_obj)
+            
+            # Aprovação automática para requisições abaixo do limite
+            auto_approved = try_auto_approve(request_obj, current_user.department_id)
+            
             db.session.commit()
             
-            flash(f'Requisição {request_number} criada com sucesso!', 'success')
+            if auto_approved:
+                flash(f'Requisição {request_number} criada e aprovada automaticamente!', 'success')
+            else:
+                flash(f'Requisição {request_number} criada com sucesso!', 'success')
             return redirect(url_for('purchase_request.index'))
             
+        except ValueError as e:
+            # Linhas inválidas no formulário (parse_request_lines)
+            db.session.rollback()
+            flash(str(e), 'danger')
         except Exception as e:
             db.session.rollback()
             flash(f'Erro ao criar requisição: {str(e)}', 'danger')
     
-    products = Product.query.filter_by(status='ATIVO').all()
-    return render_template('purchase_request/create.html', products=products)
+    # Os produtos são carregados sob demanda pelo autocomplete (main.search_products_api)
+    return render_template('purchase_request/create.html')
 
 @purchase_request_bp.route('/<int:request_id>')
 @login_required
+@conditional_get(_view_sources)
 def view(request_id):
     """Visualizar requisição de compra"""
     request_obj = PurchaseRequest.query.get_or_404(request_id)
@@ -98,7 +153,7 @@ def view(request_id):
         flash('Você não tem permissão para visualizar esta requisição.', 'danger')
         return redirect(url_for('purchase_request.index'))
     
-    if current_user.role == 'MANAGER' and request_obj.department_id != current_user.department_id:
+    if current_user.role == 'MANAGER' and request_obj.requester.department_id != current_user.department_id:
         flash('Você não tem permissão para visualizar esta requisição.', 'danger')
         return redirect(url_for('purchase_request.index'))
     
@@ -113,17 +168,17 @@ def approve(request_id):
         request_obj = PurchaseRequest.query.get_or_404(request_id)
         
         # Verificar se o gerente pode aprovar (mesmo departamento)
-        if request_obj.department_id != current_user.department_id:
+        if request_obj.requester.department_id != current_user.department_id:
             flash('Você só pode aprovar requisições do seu departamento.', 'danger')
             return redirect(url_for('purchase_request.view', request_id=request_id))
         
-        request_obj.status = 'APROVADA'
-        request_obj.approved_by = current_user.id
-        request_obj.approved_at = db.func.now()
-        
-        db.session.commit()
+        # Aprovação por linha: apenas os itens marcados são aprovados
+        request_obj.approve(current_user, parse_approved_item_ids(request.form))
         
-        flash(f'Requisição {request_obj.request_number} aprovada com sucesso!', 'success')
+        if request_obj.is_rejected():
+            flash(f'Requisição {request_obj.request_number} rejeitada: nenhum item aprovado.', 'warning')
+        else:
+            flash(f'Requisição {request_obj.request_number} aprovada com sucesso!', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Erro ao aprovar requisição: {str(e)}', 'danger')
@@ -140,7 +195,7 @@ def reject(request_id):
         rejected_reason = request.form.get('rejected_reason')
         
         # Verificar se o gerente pode rejeitar (mesmo departamento)
-        if request_obj.department_id != current_user.department_id:
+        if request_obj.requester.department_id != current_user.department_id:
             flash('Você só pode rejeitar requisições do seu departamento.', 'danger')
             return redirect(url_for('purchase_request.view', request_id=request_id))
         
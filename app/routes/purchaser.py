@@ -1,12 +1,17 @@
 """
 Rotas do comprador (purchaser)
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from .. import db
 from ..models import PurchaseRequest, Quotation, QuotationItem, PurchaseOrder
 from ..utils.decorators import login_required_only
-from ..utils.pdf_generator import PDFGenerator
+from ..utils.consolidation import consolidate_requests
+from ..utils.file_serving import serve_file
+from ..utils.document_store import get_document_store, send_document
+from ..utils.inbox import current_inbox_sections
+from ..utils.read_models import list_purchase_orders
+from ..utils.streaming import render_listing, streaming_enabled
 import os
 
 purchaser_bp = Blueprint('purchaser', __name__, url_prefix='/purchaser')
@@ -16,28 +21,14 @@ purchaser_bp = Blueprint('purchaser', __name__, url_prefix='/purchaser')
 @login_required_only
 def dashboard():
     """Dashboard do comprador"""
-    # Requisições aprovadas aguardando cotação
-    approved_requests = PurchaseRequest.query.filter_by(
-        status='APPROVED'
-    ).order_by(PurchaseRequest.approved_at.asc()).all()
-    
-    # Cotações em andamento (draft)
-    draft_quotations = Quotation.query.filter_by(
-        purchaser_id=current_user.id,
-        status='DRAFT'
-    ).order_by(Quotation.created_at.desc()).all()
-    
-    # Cotações aprovadas aguardando compra
-    approved_quotations = Quotation.query.filter_by(
-        status='APPROVED'
-    ).join(Quotation.purchase_request).filter(
-        PurchaseRequest.status == 'VENDOR_APPROVED'
-    ).order_by(Quotation.approved_at.asc()).all()
+    # Seções a partir da caixa de entrada (uma consulta, reaproveitada pelo badge da navbar)
+    sections = current_inbox_sections()
     
     return render_template('purchaser/dashboard.html',
-                         approved_requests=approved_requests,
-                         draft_quotations=draft_quotations,
-                         approved_quotations=approved_quotations)
+                         approved_requests=sections['PURCHASE_REQUEST_QUOTATION'],
+                         draft_quotations=sections['QUOTATION_DRAFT'],
+                         approved_quotations=sections['QUOTATION_PURCHASE'],
+                         orders_to_send=sections['PURCHASE_ORDER_SEND'])
 
 @purchaser_bp.route('/requests')
 @login_required
@@ -87,6 +78,12 @@ def create_quotation(request_id):
                 db.session.add(quotation)
                 db.session.flush()
             
+            # Quantidade cotada (consolidada, quando houver)
+            quantity = quotation.get_total_quantity()
+            
+            # Requisição multi-linha: cotar cada linha aprovada separadamente
+            lines = purchase_request.get_approved_items() if purchase_request.is_multi_line() else []
+            
             # Criar itens de cotação para cada fornecedor (3 fornecedores)
             for i in range(1, 4):
                 vendor_name = request.form.get(f'vendor_name_{i}')
@@ -94,7 +91,23 @@ def create_quotation(request_id):
                 description = request.form.get(f'description_{i}')
                 unit_value = request.form.get(f'unit_value_{i}')
                 
-                if vendor_name and unit_value:
+                if vendor_name and lines:
+                    for line in lines:
+                        line_unit_value = request.form.get(f'unit_value_{i}_{line.id}')
+                        if not line_unit_value:
+                            continue
+                        db.session.add(QuotationItem(
+                            quotation_id=quotation.id,
+                            purchase_request_item_id=line.id,
+                            vendor_name=vendor_name,
+                            vendor_cnpj=vendor_cnpj,
+                            description=description,
+                            unit_value=float(line_unit_value),
+                            quantity=line.quantity,
+                            total_value=float(line_unit_value) * line.quantity,
+                            is_selected=False
+                        ))
+                elif vendor_name and unit_value:
                     # Criar item de cotação para este fornecedor
                     quotation_item = QuotationItem(
                         quotation_id=quotation.id,
@@ -102,14 +115,14 @@ def create_quotation(request_id):
                         vendor_cnpj=vendor_cnpj,
                         description=description,
                         unit_value=float(unit_value),
-                        quantity=purchase_request.quantity,
-                        total_value=float(unit_value) * purchase_request.quantity,
+                        quantity=quantity,
+                        total_value=float(unit_value) * quantity,
                         is_selected=False
                     )
                     db.session.add(quotation_item)
             
-            # Atualizar status da requisição
-            purchase_request.status = 'IN_QUOTATION'
+            # Atualizar status das requisições
+            quotation.update_requests_status('IN_QUOTATION')
             
             db.session.commit()
             flash('Mapa de cotações salvo com sucesso!', 'success')
@@ -125,9 +138,15 @@ def create_quotation(request_id):
         status='DRAFT'
     ).first()
     
+    quantity = existing_quotation.get_total_quantity() if existing_quotation else purchase_request.quantity
+    
+    lines = purchase_request.get_approved_items() if purchase_request.is_multi_line() else []
+    
     return render_template('purchaser/create_quotation.html',
                          request=purchase_request,
-                         quotation=existing_quotation)
+                         quotation=existing_quotation,
+                         quantity=quantity,
+                         lines=lines)
 
 @purchaser_bp.route('/quotations')
 @login_required
@@ -141,6 +160,26 @@ def quotations():
     
     return render_template('purchaser/quotations.html', requests=requests)
 
+@purchaser_bp.route('/quotations/consolidate', methods=['POST'])
+@login_required
+@login_required_only
+def consolidate():
+    """Consolida requisições aprovadas do mesmo produto em uma única cotação"""
+    try:
+        quotations = consolidate_requests(current_user)
+        
+        if quotations:
+            total_requests = sum(len(q.source_requests) for q in quotations)
+            flash(f'{total_requests} requisições consolidadas em {len(quotations)} cotações.', 'success')
+        else:
+            flash('Nenhuma requisição disponível para consolidação.', 'info')
+        
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Erro ao consolidar requisições: {str(e)}', 'danger')
+    
+    return redirect(url_for('purchaser.quotations'))
+
 @purchaser_bp.route('/map-quotations')
 @login_required
 @login_required_only
@@ -247,20 +286,22 @@ def purchase(quotation_id):
             status='CREATED'
         )
         
+        # Vincular todas as requisições atendidas (pedido consolidado)
+        purchase_order.source_requests.extend(quotation.get_source_requests())
+        
         db.session.add(purchase_order)
         db.session.flush()
         
-        # Gerar PDF
-        from flask import current_app
-        pdf_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'pdfs')
-        pdf_generator = PDFGenerator(pdf_dir)
-        pdf_path = pdf_generator.generate_purchase_order_pdf(purchase_order)
-        
-        # Salvar caminho relativo
-        purchase_order.pdf_path = os.path.basename(pdf_path)
+        # Gerar PDF (ReportLab só é importado quando um pedido é emitido) e guardar no repositório
+        from ..utils.pdf_generator import PDFGenerator
+        store = get_document_store()
+        with store.temporary_dir() as tmp_dir:
+            pdf_generator = PDFGenerator(tmp_dir)
+            pdf_path = pdf_generator.generate_purchase_order_pdf(purchase_order)
+            purchase_order.pdf_file = store.save_path(pdf_path, 'application/pdf')
         
-        # Atualizar status da requisição
-        quotation.purchase_request.status = 'PURCHASED'
+        # Atualizar status das requisições
+        purchase_order.update_requests_status('PURCHASED')
         
         db.session.commit()
         
@@ -278,8 +319,8 @@ def purchase(quotation_id):
 @login_required_only
 def orders():
     """Lista de ordens de compra"""
-    purchase_orders = PurchaseOrder.query.order_by(PurchaseOrder.created_at.desc()).all()
-    return render_template('purchaser/orders.html', orders=purchase_orders)
+    purchase_orders = list_purchase_orders(stream=streaming_enabled())
+    return render_listing('purchaser/orders.html', orders=purchase_orders)
 
 @purchaser_bp.route('/orders/<int:order_id>')
 @login_required
@@ -297,10 +338,14 @@ def download_purchase_order(order_id):
     from flask import current_app
     purchase_order = PurchaseOrder.query.get_or_404(order_id)
     
+    if purchase_order.pdf_file is not None:
+        return send_document(purchase_order.pdf_file, f'PO_{purchase_order.order_number}.pdf')
+    
     if not purchase_order.pdf_path:
         flash('PDF não encontrado.', 'danger')
         return redirect(url_for('purchaser.view_purchase_order', order_id=order_id))
     
+    # PDF anterior ao repositório de documentos (ver flask documents import-legacy)
     pdf_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'pdfs')
     pdf_path = os.path.join(pdf_dir, purchase_order.pdf_path)
     
@@ -308,5 +353,5 @@ def download_purchase_order(order_id):
         flash('Arquivo PDF não encontrado.', 'danger')
         return redirect(url_for('purchaser.view_purchase_order', order_id=order_id))
     
-    return send_file(pdf_path, as_attachment=True, download_name=purchase_order.pdf_path)
+    return serve_file(pdf_path, download_name=purchase_order.pdf_path)
 
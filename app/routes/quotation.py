@@ -4,23 +4,42 @@ Rotas de cotações
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from .. import db
-from ..models import Quotation, PurchaseRequest, QuotationItem
+from ..models import Quotation, PurchaseRequest, QuotationItem, User, Product
 from ..utils.decorators import login_required_only
+from sqlalchemy import select as sa_select
+from ..utils.http_cache import conditional_get, source, related
 
 quotation_bp = Blueprint('quotation', __name__, url_prefix='/quotations')
 
+def _index_criteria():
+    """Filtros da lista (parâmetros da URL), usados também no ETag"""
+    status_filter = request.args.get('status', '')
+    return [Quotation.status == status_filter] if status_filter else []
+
+def _index_sources():
+    """Cotações do filtro, seus itens (valor total), requisições, solicitantes e compradores"""
+    quotations = source(Quotation, *_index_criteria())
+    requests = related(PurchaseRequest, Quotation.purchase_request_id, quotations)
+    users = sa_select(Quotation.purchaser_id).where(*quotations.criteria).union(
+        sa_select(PurchaseRequest.user_id).where(*requests.criteria)
+    )
+    return [
+        quotations,
+        source(QuotationItem, QuotationItem.quotation_id.in_(sa_select(Quotation.id).where(*quotations.criteria))),
+        requests,
+        source(User, User.id.in_(users))
+    ]
+
 @quotation_bp.route('/')
 @login_required
 @login_required_only
+@conditional_get(_index_sources)
 def index():
     """Lista de cotações"""
     page = request.args.get('page', 1, type=int)
     status_filter = request.args.get('status', '')
     
-    query = Quotation.query
-    
-    if status_filter:
-        query = query.filter_by(status=status_filter)
+    query = Quotation.query.filter(*_index_criteria())
     
     quotations = query.order_by(Quotation.created_at.desc()).paginate(
         page=page, per_page=20, error_out=False
@@ -33,6 +52,15 @@ def index():
 @quotation_bp.route('/request/<int:request_id>')
 @login_required
 @login_required_only
+@conditional_get(lambda request_id: [
+    source(PurchaseRequest, PurchaseRequest.id == request_id),
+    source(Quotation, Quotation.purchase_request_id == request_id),
+    source(QuotationItem, QuotationItem.quotation_id.in_(
+        sa_select(Quotation.id).where(Quotation.purchase_request_id == request_id)
+    )),
+    related(Product, PurchaseRequest.product_id, source(PurchaseRequest, PurchaseRequest.id == request_id)),
+    related(User, Quotation.purchaser_id, source(Quotation, Quotation.purchase_request_id == request_id))
+])
 def by_request(request_id):
     """Cotações de uma requisição específica"""
     request_obj = PurchaseRequest.query.get_or_404(request_id)
@@ -139,9 +167,14 @@ def create():
         
         db.session.add(quotation_item)
         
-        # Atualizar status da requisição
-        if request_obj.status == 'PENDING':
-            request_obj.status = 'IN_QUOTATION'
+        # Requisição consolidada: a nova cotação atende todo o grupo
+        consolidated = request_obj.get_consolidated_quotation()
+        if consolidated is not None:
+            quotation.source_requests.extend(consolidated.get_source_requests())
+        
+        # Atualizar status das requisições
+        if request_obj.status in ('PENDING', 'APPROVED'):
+            quotation.update_requests_status('IN_QUOTATION')
         
         db.session.commit()
         
@@ -170,9 +203,8 @@ def select(quotation_id):
         quotation.is_selected = True
         quotation.status = 'FORNECEDOR_SELECIONADO'
         
-        # Atualizar status da requisição
-        request_obj = PurchaseRequest.query.get(quotation.purchase_request_id)
-        request_obj.status = 'AGUARDANDO_APROVACAO'
+        # Atualizar status das requisições (todas as do grupo, se consolidada)
+        quotation.update_requests_status('AGUARDANDO_APROVACAO')
         
         db.session.commit()
         
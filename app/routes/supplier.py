@@ -6,6 +6,9 @@ from flask_login import login_required, current_user
 from .. import db
 from ..models import QuotationItem
 from ..utils.decorators import login_required_only
+from ..utils.read_replica import read_replica
+from ..utils.read_models import list_vendor_quotation_items
+from ..utils.streaming import StreamedRows, render_listing, streaming_enabled, yield_per
 from sqlalchemy import distinct, func
 
 supplier_bp = Blueprint('supplier', __name__, url_prefix='/suppliers')
@@ -13,6 +16,7 @@ supplier_bp = Blueprint('supplier', __name__, url_prefix='/suppliers')
 @supplier_bp.route('/')
 @login_required
 @login_required_only
+@read_replica
 def index():
     """Lista de fornecedores únicos baseado nos QuotationItems"""
     # Buscar fornecedores únicos pelos dados dos QuotationItems
@@ -27,9 +31,14 @@ def index():
     ).group_by(
         QuotationItem.vendor_name,
         QuotationItem.vendor_cnpj
-    ).order_by(QuotationItem.vendor_name).all()
+    ).order_by(QuotationItem.vendor_name)
     
-    return render_template('supplier/index.html', suppliers=suppliers_data)
+    if streaming_enabled():
+        suppliers_data = StreamedRows(suppliers_data.yield_per(yield_per()))
+    else:
+        suppliers_data = suppliers_data.all()
+    
+    return render_listing('supplier/index.html', suppliers=suppliers_data)
 
 @supplier_bp.route('/create', methods=['GET', 'POST'])
 @login_required
@@ -175,11 +184,10 @@ def delete(vendor_name):
 @supplier_bp.route('/<vendor_name>/history')
 @login_required
 @login_required_only
+@read_replica
 def history(vendor_name):
     """Histórico de cotações do fornecedor"""
-    quotation_items = QuotationItem.query.filter_by(vendor_name=vendor_name).order_by(
-        QuotationItem.created_at.desc()
-    ).all()
+    quotation_items = list_vendor_quotation_items(vendor_name)
     
     return render_template('supplier/history.html', 
                          vendor_name=vendor_name, 
@@ -4,8 +4,12 @@ Rotas do usuário comum
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from .. import db
-from ..models import PurchaseRequest, Product, Department
+from ..models import PurchaseRequest, Department
 from ..utils.decorators import login_required_only
+from ..utils.read_replica import read_replica
+from ..utils.auto_approval import try_auto_approve
+from ..utils.request_lines import parse_request_lines
+from ..utils.stats_cache import get_cached_stats
 from sqlalchemy import func
 from datetime import datetime, timedelta
 
@@ -14,29 +18,37 @@ user_bp = Blueprint('user', __name__, url_prefix='/user')
 @user_bp.route('/dashboard')
 @login_required
 @login_required_only
+@read_replica
 def dashboard():
     """Dashboard do usuário comum"""
-    # Estatísticas do usuário
-    total_requests = PurchaseRequest.query.filter_by(user_id=current_user.id).count()
-    pending_requests = PurchaseRequest.query.filter_by(
-        user_id=current_user.id, 
-        status='PENDING'
-    ).count()
-    approved_requests = PurchaseRequest.query.filter_by(
-        user_id=current_user.id, 
-        status='APPROVED'
-    ).count()
+    user_id = current_user.id
+    stats = get_cached_stats('user', user_id, lambda: _load_dashboard_stats(user_id))
+    return render_template('user/dashboard.html', **stats)
+
+def _load_dashboard_stats(user_id):
+    """Calcula as estatísticas do dashboard do usuário (valores simples para cache)"""
+    # Contagem por status em uma única consulta
+    counts = dict(db.session.query(
+        PurchaseRequest.status,
+        func.count(PurchaseRequest.id)
+    ).filter_by(user_id=user_id).group_by(PurchaseRequest.status).all())
     
     # Solicitações recentes
     recent_requests = PurchaseRequest.query.filter_by(
-        user_id=current_user.id
+        user_id=user_id
     ).order_by(PurchaseRequest.created_at.desc()).limit(5).all()
     
-    return render_template('user/dashboard.html',
-                         total_requests=total_requests,
-                         pending_requests=pending_requests,
-                         approved_requests=approved_requests,
-                         recent_requests=recent_requests)
+    return {
+        'total_requests': sum(counts.values()),
+        'pending_requests': counts.get('PENDING', 0),
+        'approved_requests': counts.get('APPROVED', 0),
+        'recent_requests': [{
+            'request_number': r.request_number,
+            'status': r.status,
+            'product_name': r.product.product_name if r.product else None,
+            'created_at': r.created_at
+        } for r in recent_requests]
+    }
 
 @user_bp.route('/requests')
 @login_required
@@ -64,28 +76,21 @@ def requests():
 @login_required_only
 def create_request():
     """Formulário para criar nova solicitação"""
-    products = Product.query.filter_by(status='ATIVO').all()
-    return render_template('user/create_request.html', products=products)
+    # Os produtos são carregados sob demanda pelo autocomplete (main.search_products_api)
+    return render_template('user/create_request.html')
 
 @user_bp.route('/create-request', methods=['POST'])
 @login_required
 @login_required_only
 def create_request_post():
     """Processa criação de nova solicitação"""
-    product_id = request.form.get('product_id')
-    quantity = request.form.get('quantity')
+    justification = request.form.get('justification', '')
     notes = request.form.get('notes', '')
     
-    if not product_id or not quantity:
-        flash('Todos os campos obrigatórios devem ser preenchidos.', 'error')
-        return redirect(url_for('user.create_request'))
-    
     try:
-        quantity = int(quantity)
-        if quantity <= 0:
-            raise ValueError()
-    except ValueError:
-        flash('Quantidade deve ser um número inteiro positivo.', 'error')
+        lines = parse_request_lines(request.form)
+    except ValueError as e:
+        flash(str(e), 'error')
         return redirect(url_for('user.create_request'))
     
     # Gerar número da solicitação
@@ -104,16 +109,26 @@ def create_request_post():
     request_obj = PurchaseRequest(
         request_number=new_number,
         user_id=current_user.id,
-        product_id=product_id,
-        quantity=quantity,
+        justification=justification,
         notes=notes,
         status='PENDING'
     )
     
+    # Adicionar linhas (valor estimado pelo preço médio de cada produto)
+    for product, quantity, unit in lines:
+        request_obj.add_item(product, quantity, unit)
+    
     db.session.add(request_obj)
+    
+    # Aprovação automática para solicitações abaixo do limite
+    auto_approved = try_auto_approve(request_obj, current_user.department_id)
+    
     db.session.commit()
     
-    flash('Solicitação criada com sucesso!', 'success')
+    if auto_approved:
+        flash('Solicitação criada e aprovada automaticamente!', 'success')
+    else:
+        flash('Solicitação criada com sucesso!', 'success')
     return redirect(url_for('user.requests'))
 
 @user_bp.route('/request/<int:request_id>')
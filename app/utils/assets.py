@@ -0,0 +1,235 @@
+"""
+Bundle de CSS/JS servido pela própria aplicação (flask assets vendor / build)
+
+O build gera, em app/static/dist:
+    - app.<hash>.css: Tailwind compilado só com as classes usadas nos
+      templates (CLI standalone do Tailwind) + Font Awesome
+    - app.<hash>.js: Alpine.js
+    - webfonts do Font Awesome com o hash no nome
+    - variantes .gz e .br de cada arquivo e o manifest.json (nome lógico -> arquivo)
+
+As bibliotecas de terceiros ficam em assets/vendor (baixadas uma vez com
+`flask assets vendor` e versionadas), então o build não acessa a internet.
+Arquivos com hash no nome são servidos com cache imutável de um ano.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import urllib.request
+from flask import request
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ASSETS_DIR = os.path.join(PROJECT_ROOT, 'assets')
+VENDOR_DIR = os.path.join(ASSETS_DIR, 'vendor')
+CHECKSUMS_FILE = os.path.join(VENDOR_DIR, 'SHA256SUMS')
+
+# Subpasta de app/static com o resultado do build
+DIST_FOLDER = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Cache dos arquivos com hash no nome (o conteúdo nunca muda para a mesma URL)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Bibliotecas de terceiros (versões fixas): arquivo em assets/vendor -> URL de origem
+FONT_AWESOME_URL = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0'
+FONT_AWESOME_FONTS = ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+VENDOR_FILES = {
+    'alpine.min.js': 'https://cdn.jsdelivr.net/npm/alpinejs@3.13.3/dist/cdn.min.js',
+    'font-awesome/css/all.min.css': f'{FONT_AWESOME_URL}/css/all.min.css',
+    **{
+        f'font-awesome/webfonts/{font}.{ext}': f'{FONT_AWESOME_URL}/webfonts/{font}.{ext}'
+        for font in FONT_AWESOME_FONTS for ext in ('woff2', 'ttf')
+    }
+}
+
+# Arquivos que compõem cada bundle (Tailwind é gerado no build)
+CSS_BUNDLE = ('font-awesome/css/all.min.css',)
+JS_BUNDLE = ('alpine.min.js',)
+
+# url(../webfonts/arquivo) no CSS do Font Awesome
+WEBFONT_URL_PATTERN = re.compile(r'url\((["\']?)\.\./webfonts/([^"\')?#]+)([^"\')]*)\1\)')
+
+# Extensões que recebem variantes comprimidas (fontes woff2 já são comprimidas)
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.ttf', '.json')
+
+def _sha256(path):
+    """SHA-256 do arquivo em hexadecimal"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# ==================== VENDOR ====================
+
+def vendor_assets(log=print):
+    """Baixa as bibliotecas de terceiros para assets/vendor e grava os checksums"""
+    checksums = {}
+    for name, url in VENDOR_FILES.items():
+        path = os.path.join(VENDOR_DIR, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response, open(path, 'wb') as f:
+            shutil.copyfileobj(response, f)
+        checksums[name] = _sha256(path)
+        log(f'  {name}')
+    with open(CHECKSUMS_FILE, 'w', encoding='utf-8') as f:
+        for name in sorted(checksums):
+            f.write(f'{checksums[name]}  {name}\n')
+
+def verify_vendor():
+    """Confere os arquivos de assets/vendor com o SHA256SUMS (levanta RuntimeError se divergir)"""
+    if not os.path.exists(CHECKSUMS_FILE):
+        raise RuntimeError('assets/vendor não encontrado: rode "flask assets vendor" e versione o resultado')
+    expected = {}
+    with open(CHECKSUMS_FILE, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                checksum, name = line.split(None, 1)
+                expected[name.strip()] = checksum
+    for name in VENDOR_FILES:
+        path = os.path.join(VENDOR_DIR, name)
+        if not os.path.exists(path) or _sha256(path) != expected.get(name):
+            raise RuntimeError(f'Arquivo de terceiros ausente ou alterado: assets/vendor/{name}')
+
+# ==================== BUILD ====================
+
+def _fingerprinted(name, content):
+    """app.css + conteúdo -> app.<hash>.css"""
+    base, ext = os.path.splitext(name)
+    return f'{base}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+def _write(dist_dir, name, content):
+    """Grava o arquivo e as variantes .gz/.br (brotli só se o pacote estiver instalado)"""
+    with open(os.path.join(dist_dir, name), 'wb') as f:
+        f.write(content)
+    if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+        return
+    with open(os.path.join(dist_dir, f'{name}.gz'), 'wb') as f:
+        # mtime=0: mesmo conteúdo gera o mesmo .gz a cada build
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(os.path.join(dist_dir, f'{name}.br'), 'wb') as f:
+        f.write(brotli.compress(content, quality=11))
+
+def _build_tailwind(tailwind_bin):
+    """Executa o CLI standalone do Tailwind e retorna o CSS minificado"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = os.path.join(tmp_dir, 'tailwind.css')
+        try:
+            subprocess.run([
+                tailwind_bin,
+                '-c', os.path.join(ASSETS_DIR, 'tailwind.config.js'),
+                '-i', os.path.join(ASSETS_DIR, 'src', 'app.css'),
+                '-o', output,
+                '--minify'
+            ], cwd=PROJECT_ROOT, check=True, capture_output=True, text=True)
+        except FileNotFoundError:
+            raise RuntimeError(f'CLI do Tailwind não encontrado ({tailwind_bin}); defina TAILWIND_BIN')
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f'Falha no build do Tailwind:\n{e.stderr}')
+        with open(output, 'rb') as f:
+            return f.read()
+
+def build_assets(app, tailwind_bin='tailwindcss', clean=False, log=print):
+    """
+    Gera os bundles com hash no nome, as variantes comprimidas e o manifest
+    
+    Args:
+        app: Aplicação Flask (define a pasta static)
+        tailwind_bin: Executável do CLI standalone do Tailwind
+        clean: Remove arquivos de builds anteriores (por padrão ficam, para
+            páginas ainda abertas durante o deploy)
+        log: Função para mensagens de progresso
+    
+    Returns:
+        Manifest gerado (nome lógico -> caminho dentro de static)
+    """
+    verify_vendor()
+    dist_dir = os.path.join(app.static_folder, DIST_FOLDER)
+    os.makedirs(os.path.join(dist_dir, 'webfonts'), exist_ok=True)
+    manifest = {}
+    
+    def emit(logical_name, content):
+        name = _fingerprinted(logical_name, content)
+        _write(dist_dir, name, content)
+        manifest[logical_name] = f'{DIST_FOLDER}/{name}'
+        log(f'  {name} ({len(content) / 1024:.1f} KB)')
+        return name
+    
+    def read_vendor(name):
+        with open(os.path.join(VENDOR_DIR, name), 'rb') as f:
+            return f.read()
+    
+    # Fontes primeiro: o CSS do Font Awesome passa a apontar para os nomes com hash
+    fonts = {}
+    for name in VENDOR_FILES:
+        if '/webfonts/' in name:
+            fonts[os.path.basename(name)] = emit(f'webfonts/{os.path.basename(name)}', read_vendor(name))
+    
+    def rewrite_font_url(match):
+        quote, font, suffix = match.groups()
+        return f"url({quote}{fonts.get(font, f'webfonts/{font}')}{suffix}{quote})"
+    
+    css_parts = [_build_tailwind(tailwind_bin)]
+    for name in CSS_BUNDLE:
+        css = read_vendor(name).decode('utf-8')
+        css_parts.append(WEBFONT_URL_PATTERN.sub(rewrite_font_url, css).encode('utf-8'))
+    emit('app.css', b'\n'.join(css_parts))
+    emit('app.js', b'\n;\n'.join(read_vendor(name) for name in JS_BUNDLE))
+    
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    
+    if clean:
+        keep = {os.path.basename(path) for path in manifest.values()} | {MANIFEST_NAME}
+        for root, _, files in os.walk(dist_dir):
+            for file_name in files:
+                if file_name.removesuffix('.gz').removesuffix('.br') not in keep:
+                    os.remove(os.path.join(root, file_name))
+    return manifest
+
+# ==================== USO NOS TEMPLATES ====================
+
+def load_manifest(app):
+    """Lê o manifest do último build ({} se os assets não foram gerados)"""
+    path = os.path.join(app.static_folder, DIST_FOLDER, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def init_assets(app):
+    """Disponibiliza asset_url() nos templates e o cache imutável para static/dist"""
+    from flask import url_for
+    manifest = load_manifest(app)
+    # Muda a cada build com conteúdo diferente (usado no ETag das páginas)
+    app.config['ASSETS_VERSION'] = hashlib.sha256(
+        json.dumps(manifest, sort_keys=True).encode('utf-8')
+    ).hexdigest()[:12]
+    
+    def asset_url(name):
+        """URL do arquivo com hash no nome (ex.: asset_url('app.css'))"""
+        if name not in manifest:
+            raise RuntimeError(f'Asset {name} não gerado: rode "flask assets build" no deploy')
+        return url_for('static', filename=manifest[name])
+    
+    # Sem build os templates usam as CDNs, só se ASSETS_CDN_FALLBACK permitir (desenvolvimento);
+    # caso contrário asset_url falha e a página não sai sem CSS/JS
+    fallback = app.config.get('ASSETS_CDN_FALLBACK', True)
+    app.jinja_env.globals.update(asset_url=asset_url, assets_built=bool(manifest) or not fallback)
+    
+    @app.after_request
+    def immutable_assets(response):
+        filename = (request.view_args or {}).get('filename', '') if request.endpoint == 'static' else ''
+        if filename.startswith(f'{DIST_FOLDER}/') and not filename.endswith(MANIFEST_NAME) \
+                and response.status_code in (200, 304):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
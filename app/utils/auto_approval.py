@@ -0,0 +1,120 @@
+"""
+Aprovação automática de requisições de baixo valor
+"""
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from app import db
+from app.models import Department, SystemParameter
+from app.utils.audit_log import AuditLog
+
+# Chave do parâmetro global em system_parameters
+AUTO_APPROVE_PARAM = 'auto_approve_limit'
+
+# Tempo de vida do cache de limites (segundos)
+AUTO_APPROVE_CACHE_TTL = 300
+
+# Cache em memória: department_id -> (limite, expira_em)
+_limit_cache = {}
+
+def _parse_limit(value):
+    """Converte o valor configurado em Decimal (None se inválido ou vazio; 0 = desativado)"""
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        return Decimal(str(value).replace(',', '.'))
+    except (InvalidOperation, ValueError):
+        return None
+
+def get_auto_approve_limit(department_id=None):
+    """
+    Retorna o limite de aprovação automática
+    
+    O limite do departamento (departments.auto_approve_limit) tem prioridade
+    sobre o parâmetro global auto_approve_limit; vazio herda o parâmetro
+    global e 0 desativa a aprovação automática no departamento. O resultado
+    fica em cache por AUTO_APPROVE_CACHE_TTL segundos.
+    
+    Args:
+        department_id: ID do departamento do solicitante
+    
+    Returns:
+        Decimal com o limite ou None se a aprovação automática estiver desativada
+    """
+    now = time.monotonic()
+    cached = _limit_cache.get(department_id)
+    if cached and cached[1] > now:
+        return cached[0]
+    
+    limit = None
+    if department_id:
+        department = Department.query.get(department_id)
+        if department:
+            limit = _parse_limit(department.auto_approve_limit)
+    
+    if limit is None:
+        parameter = SystemParameter.query.filter_by(param_key=AUTO_APPROVE_PARAM).first()
+        limit = _parse_limit(parameter.param_value) if parameter else None
+    
+    if limit is not None and limit <= 0:
+        limit = None
+    
+    _limit_cache[department_id] = (limit, now + AUTO_APPROVE_CACHE_TTL)
+    return limit
+
+def clear_auto_approve_cache():
+    """Limpa o cache de limites (chamar ao alterar parâmetros ou departamentos)"""
+    _limit_cache.clear()
+
+def try_auto_approve(purchase_request, department_id):
+    """
+    Aprova automaticamente a requisição se o valor estimado estiver abaixo do limite
+    
+    Requisições com alguma linha sem preço conhecido (produto nunca comprado,
+    valor médio nulo ou zero) ou com total zerado vão para o gerente.
+    Não faz commit: a aprovação e o registro de auditoria entram na mesma
+    transação da criação da requisição.
+    
+    Args:
+        purchase_request: Objeto PurchaseRequest já adicionado à sessão
+        department_id: ID do departamento do solicitante
+    
+    Returns:
+        True se a requisição foi aprovada automaticamente
+    """
+    if purchase_request.estimated_total is None:
+        return False
+    if any(Decimal(str(item.estimated_unit_value or 0)) <= 0 for item in purchase_request.items):
+        return False
+    
+    limit = get_auto_approve_limit(department_id)
+    if limit is None:
+        return False
+    
+    estimated_total = Decimal(str(purchase_request.estimated_total))
+    if estimated_total <= 0 or estimated_total >= limit:
+        return False
+    
+    purchase_request.status = 'APPROVED'
+    purchase_request.approved_at = datetime.utcnow()
+    purchase_request.auto_approved = True
+    for item in purchase_request.items:
+        item.status = 'APPROVED'
+    
+    # Garantir que a requisição tenha ID para o log de auditoria
+    db.session.flush()
+    
+    db.session.add(AuditLog(
+        user_id=purchase_request.user_id,
+        action='AUTO_APPROVE',
+        table_name='purchase_requests',
+        record_id=purchase_request.id,
+        new_values={
+            'request_number': purchase_request.request_number,
+            'estimated_total': str(estimated_total),
+            'auto_approve_limit': str(limit),
+            'department_id': department_id
+        }
+    ))
+    
+    return True
@@ -0,0 +1,216 @@
+"""
+Compressão das respostas (middleware WSGI)
+
+- Respostas de texto (HTML, JSON, CSS, JS) acima de COMPRESS_MIN_SIZE são
+  comprimidas com brotli ou gzip, conforme o Accept-Encoding do navegador
+- Respostas em streaming (templates em stream, exportações) são comprimidas
+  pedaço a pedaço, com flush a cada pedaço para não atrasar a renderização
+- Arquivos estáticos com variante pré-comprimida (.br/.gz, gerada por
+  "flask assets build") são servidos direto do disco, sem comprimir no request
+- Server-Sent Events, respostas parciais (Range) e respostas já codificadas
+  passam intactas
+"""
+import os
+import zlib
+from werkzeug.http import parse_accept_header
+from werkzeug.security import safe_join
+
+# Padrões das configurações
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4  # qualidades altas são lentas demais para compressão por request
+
+# Tipos comprimidos (text/* exceto text/event-stream)
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml'
+)
+
+# Extensão da variante pré-comprimida de cada codificação
+PRECOMPRESSED_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+def _import_brotli():
+    """Importa o brotli se instalado (sem ele só gzip é oferecido)"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+class GzipEncoder:
+    """Compressor gzip incremental"""
+    
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    
+    def compress(self, data, flush=False):
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return output
+    
+    def finish(self):
+        return self._compressor.flush()
+
+class BrotliEncoder:
+    """Compressor brotli incremental"""
+    
+    def __init__(self, brotli, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+    
+    def compress(self, data, flush=False):
+        output = self._compressor.process(data)
+        if flush:
+            output += self._compressor.flush()
+        return output
+    
+    def finish(self):
+        return self._compressor.finish()
+
+class CompressionMiddleware:
+    """
+    Middleware WSGI que comprime as respostas da aplicação
+    
+    Args:
+        wsgi_app: Aplicação WSGI original
+        static_folder: Pasta dos arquivos estáticos (para as variantes .br/.gz)
+        static_url_path: Prefixo das URLs dos estáticos (ex.: /static)
+        min_size: Tamanho mínimo (bytes) para comprimir respostas com Content-Length
+        gzip_level: Nível do gzip (1-9)
+        brotli_quality: Qualidade do brotli (0-11)
+    """
+    
+    def __init__(self, wsgi_app, static_folder=None, static_url_path=None, min_size=DEFAULT_MIN_SIZE,
+                 gzip_level=DEFAULT_GZIP_LEVEL, brotli_quality=DEFAULT_BROTLI_QUALITY):
+        self.wsgi_app = wsgi_app
+        self.static_folder = static_folder
+        self.static_prefix = f"{(static_url_path or '').rstrip('/')}/"
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli = _import_brotli()
+    
+    def _accepted_encodings(self, environ):
+        """Codificações aceitas pelo cliente, na ordem de preferência do servidor"""
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        encodings = []
+        if self.brotli is not None and accept.quality('br') > 0:
+            encodings.append('br')
+        if accept.quality('gzip') > 0:
+            encodings.append('gzip')
+        return encodings
+    
+    def _precompressed(self, environ, encodings):
+        """Troca o caminho do estático pela variante .br/.gz, se existir; retorna a codificação"""
+        path = environ.get('PATH_INFO', '')
+        if not self.static_folder or not path.startswith(self.static_prefix):
+            return None
+        relative = path[len(self.static_prefix):]
+        file_path = safe_join(self.static_folder, relative)
+        if file_path is None or not os.path.isfile(file_path):
+            return None
+        for encoding in encodings:
+            extension = PRECOMPRESSED_EXTENSIONS[encoding]
+            if os.path.isfile(file_path + extension):
+                environ['PATH_INFO'] = path + extension
+                return encoding
+        return None
+    
+    def _encoder(self, encoding):
+        """Compressor da codificação escolhida"""
+        if encoding == 'br':
+            return BrotliEncoder(self.brotli, self.brotli_quality)
+        return GzipEncoder(self.gzip_level)
+    
+    def _should_compress(self, environ, status, headers):
+        """Decide pela compressão olhando só o status e os cabeçalhos da resposta"""
+        if environ.get('REQUEST_METHOD') == 'HEAD' or status[:3] in ('204', '206', '304'):
+            return False
+        if 'content-encoding' in headers or 'content-range' in headers:
+            return False
+        if 'no-transform' in headers.get('cache-control', ''):
+            return False
+        content_length = headers.get('content-length')
+        return content_length is None or int(content_length) >= self.min_size
+    
+    def __call__(self, environ, start_response):
+        encodings = self._accepted_encodings(environ)
+        precompressed = self._precompressed(environ, encodings) if encodings else None
+        state = {'encoder': None, 'streaming': False}
+        
+        def compressing_start_response(status, response_headers, exc_info=None):
+            headers = {name.lower(): value for name, value in response_headers}
+            content_type = headers.get('content-type', '').split(';')[0].strip()
+            compressible = (content_type.startswith('text/') and content_type != 'text/event-stream') \
+                or content_type in COMPRESSIBLE_TYPES
+            
+            if precompressed:
+                response_headers = _with_vary(response_headers)
+                if 'content-encoding' not in headers and status[:3] in ('200', '206'):
+                    response_headers.append(('Content-Encoding', precompressed))
+            elif compressible:
+                response_headers = _with_vary(response_headers)
+                if encodings and self._should_compress(environ, status, headers):
+                    encoding = encodings[0]
+                    state['encoder'] = self._encoder(encoding)
+                    # Sem Content-Length a resposta é em streaming: flush a cada pedaço
+                    state['streaming'] = 'content-length' not in headers
+                    response_headers = [
+                        (name, _weak_etag(value) if name.lower() == 'etag' else value)
+                        for name, value in response_headers
+                        if name.lower() not in ('content-length', 'accept-ranges')
+                    ]
+                    response_headers.append(('Content-Encoding', encoding))
+            
+            write = start_response(status, response_headers, exc_info)
+            if state['encoder'] is None:
+                return write
+            return lambda data: write(state['encoder'].compress(data, flush=True))
+        
+        app_iter = self.wsgi_app(environ, compressing_start_response)
+        if state['encoder'] is None:
+            return app_iter
+        return self._compress_iter(app_iter, state['encoder'], state['streaming'])
+    
+    def _compress_iter(self, app_iter, encoder, streaming):
+        """Comprime o corpo pedaço a pedaço (com flush a cada pedaço se a resposta for em streaming)"""
+        try:
+            for chunk in app_iter:
+                if chunk:
+                    output = encoder.compress(chunk, flush=streaming)
+                    if output:
+                        yield output
+            yield encoder.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+def _with_vary(response_headers):
+    """Acrescenta Accept-Encoding ao Vary (caches não devem misturar as variantes)"""
+    for index, (name, value) in enumerate(response_headers):
+        if name.lower() == 'vary':
+            if 'accept-encoding' in value.lower():
+                return response_headers
+            response_headers = list(response_headers)
+            response_headers[index] = (name, f'{value}, Accept-Encoding')
+            return response_headers
+    return list(response_headers) + [('Vary', 'Accept-Encoding')]
+
+def _weak_etag(value):
+    """O corpo comprimido não é byte a byte igual ao original: o ETag passa a ser fraco"""
+    return value if value.startswith('W/') else f'W/{value}'
+
+def init_compression(app):
+    """Envolve a aplicação WSGI com o middleware de compressão (COMPRESSION_ENABLED)"""
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        static_folder=app.static_folder,
+        static_url_path=app.static_url_path,
+        min_size=app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE),
+        gzip_level=app.config.get('COMPRESS_GZIP_LEVEL', DEFAULT_GZIP_LEVEL),
+        brotli_quality=app.config.get('COMPRESS_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+    )
@@ -0,0 +1,88 @@
+"""
+Consolidação de demanda: agrupa requisições aprovadas do mesmo produto,
+na mesma unidade, em uma única cotação e um único pedido de compra
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from app import db
+from app.models import PurchaseRequest, Quotation, SystemParameter
+
+# Parâmetro com a janela de consolidação (dias)
+CONSOLIDATION_WINDOW_PARAM = 'consolidation_window_days'
+DEFAULT_CONSOLIDATION_WINDOW_DAYS = 7
+
+def get_consolidation_window():
+    """Retorna a janela de consolidação configurada"""
+    value = SystemParameter.get_value(CONSOLIDATION_WINDOW_PARAM, DEFAULT_CONSOLIDATION_WINDOW_DAYS)
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        days = DEFAULT_CONSOLIDATION_WINDOW_DAYS
+    return timedelta(days=max(days, 0))
+
+def find_consolidation_groups(window=None):
+    """
+    Agrupa por produto e unidade as requisições aprovadas dentro da janela
+    
+    Quantidades em unidades diferentes (ex.: UN e CX) não podem ser somadas,
+    então cada unidade forma um grupo próprio.
+    
+    Args:
+        window: timedelta da janela (padrão: parâmetro consolidation_window_days)
+    
+    Returns:
+        Dicionário (product_id, unit) -> lista de PurchaseRequest (apenas grupos com 2+ requisições)
+    """
+    window = window if window is not None else get_consolidation_window()
+    since = datetime.utcnow() - window
+    
+    candidates = PurchaseRequest.query.filter(
+        PurchaseRequest.status == 'APPROVED',
+        PurchaseRequest.approved_at >= since
+    ).order_by(PurchaseRequest.product_id, PurchaseRequest.unit, PurchaseRequest.approved_at.asc()).all()
+    
+    groups = defaultdict(list)
+    for purchase_request in candidates:
+        # Requisições multi-linha seguem o fluxo de cotação por linha
+        if purchase_request.is_multi_line():
+            continue
+        groups[(purchase_request.product_id, purchase_request.unit)].append(purchase_request)
+    
+    return {key: requests for key, requests in groups.items() if len(requests) > 1}
+
+def consolidate_requests(purchaser, window=None):
+    """
+    Cria uma cotação consolidada para cada grupo de requisições do mesmo produto e unidade
+    
+    A requisição mais antiga do grupo é a requisição principal da cotação;
+    todas as requisições do grupo ficam vinculadas pela tabela quotation_requests
+    e passam para o status IN_QUOTATION.
+    
+    Args:
+        purchaser: Usuário comprador responsável pelas cotações
+        window: timedelta da janela (padrão: parâmetro consolidation_window_days)
+    
+    Returns:
+        Lista das cotações criadas
+    """
+    quotations = []
+    
+    for requests in find_consolidation_groups(window).values():
+        lead_request = requests[0]
+        request_numbers = ', '.join(r.request_number for r in requests)
+        
+        quotation = Quotation(
+            purchase_request_id=lead_request.id,
+            purchaser_id=purchaser.id,
+            status='DRAFT',
+            quantity=sum(r.quantity for r in requests),
+            notes=f'Cotação consolidada: {request_numbers}'
+        )
+        quotation.source_requests.extend(requests)
+        quotation.update_requests_status('IN_QUOTATION')
+        
+        db.session.add(quotation)
+        quotations.append(quotation)
+    
+    db.session.commit()
+    return quotations
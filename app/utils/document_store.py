@@ -0,0 +1,291 @@
+"""
+Repositório de documentos endereçado por conteúdo (PDFs de pedidos, anexos)
+
+Cada arquivo é gravado uma única vez, com o SHA-256 do conteúdo como nome,
+em subpastas de dois níveis (ab/cd/abcd...), para que nenhuma pasta acumule
+centenas de milhares de arquivos. Conteúdos idênticos são deduplicados e os
+metadados ficam na tabela stored_files.
+
+A gravação é atômica: o conteúdo vai para um arquivo temporário na mesma
+partição, é sincronizado em disco e só então renomeado para o destino.
+O backend de armazenamento é configurável (DOCUMENT_STORE_BACKEND); hoje
+'local' (sistema de arquivos, inclusive montagens NFS).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models import StoredFile
+
+# Bloco de leitura/escrita ao copiar conteúdo
+CHUNK_SIZE = 1024 * 1024
+
+# Arquivos temporários e arquivos sem registro no banco só são removidos
+# após este tempo (transações em andamento ainda podem gravá-los)
+ORPHAN_GRACE_SECONDS = 3600
+
+class StorageBackend:
+    """Interface dos backends de armazenamento (chave = SHA-256 do conteúdo)"""
+    
+    name = None
+    
+    def exists(self, key):
+        """Verifica se o conteúdo já está armazenado"""
+        raise NotImplementedError
+    
+    def put_file(self, source_path, key):
+        """Move o arquivo temporário para o armazenamento (descarta se a chave já existir)"""
+        raise NotImplementedError
+    
+    def open(self, key):
+        """Abre o conteúdo para leitura (modo binário)"""
+        raise NotImplementedError
+    
+    def delete(self, key):
+        """Remove o conteúdo"""
+        raise NotImplementedError
+    
+    def local_path(self, key):
+        """Caminho no disco local (permite sendfile/X-Accel-Redirect) ou None"""
+        return None
+    
+    def temp_dir(self):
+        """Pasta para arquivos temporários (mesma partição do destino, se local)"""
+        return None
+    
+    def iter_keys(self):
+        """Percorre as chaves armazenadas: (chave, instante da gravação)"""
+        raise NotImplementedError
+    
+    def stale_temp_files(self, older_than):
+        """Temporários abandonados (upload interrompido, erro antes do rename)"""
+        return []
+
+class LocalStorageBackend(StorageBackend):
+    """Arquivos em disco: <raiz>/ab/cd/<sha256>"""
+    
+    name = 'local'
+    
+    def __init__(self, root):
+        self.root = root
+        self._tmp = os.path.join(root, 'tmp')
+        os.makedirs(self._tmp, mode=0o750, exist_ok=True)
+    
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], key)
+    
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+    
+    def put_file(self, source_path, key):
+        target = self._path(key)
+        if os.path.exists(target):
+            os.remove(source_path)
+            return
+        os.makedirs(os.path.dirname(target), mode=0o750, exist_ok=True)
+        os.chmod(source_path, 0o640)
+        os.replace(source_path, target)
+        # Sincroniza a pasta para que o rename sobreviva a uma queda do servidor
+        fd = os.open(os.path.dirname(target), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def open(self, key):
+        return open(self._path(key), 'rb')
+    
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+    
+    def local_path(self, key):
+        return self._path(key)
+    
+    def temp_dir(self):
+        return self._tmp
+    
+    def iter_keys(self):
+        for level1 in os.scandir(self.root):
+            if not level1.is_dir() or len(level1.name) != 2:
+                continue
+            for level2 in os.scandir(level1.path):
+                if level2.is_dir():
+                    for entry in os.scandir(level2.path):
+                        yield entry.name, entry.stat().st_mtime
+    
+    def stale_temp_files(self, older_than):
+        for entry in os.scandir(self._tmp):
+            if entry.stat().st_mtime < older_than:
+                yield entry.path
+
+class DocumentStore:
+    """Grava e lê documentos pelo conteúdo, mantendo os metadados em stored_files"""
+    
+    def __init__(self, backend):
+        self.backend = backend
+    
+    @contextmanager
+    def temporary_dir(self):
+        """Pasta temporária para gerar arquivos (ex.: PDF) antes de armazená-los"""
+        path = tempfile.mkdtemp(dir=self.backend.temp_dir())
+        try:
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+    
+    def save_stream(self, stream, content_type, max_size=None):
+        """
+        Armazena o conteúdo de um stream, calculando o SHA-256 enquanto grava
+        
+        Args:
+            stream: Objeto com read(n)
+            content_type: Tipo do conteúdo (ex.: application/pdf)
+            max_size: Tamanho máximo em bytes (ValueError se ultrapassar)
+        
+        Returns:
+            StoredFile (novo ou já existente com o mesmo conteúdo)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.backend.temp_dir())
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise ValueError(f'Arquivo maior que o limite de {max_size} bytes')
+                    digest.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            return self._register(tmp_path, digest.hexdigest(), size, content_type)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def save_path(self, path, content_type):
+        """Armazena um arquivo já gravado em disco (o arquivo de origem é consumido)"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+            os.fsync(f.fileno())
+        return self._register(path, digest.hexdigest(), os.path.getsize(path), content_type)
+    
+    def _register(self, tmp_path, sha256, size, content_type):
+        """Move o conteúdo para o backend e cria (ou reaproveita) o registro em stored_files"""
+        self.backend.put_file(tmp_path, sha256)
+        # ON CONFLICT: uploads simultâneos do mesmo conteúdo não violam a unicidade
+        db.session.execute(
+            insert(StoredFile.__table__).values(
+                sha256=sha256, size=size, content_type=content_type, backend=self.backend.name
+            ).on_conflict_do_nothing(index_elements=['sha256'])
+        )
+        return db.session.execute(select(StoredFile).where(StoredFile.sha256 == sha256)).scalar_one()
+    
+    def open(self, stored_file):
+        """Abre o conteúdo do arquivo para leitura"""
+        return self.backend.open(stored_file.sha256)
+    
+    def local_path(self, stored_file):
+        """Caminho no disco (None se o backend não for local)"""
+        return self.backend.local_path(stored_file.sha256)
+    
+    def collect_garbage(self, dry_run=False, grace_seconds=ORPHAN_GRACE_SECONDS):
+        """
+        Remove conteúdos sem registro em stored_files e temporários abandonados
+        
+        Returns:
+            Quantidade de arquivos removidos (ou que seriam removidos, em dry_run)
+        """
+        older_than = time.time() - grace_seconds
+        known = set(db.session.execute(select(StoredFile.sha256)).scalars())
+        removed = 0
+        for key, written_at in list(self.backend.iter_keys()):
+            if key not in known and written_at < older_than:
+                if not dry_run:
+                    self.backend.delete(key)
+                removed += 1
+        for path in list(self.backend.stale_temp_files(older_than)):
+            if not dry_run:
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+            removed += 1
+        return removed
+
+# Repositório ativo (configurado em init_document_store)
+_store = None
+
+def init_document_store(app):
+    """Configura o repositório a partir da configuração da aplicação"""
+    global _store
+    backend = app.config.get('DOCUMENT_STORE_BACKEND', 'local')
+    if backend == 'local':
+        _store = DocumentStore(LocalStorageBackend(app.config['DOCUMENT_STORE_PATH']))
+    else:
+        raise ValueError(f'DOCUMENT_STORE_BACKEND inválido: {backend}')
+
+def get_document_store():
+    """Retorna o repositório ativo"""
+    return _store
+
+def send_document(stored_file, download_name, as_attachment=True):
+    """Resposta de download do documento (sendfile/X-Accel-Redirect se o backend for local)"""
+    from flask import Response, stream_with_context
+    from app.utils.file_serving import serve_file
+    
+    path = _store.local_path(stored_file)
+    if path is not None:
+        return serve_file(path, download_name=download_name, as_attachment=as_attachment,
+                          mimetype=stored_file.content_type)
+    
+    def generate():
+        with _store.open(stored_file) as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                yield chunk
+    response = Response(stream_with_context(generate()), mimetype=stored_file.content_type)
+    response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                         filename=download_name)
+    response.content_length = stored_file.size
+    return response
+
+def import_legacy_purchase_order_pdfs(pdf_dir, log=print):
+    """
+    Move os PDFs de pedidos gravados em UPLOAD_FOLDER/pdfs para o repositório
+    
+    Returns:
+        Quantidade de pedidos migrados
+    """
+    from app.models import PurchaseOrder
+    imported = 0
+    orders = PurchaseOrder.query.filter(
+        PurchaseOrder.pdf_file_id.is_(None), PurchaseOrder.pdf_path.isnot(None)
+    ).order_by(PurchaseOrder.id).all()
+    for order in orders:
+        legacy_path = os.path.join(pdf_dir, order.pdf_path)
+        if not os.path.exists(legacy_path):
+            log(f'  {order.order_number}: arquivo {order.pdf_path} não encontrado')
+            continue
+        # Cópia (o original só é apagado depois do commit)
+        with _store.temporary_dir() as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, order.pdf_path)
+            shutil.copyfile(legacy_path, tmp_path)
+            order.pdf_file = _store.save_path(tmp_path, 'application/pdf')
+        order.pdf_path = None
+        db.session.commit()
+        os.remove(legacy_path)
+        imported += 1
+    return imported
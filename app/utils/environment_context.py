@@ -0,0 +1,36 @@
+"""
+Ambiente selecionado no request (memoizado em g)
+
+O ambiente é lido da sessão uma vez por request; o contexto dos templates
+(nome do ambiente e lista de ambientes) é montado uma vez e reaproveitado
+em todas as renderizações do mesmo request.
+"""
+from flask import g, session
+from environment_config import DEFAULT_ENVIRONMENT, get_available_environments
+
+def current_environment():
+    """Código do ambiente selecionado na sessão (ambiente padrão se não houver)"""
+    env_code = g.get('_environment_code')
+    if env_code is None:
+        env_code = g._environment_code = session.get('selected_environment', DEFAULT_ENVIRONMENT)
+    return env_code
+
+def set_current_environment(env_code):
+    """Grava o ambiente na sessão e descarta o contexto memoizado do request"""
+    session['selected_environment'] = env_code
+    g.pop('_environment_code', None)
+    g.pop('_environment_context', None)
+
+def environment_context():
+    """Variáveis de ambiente para os templates (montadas uma vez por request)"""
+    context = g.get('_environment_context')
+    if context is None:
+        env_code = current_environment()
+        environments = get_available_environments()
+        env_config = environments.get(env_code, environments[DEFAULT_ENVIRONMENT])
+        context = g._environment_context = {
+            'current_environment': env_code,
+            'current_environment_name': env_config['name'],
+            'available_environments': environments
+        }
+    return context
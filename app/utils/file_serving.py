@@ -0,0 +1,138 @@
+"""
+Envio de arquivos (PDFs e anexos) sem ocupar o worker da aplicação
+
+Modos (FILE_SERVING_MODE):
+    - 'app' (padrão): a resposta usa o wsgi.file_wrapper do servidor (no
+      gunicorn, os.sendfile); o worker não copia o arquivo em Python
+    - 'x-accel-redirect': o nginx envia o arquivo de uma location internal
+      (FILE_SERVING_ACCEL_PREFIX) mapeada para FILE_SERVING_ROOT
+    - 'x-sendfile': Apache (mod_xsendfile) ou lighttpd enviam o arquivo
+
+Em todos os modos a view continua responsável pela autorização; o arquivo só
+é entregue se a view chamar serve_file. Arquivos fora de FILE_SERVING_ROOT
+(ex.: PDFs legados em UPLOAD_FOLDER/pdfs) não têm location no nginx e são
+enviados no modo 'app'. No modo 'app' há suporte a ETag,
+If-Modified-Since e Range (um intervalo por requisição; pedidos com vários
+intervalos recebem o arquivo inteiro, como permite o RFC 9110).
+"""
+import mimetypes
+import os
+from datetime import datetime, timezone
+from flask import current_app, request, Response
+from werkzeug.wsgi import wrap_file
+
+# Prefixo padrão da location internal do nginx
+DEFAULT_ACCEL_PREFIX = '/protected-files'
+
+# Download de documentos: o navegador guarda, mas revalida pelo ETag
+DOWNLOAD_CACHE_CONTROL = 'private, no-cache'
+
+def file_etag(stat):
+    """ETag a partir de mtime e tamanho (muda quando o arquivo é regravado)"""
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+def _root():
+    """Pasta raiz dos arquivos servidos (padrão: repositório de documentos)"""
+    return os.path.realpath(current_app.config.get('FILE_SERVING_ROOT') or current_app.config['DOCUMENT_STORE_PATH'])
+
+def _relative_path(path):
+    """Caminho relativo à raiz (None se o arquivo estiver fora dela)"""
+    relative = os.path.relpath(os.path.realpath(path), _root())
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return None
+    return relative.replace(os.sep, '/')
+
+def _if_range_matches(etag, last_modified):
+    """If-Range ausente ou ainda válido (senão o cliente recebe o arquivo inteiro)"""
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return if_range.date >= last_modified
+    return True
+
+def _read_range(f, start, length, chunk_size=64 * 1024):
+    """Lê o intervalo do arquivo em blocos (servidores sem sendfile limitado a Content-Length)"""
+    try:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        f.close()
+
+def serve_file(path, download_name=None, as_attachment=True, mimetype=None):
+    """
+    Responde com o arquivo informado conforme FILE_SERVING_MODE
+    
+    Args:
+        path: Caminho do arquivo no disco (fora de FILE_SERVING_ROOT usa o modo 'app' no x-accel-redirect)
+        download_name: Nome sugerido ao navegador (padrão: nome do arquivo)
+        as_attachment: Força o download (Content-Disposition: attachment)
+        mimetype: Tipo do conteúdo (padrão: deduzido pela extensão)
+    
+    Returns:
+        Response (200, 206, 304 ou 416)
+    """
+    stat = os.stat(path)
+    download_name = download_name or os.path.basename(path)
+    mimetype = mimetype or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+    etag = file_etag(stat)
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+    
+    response = Response(mimetype=mimetype, direct_passthrough=True)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = DOWNLOAD_CACHE_CONTROL
+    response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                         filename=download_name)
+    
+    mode = current_app.config.get('FILE_SERVING_MODE', 'app')
+    if mode == 'x-accel-redirect':
+        relative = _relative_path(path)
+        if relative is not None:
+            # O nginx trata Range e condicionais; a aplicação não lê o arquivo
+            prefix = current_app.config.get('FILE_SERVING_ACCEL_PREFIX', DEFAULT_ACCEL_PREFIX).rstrip('/')
+            response.headers['X-Accel-Redirect'] = f'{prefix}/{relative}'
+            return response
+        mode = 'app'
+    if mode == 'x-sendfile':
+        response.headers['X-Sendfile'] = os.path.realpath(path)
+        return response
+    if mode != 'app':
+        raise ValueError(f'FILE_SERVING_MODE inválido: {mode}')
+    
+    response.headers['Accept-Ranges'] = 'bytes'
+    if request.if_none_match.contains(etag) or (
+            not request.if_none_match and request.if_modified_since and request.if_modified_since >= last_modified):
+        response.status_code = 304
+        return response
+    
+    start, stop = 0, stat.st_size
+    if request.range is not None and _if_range_matches(etag, last_modified):
+        requested = request.range.range_for_length(stat.st_size)
+        if requested is not None:
+            start, stop = requested
+            response.status_code = 206
+            response.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{stat.st_size}'
+        elif len(request.range.ranges) == 1:
+            # Um único intervalo, fora do arquivo
+            response.status_code = 416
+            response.headers['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+    
+    response.content_length = stop - start
+    if request.method == 'HEAD':
+        return response
+    
+    f = open(path, 'rb')
+    if stop - start == stat.st_size or request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        # Arquivo inteiro, ou gunicorn (envia da posição atual até Content-Length): sendfile
+        f.seek(start)
+        response.response = wrap_file(request.environ, f)
+    else:
+        response.response = _read_range(f, start, stop - start)
+    return response
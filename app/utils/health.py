@@ -0,0 +1,136 @@
+"""
+Verificação de saúde: estado do pool de conexões e SELECT 1 cronometrado por ambiente
+
+O status público (balanceador) testa só o banco principal em uso; o relatório
+completo, com contadores do pool e todos os ambientes, fica restrito a
+administradores ou a quem enviar o HEALTH_TOKEN.
+"""
+import hmac
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+from flask import current_app, request
+from flask_login import current_user
+from app import db
+from app.utils.read_replica import replica_engines
+
+# Timeout de conexão e de comando das verificações (segundos)
+HEALTH_TIMEOUT = 3
+
+# Intervalo mínimo entre verificações (balanceadores consultam a cada poucos segundos)
+HEALTH_CACHE_SECONDS = 5
+
+# Engines sem pool usadas só para verificar ambientes que não estão em uso (url -> engine)
+_probe_engines = {}
+_lock = threading.Lock()
+_last_report = None
+_last_status = None
+
+def pool_stats(engine):
+    """Contadores do pool da engine (QueuePool); outros pools retornam só a descrição"""
+    pool = engine.pool
+    stats = {'status': pool.status()}
+    if hasattr(pool, 'checkedout'):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow()
+        })
+    return stats
+
+def _probe_engine(url):
+    """Engine sem pool (NullPool) para testar a conexão de um ambiente"""
+    engine = _probe_engines.get(url)
+    if engine is None:
+        with _lock:
+            engine = _probe_engines.get(url)
+            if engine is None:
+                engine = _probe_engines[url] = create_engine(
+                    url, poolclass=NullPool,
+                    connect_args={'connect_timeout': HEALTH_TIMEOUT,
+                                  'options': f'-c statement_timeout={HEALTH_TIMEOUT * 1000}'}
+                )
+    return engine
+
+def ping(engine):
+    """
+    Executa SELECT 1 e mede o tempo
+    
+    Returns:
+        Dict com ok, latency_ms e error (quando falha)
+    """
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        return {'ok': False, 'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+                'error': e.__class__.__name__}
+
+def health_status():
+    """
+    Saúde do banco principal em uso (SELECT 1, com o mesmo cache do relatório)
+    
+    Returns:
+        True se o banco principal responde
+    """
+    global _last_status
+    if _last_status and time.monotonic() - _last_status[1] < HEALTH_CACHE_SECONDS:
+        return _last_status[0]
+    healthy = ping(db.engine)['ok']
+    _last_status = (healthy, time.monotonic())
+    return healthy
+
+def can_view_details():
+    """Administrador logado ou cabeçalho Authorization: Bearer <HEALTH_TOKEN>"""
+    if current_user.is_authenticated and current_user.role == 'ADMIN':
+        return True
+    token = current_app.config.get('HEALTH_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if not token or not header.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(header[len('Bearer '):].encode('utf-8'), token.encode('utf-8'))
+
+def health_report():
+    """
+    Monta o relatório de saúde de todos os ambientes configurados
+    
+    O pool do banco principal (e das réplicas abertas) é reportado com os
+    contadores; os demais ambientes são testados com uma conexão avulsa.
+    
+    Returns:
+        Tupla (relatório, saudável) - saudável considera apenas o banco principal em uso
+    """
+    global _last_report
+    from environment_config import get_available_environments
+    
+    if _last_report and time.monotonic() - _last_report[2] < HEALTH_CACHE_SECONDS:
+        return _last_report[0], _last_report[1]
+    
+    primary = {'pool': pool_stats(db.engine), **ping(db.engine)}
+    replicas = replica_engines()
+    
+    environments = {}
+    for code, env in get_available_environments().items():
+        result = {}
+        if env['database_url']:
+            if make_url(env['database_url']) == db.engine.url:
+                result['primary'] = primary
+            else:
+                result['primary'] = ping(_probe_engine(env['database_url']))
+        replica_url = env.get('replica_url')
+        if replica_url:
+            engine = replicas.get(replica_url)
+            if engine is not None:
+                result['replica'] = {'pool': pool_stats(engine), **ping(engine)}
+            else:
+                result['replica'] = ping(_probe_engine(replica_url))
+        environments[code] = result
+    
+    report = {'database': primary, 'environments': environments, 'checked_at': time.time()}
+    _last_report = (report, primary['ok'], time.monotonic())
+    return report, primary['ok']
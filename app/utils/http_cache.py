@@ -0,0 +1,131 @@
+"""
+GET condicional (ETag / Last-Modified) para páginas de lista e visualização
+
+A validade da página é calculada com uma única consulta leve: max(updated_at)
+e count(*) de cada fonte que a página exibe - as linhas do filtro da própria
+view e as linhas relacionadas que o template mostra (produto, solicitante...).
+Se o navegador já tem a versão atual, a resposta é 304 sem executar a view
+nem renderizar o template.
+"""
+import hashlib
+import os
+from collections import namedtuple
+from datetime import timezone
+from functools import wraps
+from flask import current_app, request, session, make_response
+from flask_login import current_user
+from sqlalchemy import func, select
+from app import db
+from app.utils.environment_context import current_environment
+from app.utils.inbox import current_inbox_count
+
+# Fonte de dados de uma página: modelo e critérios (o mesmo escopo da consulta da view)
+Source = namedtuple('Source', 'model criteria')
+
+def source(model, *criteria):
+    """Declara uma tabela (e o filtro) cujo conteúdo aparece na página"""
+    return Source(model, criteria)
+
+def related(model, foreign_key, parent):
+    """Declara as linhas de model referenciadas por foreign_key nas linhas da fonte parent"""
+    return Source(model, (model.id.in_(select(foreign_key).where(*parent.criteria)),))
+
+def get_fingerprint(sources):
+    """
+    Retorna (max updated_at, count) de cada fonte em uma única consulta
+    
+    Returns:
+        Tupla com os valores na ordem das fontes
+    """
+    columns = []
+    for src in sources:
+        columns.append(select(func.max(src.model.updated_at)).where(*src.criteria).scalar_subquery())
+        columns.append(select(func.count()).select_from(src.model).where(*src.criteria).scalar_subquery())
+    return tuple(db.session.execute(select(*columns)).one())
+
+# Assinatura dos templates (calculada uma vez por processo, igual em todos os workers)
+_templates_version = None
+
+def _deploy_version():
+    """
+    Versão do código da página: APP_VERSION ou a assinatura dos templates
+    
+    Depois de um deploy o navegador não pode receber 304 de um HTML com
+    marcação antiga ou que aponta para bundles (app.<hash>.css) já removidos.
+    """
+    global _templates_version
+    version = current_app.config.get('APP_VERSION')
+    if not version:
+        if _templates_version is None:
+            digest = hashlib.sha1()
+            templates_dir = os.path.join(current_app.root_path, current_app.template_folder)
+            for root, _, files in sorted(os.walk(templates_dir)):
+                for name in sorted(files):
+                    stat = os.stat(os.path.join(root, name))
+                    digest.update(f'{os.path.relpath(os.path.join(root, name), templates_dir)}:'
+                                  f'{stat.st_size}:{stat.st_mtime_ns}'.encode('utf-8'))
+            _templates_version = digest.hexdigest()[:12]
+        version = _templates_version
+    return f"{version}:{current_app.config.get('ASSETS_VERSION', '')}"
+
+def _build_etag(fingerprint):
+    """Combina o fingerprint dos dados com o que mais varia na página (usuário, filtros, navbar, deploy)"""
+    parts = [
+        _deploy_version(),
+        repr(fingerprint),
+        str(current_user.get_id()),
+        current_user.role,
+        request.full_path,
+        current_environment(),
+        str(current_inbox_count())
+    ]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+def _last_modified(fingerprint):
+    """Retorna o maior updated_at entre as fontes (UTC)"""
+    timestamps = [value for value in fingerprint[0::2] if value is not None]
+    if not timestamps:
+        return None
+    return max(timestamps).replace(tzinfo=timezone.utc)
+
+def conditional_get(sources_factory):
+    """
+    Decorator que responde 304 quando os dados da página não mudaram
+    
+    Deve ficar abaixo de @login_required (a autenticação roda antes).
+    Páginas com mensagens flash pendentes são sempre renderizadas.
+    
+    Usage:
+        @conditional_get(lambda request_id: [source(PurchaseRequest, PurchaseRequest.id == request_id)])
+        def view(request_id):
+            pass
+    
+    Args:
+        sources_factory: Função que recebe os argumentos da rota e retorna a lista de fontes
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return f(*args, **kwargs)
+            
+            fingerprint = get_fingerprint(sources_factory(*args, **kwargs))
+            etag = _build_etag(fingerprint)
+            last_modified = _last_modified(fingerprint)
+            
+            # A decisão usa só o ETag: Last-Modified não distingue usuário nem filtros
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # O navegador pode guardar a página, mas deve revalidar a cada acesso
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,103 @@
+"""
+Relatório de tempo de inicialização (python run.py --import-profile)
+
+Sobe a aplicação em um interpretador novo com -X importtime e resume onde
+o tempo vai: importação por pacote, módulos mais caros e create_app.
+Também aponta dependências pesadas que não deveriam ser carregadas no
+boot (são importadas só na view que as usa).
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Dependências pesadas que devem ficar fora da inicialização dos workers
+HEAVY_MODULES = ('reportlab', 'numpy', 'pandas', 'PIL', 'matplotlib')
+
+# Script executado no interpretador medido (mede a importação de app e o create_app)
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app({config_name!r})
+created = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'modules': len(sys.modules),
+    'heavy': sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+}}))
+"""
+
+def parse_importtime(output):
+    """
+    Lê a saída do -X importtime
+    
+    Returns:
+        Lista de (módulo, self_us, cumulative_us)
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            times, name = line[len('import time:'):].rsplit('|', 1)
+            self_us, cumulative_us = (int(value) for value in times.split('|'))
+        except ValueError:
+            continue
+        entries.append((name.strip(), self_us, cumulative_us))
+    return entries
+
+def profile_startup(config_name='development', top=20):
+    """
+    Mede a inicialização da aplicação em um processo separado
+    
+    Args:
+        config_name: Configuração usada no create_app
+        top: Quantidade de pacotes/módulos listados
+    
+    Returns:
+        Dicionário com os tempos, os pacotes e módulos mais caros e as dependências pesadas carregadas
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    script = STARTUP_SCRIPT.format(config_name=config_name, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=project_root, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Falha ao iniciar a aplicação:\n{result.stderr[-2000:]}')
+    
+    entries = parse_importtime(result.stderr)
+    by_package = defaultdict(int)
+    for name, self_us, _ in entries:
+        by_package[name.split('.')[0]] += self_us
+    
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['packages'] = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    report['modules_by_cumulative'] = sorted(
+        ((name, cumulative_us) for name, _, cumulative_us in entries),
+        key=lambda item: item[1], reverse=True
+    )[:top]
+    return report
+
+def format_report(report):
+    """Formata o relatório para o terminal"""
+    lines = [
+        f"Importação do pacote app: {report['import_ms']:.0f} ms",
+        f"create_app: {report['create_app_ms']:.0f} ms",
+        f"Módulos carregados: {report['modules']}",
+        '',
+        'Pacotes por tempo próprio de importação:'
+    ]
+    lines += [f'  {us / 1000:9.1f} ms  {name}' for name, us in report['packages']]
+    lines += ['', 'Módulos por tempo acumulado:']
+    lines += [f'  {us / 1000:9.1f} ms  {name}' for name, us in report['modules_by_cumulative']]
+    lines.append('')
+    if report['heavy']:
+        lines.append(f"ATENÇÃO: dependências pesadas carregadas no boot: {', '.join(report['heavy'])}")
+    else:
+        lines.append('Nenhuma dependência pesada carregada no boot.')
+    return '\n'.join(lines)
@@ -0,0 +1,210 @@
+"""
+Caixa de entrada do usuário: tudo que aguarda uma ação sua, em uma única consulta
+
+Cada papel contribui com um conjunto de "ramos" (SELECTs com as mesmas colunas)
+que são combinados com UNION ALL. A lista completa e a contagem do badge da
+navbar usam os mesmos ramos; os dashboards montam suas seções a partir da
+mesma lista (current_inbox_sections), e o badge reaproveita a contagem.
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from flask import g
+from flask_login import current_user
+from sqlalchemy import exists, func, literal, null, select, union_all
+from app import db
+from app.models import PurchaseRequest, Quotation, PurchaseOrder, Invoice, PaymentRequest, User
+
+# Tipos de item da caixa de entrada: label e rota de visualização (endpoint, argumento do id)
+INBOX_TYPES = {
+    'PURCHASE_REQUEST_APPROVAL': ('Aprovar requisição', 'purchase_request.view', 'request_id'),
+    'PURCHASE_REQUEST_QUOTATION': ('Cotar requisição', 'purchaser.create_quotation', 'request_id'),
+    'QUOTATION_DRAFT': ('Concluir cotação', 'purchaser.view_quotation', 'quotation_id'),
+    'QUOTATION_APPROVAL': ('Aprovar cotação', 'manager.view_quotation', 'quotation_id'),
+    'QUOTATION_PURCHASE': ('Emitir pedido de compra', 'purchaser.view_quotation', 'quotation_id'),
+    'PURCHASE_ORDER_SEND': ('Enviar pedido ao fornecedor', 'purchaser.view_purchase_order', 'order_id'),
+    'INVOICE_PAYMENT_REQUEST': ('Solicitar pagamento da nota', 'invoice.view', 'invoice_id'),
+    'PAYMENT_APPROVAL': ('Liberar pagamento', 'payment_request.view', 'request_id'),
+}
+
+class InboxItem(namedtuple('InboxItem', 'item_type item_id reference status since value')):
+    """Linha da caixa de entrada (tipo, id, referência, status, desde, valor)"""
+    __slots__ = ()
+    
+    @property
+    def age(self):
+        """Tempo aguardando ação (timedelta)"""
+        return datetime.utcnow() - self.since if self.since else None
+    
+    @property
+    def age_days(self):
+        """Dias aguardando ação"""
+        return self.age.days if self.since else 0
+    
+    def get_type_label(self):
+        """Retorna o label do tipo de item"""
+        return INBOX_TYPES[self.item_type][0]
+    
+    def get_view_endpoint(self):
+        """Retorna (endpoint, kwargs) da página do item"""
+        _, endpoint, arg = INBOX_TYPES[self.item_type]
+        return endpoint, {arg: self.item_id}
+
+def _branch(item_type, item_id, reference, status, since, value):
+    """Monta um SELECT com as colunas padronizadas da caixa de entrada"""
+    return select(
+        literal(item_type).label('item_type'),
+        item_id.label('item_id'),
+        reference.label('reference'),
+        status.label('status'),
+        since.label('since'),
+        func.coalesce(value, 0).label('value')
+    )
+
+def _department_filter(user):
+    """Restringe às requisições do departamento do gerente (ADMIN vê todos)"""
+    if user.role == 'ADMIN':
+        return None
+    return User.department_id == user.department_id
+
+def _manager_branches(user):
+    """Requisições, cotações e pagamentos aguardando aprovação do gerente"""
+    department = _department_filter(user)
+    
+    requests = _branch(
+        'PURCHASE_REQUEST_APPROVAL', PurchaseRequest.id, PurchaseRequest.request_number,
+        PurchaseRequest.status, PurchaseRequest.created_at, PurchaseRequest.estimated_total
+    ).join(User, PurchaseRequest.user_id == User.id).where(PurchaseRequest.status == 'PENDING')
+    
+    quotations = _branch(
+        'QUOTATION_APPROVAL', Quotation.id, PurchaseRequest.request_number,
+        Quotation.status, Quotation.released_at, PurchaseRequest.estimated_total
+    ).join(PurchaseRequest, Quotation.purchase_request_id == PurchaseRequest.id).join(
+        User, PurchaseRequest.user_id == User.id
+    ).where(Quotation.status == 'RELEASED')
+    
+    payments = _branch(
+        'PAYMENT_APPROVAL', PaymentRequest.id, PaymentRequest.request_number,
+        PaymentRequest.status, PaymentRequest.created_at, PaymentRequest.approved_value
+    ).join(PurchaseOrder, PaymentRequest.purchase_order_id == PurchaseOrder.id).join(
+        PurchaseRequest, PurchaseOrder.purchase_request_id == PurchaseRequest.id
+    ).join(User, PurchaseRequest.user_id == User.id).where(PaymentRequest.status == 'AGUARDANDO_PAGAMENTO')
+    
+    if department is not None:
+        requests = requests.where(department)
+        quotations = quotations.where(department)
+        payments = payments.where(department)
+    
+    return [requests, quotations, payments]
+
+def _purchaser_branches(user):
+    """Requisições a cotar, cotações em rascunho/aprovadas e pedidos a enviar"""
+    own = user.role != 'ADMIN'
+    
+    requests = _branch(
+        'PURCHASE_REQUEST_QUOTATION', PurchaseRequest.id, PurchaseRequest.request_number,
+        PurchaseRequest.status, PurchaseRequest.approved_at, PurchaseRequest.estimated_total
+    ).where(PurchaseRequest.status == 'APPROVED')
+    
+    drafts = _branch(
+        'QUOTATION_DRAFT', Quotation.id, PurchaseRequest.request_number,
+        Quotation.status, Quotation.created_at, PurchaseRequest.estimated_total
+    ).join(PurchaseRequest, Quotation.purchase_request_id == PurchaseRequest.id).where(Quotation.status == 'DRAFT')
+    
+    to_purchase = _branch(
+        'QUOTATION_PURCHASE', Quotation.id, PurchaseRequest.request_number,
+        Quotation.status, Quotation.approved_at, PurchaseRequest.estimated_total
+    ).join(PurchaseRequest, Quotation.purchase_request_id == PurchaseRequest.id).where(
+        Quotation.status == 'APPROVED',
+        PurchaseRequest.status == 'VENDOR_APPROVED'
+    )
+    
+    orders = _branch(
+        'PURCHASE_ORDER_SEND', PurchaseOrder.id, PurchaseOrder.order_number,
+        PurchaseOrder.status, PurchaseOrder.created_at, PurchaseRequest.estimated_total
+    ).join(PurchaseRequest, PurchaseOrder.purchase_request_id == PurchaseRequest.id).where(
+        PurchaseOrder.status == 'CREATED'
+    )
+    
+    if own:
+        drafts = drafts.where(Quotation.purchaser_id == user.id)
+        orders = orders.where(PurchaseOrder.purchaser_id == user.id)
+    
+    return [requests, drafts, to_purchase, orders]
+
+def _finance_branches(user):
+    """Notas fiscais sem solicitação de pagamento"""
+    invoices = _branch(
+        'INVOICE_PAYMENT_REQUEST', Invoice.id, Invoice.invoice_number,
+        null(), Invoice.informed_at, Invoice.total_value
+    ).where(~exists().where(PaymentRequest.invoice_id == Invoice.id))
+    return [invoices]
+
+# Ramos de cada papel
+ROLE_BRANCHES = {
+    'MANAGER': [_manager_branches],
+    'PURCHASER': [_purchaser_branches],
+    'FINANCE': [_finance_branches],
+    'ADMIN': [_manager_branches, _purchaser_branches, _finance_branches],
+}
+
+def _inbox_union(user):
+    """Retorna o UNION ALL dos ramos do papel do usuário (None se não houver ramos)"""
+    branches = []
+    for builder in ROLE_BRANCHES.get(user.role, []):
+        branches.extend(builder(user))
+    if not branches:
+        return None
+    return union_all(*branches).subquery('inbox')
+
+def get_inbox(user, limit=None):
+    """
+    Retorna os itens que aguardam ação do usuário (mais antigos primeiro)
+    
+    Args:
+        user: Usuário logado
+        limit: Número máximo de itens (None = todos)
+    
+    Returns:
+        Lista de InboxItem
+    """
+    inbox = _inbox_union(user)
+    if inbox is None:
+        return []
+    query = select(inbox).order_by(inbox.c.since.asc().nulls_last(), inbox.c.item_id)
+    if limit:
+        query = query.limit(limit)
+    return [InboxItem(*row) for row in db.session.execute(query)]
+
+def get_inbox_count(user):
+    """Retorna apenas o total de itens da caixa de entrada (badge da navbar)"""
+    inbox = _inbox_union(user)
+    if inbox is None:
+        return 0
+    return db.session.execute(select(func.count()).select_from(inbox)).scalar() or 0
+
+def current_inbox_sections():
+    """
+    Itens da caixa de entrada do usuário logado agrupados por tipo (dashboards)
+    
+    A lista é lida uma vez por request e a contagem fica guardada para o
+    badge da navbar, que assim não executa outra consulta.
+    
+    Returns:
+        defaultdict item_type -> lista de InboxItem
+    """
+    if 'inbox_sections' not in g:
+        items = get_inbox(current_user)
+        sections = defaultdict(list)
+        for item in items:
+            sections[item.item_type].append(item)
+        g.inbox_sections = sections
+        g.inbox_count = len(items)
+    return g.inbox_sections
+
+def current_inbox_count():
+    """Contagem da caixa de entrada do usuário logado, calculada uma vez por request"""
+    if not current_user.is_authenticated:
+        return 0
+    if 'inbox_count' not in g:
+        g.inbox_count = get_inbox_count(current_user)
+    return g.inbox_count
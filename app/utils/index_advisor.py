@@ -0,0 +1,271 @@
+"""
+Pacote de índices compostos/parciais e verificador de índices
+
+INDEX_PACK descreve os índices alinhados com o formato real das consultas
+(filtro por status + ordenação por outra coluna, filtros por fornecedor).
+São criados com CREATE INDEX CONCURRENTLY, sem bloquear escrita nas tabelas.
+
+_catalog() reúne as consultas das rotas mais acessadas; o verificador
+executa EXPLAIN em cada uma e aponta varreduras sequenciais e ordenações
+em tabelas grandes, além das consultas mais caras de pg_stat_statements.
+"""
+import json
+from collections import namedtuple
+from sqlalchemy import func, select, text
+from app import db
+from app.models import (User, PurchaseRequest, Quotation, QuotationItem, PurchaseOrder,
+                        Invoice, Payment, PaymentRequest)
+
+# Índice do pacote: nome, tabela, definição (após "ON tabela") e consultas atendidas
+IndexSpec = namedtuple('IndexSpec', 'name table definition reason')
+
+INDEX_PACK = [
+    # purchase_requests
+    IndexSpec('idx_purchase_requests_pending', 'purchase_requests',
+              "(created_at) WHERE status = 'PENDING'",
+              'manager.dashboard / caixa de entrada: pendentes por data'),
+    IndexSpec('idx_purchase_requests_awaiting_quotation', 'purchase_requests',
+              "(approved_at) WHERE status = 'APPROVED'",
+              'purchaser.dashboard / purchaser.requests: aprovadas por approved_at'),
+    IndexSpec('idx_purchase_requests_status_created', 'purchase_requests',
+              '(status, created_at DESC)',
+              'purchase_request.index e user.requests filtrados por status'),
+    IndexSpec('idx_purchase_requests_user_created', 'purchase_requests',
+              '(user_id, created_at DESC)',
+              'user.dashboard / user.requests: requisições do usuário'),
+    # quotations
+    IndexSpec('idx_quotations_released', 'quotations',
+              "(released_at) WHERE status = 'RELEASED'",
+              'manager.dashboard / manager.quotations: liberadas por released_at'),
+    IndexSpec('idx_quotations_approved', 'quotations',
+              "(approved_at) WHERE status = 'APPROVED'",
+              'purchaser.dashboard: aprovadas aguardando compra'),
+    IndexSpec('idx_quotations_purchaser_draft', 'quotations',
+              "(purchaser_id, created_at DESC) WHERE status = 'DRAFT'",
+              'purchaser.dashboard: rascunhos do comprador'),
+    IndexSpec('idx_quotations_created', 'quotations',
+              '(created_at DESC)',
+              'quotation.index paginado'),
+    # quotation_items
+    IndexSpec('idx_quotation_items_vendor', 'quotation_items',
+              '(vendor_name, vendor_cnpj)',
+              'supplier.index (GROUP BY) e supplier.edit/delete (filtro por nome)'),
+    IndexSpec('idx_quotation_items_vendor_created', 'quotation_items',
+              '(vendor_name, created_at DESC)',
+              'supplier.history'),
+    IndexSpec('idx_quotation_items_cnpj', 'quotation_items',
+              '(vendor_cnpj) WHERE vendor_cnpj IS NOT NULL',
+              'supplier.create/edit: CNPJ duplicado'),
+    # purchase_orders / invoices
+    IndexSpec('idx_purchase_orders_created', 'purchase_orders',
+              '(created_at DESC)',
+              'purchase_order.index / purchaser.orders'),
+    IndexSpec('idx_invoices_created', 'invoices',
+              '(created_at DESC)',
+              'invoice.index paginado'),
+    # payment_requests
+    IndexSpec('idx_payment_requests_awaiting', 'payment_requests',
+              "(created_at) WHERE status = 'AGUARDANDO_PAGAMENTO'",
+              'manager.dashboard / caixa de entrada: pagamentos a liberar'),
+    IndexSpec('idx_payment_requests_status_created', 'payment_requests',
+              '(status, created_at DESC)',
+              'payment_request.index filtrado por status'),
+    IndexSpec('idx_payment_requests_order', 'payment_requests',
+              '(purchase_order_id)',
+              'joins com purchase_orders'),
+    IndexSpec('idx_payment_requests_invoice', 'payment_requests',
+              '(invoice_id)',
+              'caixa de entrada financeira: notas sem solicitação'),
+    # payments
+    IndexSpec('idx_payments_pending', 'payments',
+              "(created_at) WHERE status = 'PENDING'",
+              'finance.pending'),
+    IndexSpec('idx_payments_released', 'payments',
+              "(released_at) WHERE status = 'RELEASED'",
+              'finance.released'),
+]
+
+# Varreduras sequenciais/ordenações abaixo deste número de linhas estimadas são ignoradas
+LARGE_TABLE_ROWS = 1000
+
+def _catalog():
+    """Consultas representativas das rotas (mesmos filtros e ordenação das views)"""
+    return {
+        'manager.dashboard: requisições pendentes': select(PurchaseRequest).join(
+            User, PurchaseRequest.user_id == User.id
+        ).where(PurchaseRequest.status == 'PENDING', User.department_id == 1).order_by(PurchaseRequest.created_at.asc()),
+        'manager.dashboard: cotações liberadas': select(Quotation).join(
+            PurchaseRequest, Quotation.purchase_request_id == PurchaseRequest.id
+        ).join(User, PurchaseRequest.user_id == User.id).where(
+            Quotation.status == 'RELEASED', User.department_id == 1
+        ).order_by(Quotation.released_at.asc()),
+        'manager.dashboard: pagamentos a liberar': select(PaymentRequest).join(
+            PurchaseOrder, PaymentRequest.purchase_order_id == PurchaseOrder.id
+        ).join(PurchaseRequest, PurchaseOrder.purchase_request_id == PurchaseRequest.id).join(
+            User, PurchaseRequest.user_id == User.id
+        ).where(PaymentRequest.status == 'AGUARDANDO_PAGAMENTO', User.department_id == 1).order_by(
+            PaymentRequest.created_at.asc()
+        ),
+        'purchaser.dashboard: requisições aprovadas': select(PurchaseRequest).where(
+            PurchaseRequest.status == 'APPROVED'
+        ).order_by(PurchaseRequest.approved_at.asc()),
+        'purchaser.dashboard: rascunhos': select(Quotation).where(
+            Quotation.purchaser_id == 1, Quotation.status == 'DRAFT'
+        ).order_by(Quotation.created_at.desc()),
+        'purchaser.dashboard: cotações aprovadas': select(Quotation).join(
+            PurchaseRequest, Quotation.purchase_request_id == PurchaseRequest.id
+        ).where(Quotation.status == 'APPROVED', PurchaseRequest.status == 'VENDOR_APPROVED').order_by(
+            Quotation.approved_at.asc()
+        ),
+        'user.dashboard: requisições recentes': select(PurchaseRequest).where(
+            PurchaseRequest.user_id == 1
+        ).order_by(PurchaseRequest.created_at.desc()).limit(5),
+        'purchase_request.index: por status': select(PurchaseRequest).where(
+            PurchaseRequest.status == 'APPROVED'
+        ).order_by(PurchaseRequest.created_at.desc()).limit(20),
+        'quotation.index': select(Quotation).order_by(Quotation.created_at.desc()).limit(20),
+        'purchase_order.index': select(PurchaseOrder).order_by(PurchaseOrder.created_at.desc()).limit(20),
+        'invoice.index': select(Invoice).order_by(Invoice.created_at.desc()).limit(20),
+        'payment_request.index: por status': select(PaymentRequest).where(
+            PaymentRequest.status == 'AGUARDANDO_PAGAMENTO'
+        ).order_by(PaymentRequest.created_at.desc()).limit(20),
+        'supplier.index': select(
+            QuotationItem.vendor_name, QuotationItem.vendor_cnpj,
+            func.count(QuotationItem.id), func.max(QuotationItem.created_at)
+        ).where(QuotationItem.vendor_name != '').group_by(
+            QuotationItem.vendor_name, QuotationItem.vendor_cnpj
+        ).order_by(QuotationItem.vendor_name),
+        'supplier.history': select(QuotationItem).where(
+            QuotationItem.vendor_name == 'Fornecedor'
+        ).order_by(QuotationItem.created_at.desc()),
+        'supplier.create: CNPJ duplicado': select(QuotationItem.id).where(
+            QuotationItem.vendor_cnpj == '00.000.000/0001-00'
+        ).limit(1),
+        'finance.pending': select(Payment).where(Payment.status == 'PENDING').order_by(Payment.created_at.asc()),
+        'finance.released': select(Payment).where(Payment.status == 'RELEASED').order_by(Payment.released_at.asc()),
+    }
+
+# ==================== CRIAÇÃO DOS ÍNDICES ====================
+
+def _index_state(connection, name):
+    """Retorna None (não existe), 'valid' ou 'invalid' (CONCURRENTLY interrompido)"""
+    valid = connection.execute(text(
+        'SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name'
+    ), {'name': name}).scalar()
+    if valid is None:
+        return None
+    return 'valid' if valid else 'invalid'
+
+def _table_exists(connection, table):
+    """Verifica se a tabela existe no banco"""
+    return connection.execute(text('SELECT to_regclass(:table)'), {'table': table}).scalar() is not None
+
+def apply_index_pack(dry_run=False, log=print):
+    """
+    Cria os índices do pacote que ainda não existem (CREATE INDEX CONCURRENTLY)
+    
+    CONCURRENTLY não pode rodar dentro de transação: cada comando é executado
+    em autocommit. Índices inválidos deixados por uma execução interrompida
+    são removidos e recriados.
+    
+    Args:
+        dry_run: Apenas mostra os comandos, sem executar
+        log: Função para mensagens de progresso
+    
+    Returns:
+        Número de índices criados (ou que seriam criados)
+    """
+    created = 0
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        for spec in INDEX_PACK:
+            if not _table_exists(connection, spec.table):
+                log(f'- {spec.name}: tabela {spec.table} não existe, ignorado')
+                continue
+            state = _index_state(connection, spec.name)
+            if state == 'valid':
+                continue
+            statements = []
+            if state == 'invalid':
+                statements.append(f'DROP INDEX CONCURRENTLY IF EXISTS {spec.name}')
+            statements.append(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {spec.name} ON {spec.table} {spec.definition}')
+            for statement in statements:
+                log(f'{statement};')
+                if not dry_run:
+                    connection.execute(text(statement))
+            created += 1
+        if created and not dry_run:
+            for table in sorted({spec.table for spec in INDEX_PACK if _table_exists(connection, spec.table)}):
+                connection.execute(text(f'ANALYZE {table}'))
+    return created
+
+# ==================== VERIFICADOR ====================
+
+Finding = namedtuple('Finding', 'query problem detail')
+
+def _explain(connection, statement):
+    """Retorna o plano (JSON) estimado da consulta"""
+    compiled = statement.compile(dialect=connection.dialect)
+    result = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params).scalar()
+    plan = json.loads(result) if isinstance(result, str) else result
+    return plan[0]['Plan']
+
+def _walk(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _walk(child)
+
+def analyze_plan(name, plan, min_rows=LARGE_TABLE_ROWS):
+    """Aponta varreduras sequenciais e ordenações explícitas em conjuntos grandes"""
+    findings = []
+    for node in _walk(plan):
+        rows = node.get('Plan Rows', 0)
+        if node['Node Type'] == 'Seq Scan' and rows >= min_rows:
+            findings.append(Finding(name, 'Seq Scan', f"{node.get('Relation Name')} (~{rows} linhas)"))
+        elif node['Node Type'] == 'Sort' and rows >= min_rows:
+            findings.append(Finding(name, 'Sort', f"{', '.join(node.get('Sort Key', []))} (~{rows} linhas)"))
+    return findings
+
+def explain_catalog(min_rows=LARGE_TABLE_ROWS):
+    """
+    Executa EXPLAIN em todas as consultas do catálogo
+    
+    Returns:
+        Lista de Finding (consultas sem problemas não aparecem)
+    """
+    findings = []
+    with db.engine.connect() as connection:
+        for name, statement in _catalog().items():
+            findings.extend(analyze_plan(name, _explain(connection, statement), min_rows))
+    return findings
+
+def top_statements(limit=10):
+    """
+    Consultas com maior tempo total segundo pg_stat_statements
+    
+    Returns:
+        Lista de dicts (query, calls, total_ms, mean_ms, rows) ou None se a extensão não estiver instalada
+    """
+    with db.engine.connect() as connection:
+        installed = connection.execute(text(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'"
+        )).scalar()
+        if not installed:
+            return None
+        # PostgreSQL 13 renomeou total_time/mean_time
+        version = int(connection.execute(text("SELECT current_setting('server_version_num')")).scalar())
+        total, mean = ('total_exec_time', 'mean_exec_time') if version >= 130000 else ('total_time', 'mean_time')
+        rows = connection.execute(text(
+            f'SELECT query, calls, {total} AS total_ms, {mean} AS mean_ms, rows '
+            f'FROM pg_stat_statements WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) '
+            f'ORDER BY {total} DESC LIMIT :limit'
+        ), {'limit': limit}).mappings().all()
+    return [dict(row) for row in rows]
+
+def unused_pack_indexes():
+    """Índices do pacote que existem mas nunca foram usados (pg_stat_user_indexes.idx_scan = 0)"""
+    names = [spec.name for spec in INDEX_PACK]
+    with db.engine.connect() as connection:
+        rows = connection.execute(text(
+            'SELECT indexrelname FROM pg_stat_user_indexes WHERE idx_scan = 0 AND indexrelname = ANY(:names)'
+        ), {'names': names}).scalars().all()
+    return sorted(rows)
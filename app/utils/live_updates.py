@@ -0,0 +1,356 @@
+"""
+Atualizações em tempo real dos dashboards (Server-Sent Events)
+
+Transições de workflow confirmadas (commit) geram eventos pequenos que são
+distribuídos para os canais interessados:
+    user:<id>                   - o próprio usuário
+    role:<ROLE>                 - todos os usuários de um papel
+    department:<id>:MANAGER     - gerentes de um departamento
+
+O broker é configurável (LIVE_UPDATES_BACKEND): 'memory' (fan-out no
+processo, um worker) ou 'postgres' (LISTEN/NOTIFY entre vários workers,
+padrão em produção). Cada stream aberto prende um worker, então as
+atualizações só ficam ativas com workers em threads ou assíncronos
+(WEB_WORKER_CLASS) ou com LIVE_UPDATES_ENABLED explícito.
+"""
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import url_for
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+# Canal do LISTEN/NOTIFY no PostgreSQL
+NOTIFY_CHANNEL = 'compras_live_updates'
+
+# Intervalo do keep-alive do stream (segundos)
+KEEPALIVE_INTERVAL = 25
+
+# Eventos mantidos por assinante antes de descartar (cliente lento)
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Classes de worker que atendem outros requests enquanto um stream está aberto
+CONCURRENT_WORKER_CLASSES = ('gthread', 'gevent', 'eventlet', 'threaded')
+
+class Subscription:
+    """Assinatura de um cliente SSE em um conjunto de canais"""
+    
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    
+    def get(self, timeout):
+        """Retorna o próximo evento ou None após o timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def close(self):
+        """Cancela a assinatura"""
+        self.broker.unsubscribe(self)
+
+class MemoryBroker:
+    """Pub/sub em memória do processo"""
+    
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+    
+    def subscribe(self, channels):
+        """Cria uma assinatura nos canais informados"""
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        """Remove a assinatura de todos os canais"""
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+    
+    def publish(self, channels, message):
+        """Publica a mensagem nos canais (cada assinante recebe uma única vez)"""
+        self.dispatch(channels, message)
+    
+    def dispatch(self, channels, message):
+        """Entrega a mensagem aos assinantes locais"""
+        with self._lock:
+            targets = set()
+            for channel in channels:
+                targets |= self._subscribers.get(channel, set())
+        for subscription in targets:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                # Cliente lento: descarta o evento (o próximo refresh corrige a tela)
+                pass
+
+class PostgresBroker(MemoryBroker):
+    """Pub/sub entre workers via LISTEN/NOTIFY do PostgreSQL"""
+    
+    def __init__(self, engine):
+        super().__init__()
+        self._engine = engine
+        # O LISTEN fica aberto indefinidamente: usa uma conexão própria, fora do
+        # pool da aplicação, para não reter uma das conexões dos requests
+        self._listen_engine = create_engine(engine.url, poolclass=NullPool)
+        self._listener = None
+    
+    def publish(self, channels, message):
+        """Publica via NOTIFY; o listener de cada worker entrega aos assinantes locais"""
+        payload = json.dumps({'channels': list(channels), 'message': message})
+        with self._engine.connect() as connection:
+            connection.execute(text('SELECT pg_notify(:channel, :payload)'),
+                               {'channel': NOTIFY_CHANNEL, 'payload': payload})
+            connection.commit()
+    
+    def subscribe(self, channels):
+        """Cria a assinatura e inicia o listener do worker na primeira chamada"""
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name='live-updates-listener', daemon=True)
+                    self._listener.start()
+        return super().subscribe(channels)
+    
+    def _listen(self):
+        """Loop do LISTEN (reconecta em caso de erro)"""
+        import select as select_module
+        
+        while True:
+            try:
+                connection = self._listen_engine.raw_connection()
+                try:
+                    connection.set_isolation_level(0)  # autocommit
+                    cursor = connection.cursor()
+                    cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                    while True:
+                        if select_module.select([connection], [], [], KEEPALIVE_INTERVAL) == ([], [], []):
+                            continue
+                        connection.poll()
+                        while connection.notifies:
+                            notify = connection.notifies.pop(0)
+                            data = json.loads(notify.payload)
+                            self.dispatch(data['channels'], data['message'])
+                finally:
+                    connection.close()
+            except Exception:
+                time.sleep(5)
+
+# Broker ativo e se as atualizações estão ligadas (configurados em init_live_updates)
+_broker = MemoryBroker()
+_enabled = False
+
+def init_live_updates(app, engine_factory):
+    """
+    Configura o broker a partir da configuração da aplicação
+    
+    Args:
+        app: Aplicação Flask
+        engine_factory: Função que retorna a engine do SQLAlchemy (backend postgres)
+    """
+    global _broker, _enabled
+    backend = app.config.get('LIVE_UPDATES_BACKEND', 'memory')
+    if backend not in ('memory', 'postgres'):
+        raise ValueError(f'LIVE_UPDATES_BACKEND inválido: {backend}')
+    
+    _enabled = app.config.get('LIVE_UPDATES_ENABLED')
+    if _enabled is None:
+        _enabled = app.config.get('WEB_WORKER_CLASS', 'sync') in CONCURRENT_WORKER_CLASSES
+    # Dashboards só abrem o stream quando ele está ligado
+    app.jinja_env.globals['live_updates_enabled'] = _enabled
+    if not _enabled:
+        return
+    
+    if backend == 'postgres':
+        with app.app_context():
+            _broker = PostgresBroker(engine_factory())
+    else:
+        # Com vários processos cada um teria o seu broker: eventos de um worker
+        # nunca chegariam aos streams abertos nos outros
+        if app.config.get('WEB_CONCURRENCY', 1) > 1:
+            raise ValueError('LIVE_UPDATES_BACKEND=memory não funciona com WEB_CONCURRENCY > 1; use postgres')
+        _broker = MemoryBroker()
+
+def is_enabled():
+    """Indica se as atualizações em tempo real estão ligadas"""
+    return _enabled
+
+def get_broker():
+    """Retorna o broker ativo"""
+    return _broker
+
+def channels_for(user):
+    """Retorna os canais que o usuário acompanha"""
+    channels = [f'user:{user.id}', f'role:{user.role}']
+    if user.role == 'MANAGER' and user.department_id:
+        channels.append(f'department:{user.department_id}:MANAGER')
+    return channels
+
+def format_sse(message):
+    """Formata um evento no protocolo text/event-stream (tipo vai em message['kind'])"""
+    return f'data: {json.dumps(message)}\n\n'
+
+def stream(subscription):
+    """Gerador do stream SSE de uma assinatura (keep-alive a cada KEEPALIVE_INTERVAL)"""
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            message = subscription.get(timeout=KEEPALIVE_INTERVAL)
+            if message is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_sse(message)
+    finally:
+        subscription.close()
+
+# ==================== EVENTOS DE WORKFLOW ====================
+
+def _message(kind, title, reference, url_endpoint=None, url_kwargs=None):
+    """Monta a mensagem (delta) enviada aos clientes"""
+    url = None
+    if url_endpoint:
+        try:
+            url = url_for(url_endpoint, **(url_kwargs or {}))
+        except RuntimeError:
+            # Fora de um request (ex.: comandos CLI) não há como montar a URL
+            pass
+    return {
+        'kind': kind,
+        'title': title,
+        'reference': reference,
+        'url': url,
+        'at': datetime.utcnow().isoformat() + 'Z'
+    }
+
+def _changed_to(obj, attribute='status'):
+    """Retorna o novo valor do atributo se ele mudou neste flush (senão None)"""
+    history = inspect(obj).attrs[attribute].history
+    return history.added[0] if history.has_changes() and history.added else None
+
+def _purchase_request_events(obj, is_new):
+    """Eventos de requisições de compra"""
+    department_id = obj.requester.department_id if obj.requester else None
+    managers = [f'department:{department_id}:MANAGER', 'role:ADMIN']
+    view = ('purchase_request.view', {'request_id': obj.id})
+    status = obj.status if is_new else _changed_to(obj)
+    
+    if is_new and status == 'PENDING':
+        return [(managers, _message('purchase_request.created', 'Nova requisição', obj.request_number, *view))]
+    if status == 'APPROVED':
+        kind = 'purchase_request.auto_approved' if obj.auto_approved else 'purchase_request.approved'
+        return [(managers + ['role:PURCHASER', f'user:{obj.user_id}'],
+                 _message(kind, 'Requisição aprovada', obj.request_number, *view))]
+    if status == 'REJECTED':
+        return [(managers + [f'user:{obj.user_id}'],
+                 _message('purchase_request.rejected', 'Requisição rejeitada', obj.request_number, *view))]
+    if status == 'IN_QUOTATION':
+        return [(['role:PURCHASER', 'role:ADMIN'],
+                 _message('purchase_request.in_quotation', 'Requisição em cotação', obj.request_number, *view))]
+    return []
+
+def _quotation_events(obj, is_new):
+    """Eventos de cotações"""
+    if is_new:
+        return []
+    status = _changed_to(obj)
+    request = obj.purchase_request
+    reference = request.request_number if request else f'#{obj.id}'
+    if status == 'RELEASED':
+        department_id = request.requester.department_id if request and request.requester else None
+        return [([f'department:{department_id}:MANAGER', 'role:ADMIN', f'user:{obj.purchaser_id}'],
+                 _message('quotation.released', 'Cotação liberada para aprovação', reference,
+                          'manager.view_quotation', {'quotation_id': obj.id}))]
+    if status == 'APPROVED':
+        return [(['role:PURCHASER', 'role:ADMIN'],
+                 _message('quotation.approved', 'Cotação aprovada', reference,
+                          'purchaser.view_quotation', {'quotation_id': obj.id}))]
+    return []
+
+def _purchase_order_events(obj, is_new):
+    """Eventos de pedidos de compra"""
+    if not is_new:
+        return []
+    return [(['role:PURCHASER', 'role:ADMIN'],
+             _message('purchase_order.created', 'Pedido de compra emitido', obj.order_number,
+                      'purchaser.view_purchase_order', {'order_id': obj.id}))]
+
+def _invoice_events(obj, is_new):
+    """Eventos de notas fiscais"""
+    if not is_new:
+        return []
+    return [(['role:FINANCE', 'role:ADMIN'],
+             _message('invoice.created', 'Nota fiscal informada', obj.invoice_number,
+                      'invoice.view', {'invoice_id': obj.id}))]
+
+def _payment_request_events(obj, is_new):
+    """Eventos de solicitações de pagamento"""
+    view = ('payment_request.view', {'request_id': obj.id})
+    if is_new:
+        order = obj.purchase_order
+        request = order.purchase_request if order else None
+        department_id = request.requester.department_id if request and request.requester else None
+        return [([f'department:{department_id}:MANAGER', 'role:FINANCE', 'role:ADMIN'],
+                 _message('payment_request.created', 'Pagamento aguardando liberação', obj.request_number, *view))]
+    if _changed_to(obj) == 'PAGO':
+        return [(['role:FINANCE', 'role:ADMIN', f'user:{obj.created_by}'],
+                 _message('payment_request.paid', 'Pagamento realizado', obj.request_number, *view))]
+    return []
+
+def _event_builders():
+    """Mapeia modelo -> função que gera os eventos"""
+    from app.models import PurchaseRequest, Quotation, PurchaseOrder, Invoice, PaymentRequest
+    return {
+        PurchaseRequest: _purchase_request_events,
+        Quotation: _quotation_events,
+        PurchaseOrder: _purchase_order_events,
+        Invoice: _invoice_events,
+        PaymentRequest: _payment_request_events,
+    }
+
+def _collect_events(session, flush_context):
+    """
+    Gera os eventos do flush (IDs já atribuídos, histórico ainda disponível)
+    
+    Os números gerados por trigger já foram devolvidos aos objetos no after_insert
+    do índice de documentos (document_lookup.load_generated_number)
+    """
+    if not _enabled:
+        return
+    builders = _event_builders()
+    pending = session.info.setdefault('live_update_events', [])
+    for objects, is_new in ((session.new, True), (session.dirty, False)):
+        for obj in objects:
+            builder = builders.get(type(obj))
+            if builder:
+                pending.extend(builder(obj, is_new))
+
+def _publish_after_commit(session):
+    """Publica os eventos da transação confirmada"""
+    events = session.info.pop('live_update_events', None)
+    for channels, message in events or ():
+        try:
+            _broker.publish(channels, message)
+        except Exception:
+            # Falha na notificação não pode afetar a transação já confirmada
+            pass
+
+def _discard_after_rollback(session):
+    """Descarta os eventos de uma transação desfeita"""
+    session.info.pop('live_update_events', None)
+
+# after_flush: session.new/dirty ainda refletem o flush e os IDs já existem
+event.listen(Session, 'after_flush', _collect_events)
+event.listen(Session, 'after_commit', _publish_after_commit)
+event.listen(Session, 'after_rollback', _discard_after_rollback)
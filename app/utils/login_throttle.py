@@ -0,0 +1,93 @@
+"""
+Limite de falhas de login por usuário e por IP (janela deslizante em memória)
+
+Tentativas bloqueadas não chegam a calcular o hash da senha, então uma rajada
+de força bruta não consome o pool de hash dos demais usuários. Só falhas
+contam: vários usuários atrás do mesmo NAT/proxy podem entrar normalmente.
+O IP é o do cliente informado pelo proxy reverso quando PROXY_FIX_X_FOR > 0.
+"""
+import threading
+import time
+from collections import deque
+
+# Padrões: falhas por usuário e por IP dentro da janela (segundos)
+DEFAULT_MAX_FAILURES_PER_USER = 5
+DEFAULT_MAX_FAILURES_PER_IP = 30
+DEFAULT_WINDOW = 300
+
+class SlidingWindowLimiter:
+    """Conta eventos por chave dentro de uma janela de tempo"""
+    
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._events = {}
+        self._lock = threading.Lock()
+    
+    def _prune(self, events, now):
+        while events and events[0] <= now - self.window:
+            events.popleft()
+    
+    def retry_after(self, key):
+        """Segundos até a chave sair do limite (0 = liberada)"""
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return 0
+            self._prune(events, now)
+            if len(events) < self.limit:
+                return 0
+            return int(events[0] + self.window - now) + 1
+    
+    def hit(self, key):
+        """Registra um evento para a chave"""
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.setdefault(key, deque())
+            self._prune(events, now)
+            events.append(now)
+            # Limpeza periódica das chaves sem eventos recentes
+            if len(self._events) > 10000:
+                for stale in [k for k, v in self._events.items() if not v or v[-1] <= now - self.window]:
+                    del self._events[stale]
+    
+    def reset(self, key):
+        """Remove os eventos da chave"""
+        with self._lock:
+            self._events.pop(key, None)
+
+# Limitadores ativos (configurados em init_login_throttle)
+_user_failures = SlidingWindowLimiter(DEFAULT_MAX_FAILURES_PER_USER, DEFAULT_WINDOW)
+_ip_failures = SlidingWindowLimiter(DEFAULT_MAX_FAILURES_PER_IP, DEFAULT_WINDOW)
+
+def init_login_throttle(app):
+    """Configura os limites a partir da configuração da aplicação"""
+    global _user_failures, _ip_failures
+    window = app.config.get('LOGIN_RATE_WINDOW', DEFAULT_WINDOW)
+    _user_failures = SlidingWindowLimiter(
+        app.config.get('LOGIN_MAX_FAILURES_PER_USER', DEFAULT_MAX_FAILURES_PER_USER), window
+    )
+    _ip_failures = SlidingWindowLimiter(
+        app.config.get('LOGIN_MAX_FAILURES_PER_IP', DEFAULT_MAX_FAILURES_PER_IP), window
+    )
+
+def _user_key(username):
+    return (username or '').strip().lower()
+
+def login_retry_after(username, ip):
+    """
+    Verifica se a tentativa de login pode prosseguir
+    
+    Returns:
+        0 se liberada, senão os segundos até a próxima tentativa
+    """
+    return max(_user_failures.retry_after(_user_key(username)), _ip_failures.retry_after(ip))
+
+def record_login_attempt(username, ip, success):
+    """Registra o resultado da tentativa (sucesso zera as falhas do usuário)"""
+    if success:
+        _user_failures.reset(_user_key(username))
+    else:
+        _user_failures.hit(_user_key(username))
+        _ip_failures.hit(ip)
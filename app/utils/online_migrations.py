@@ -0,0 +1,139 @@
+"""
+Helpers para migrações sem janela de manutenção (usados em migrations/versions)
+
+- Índices criados/removidos com CONCURRENTLY (fora de transação)
+- Preenchimento de colunas em lotes pequenos, com pausa entre os lotes
+- Constraints adicionadas como NOT VALID e validadas depois (sem bloquear escrita)
+- lock_timeout curto para que um DDL não fique enfileirado atrás de transações longas
+"""
+import time
+from contextlib import contextmanager
+from alembic import op
+from sqlalchemy import inspect, text
+
+# Tempo máximo esperando lock de DDL antes de desistir (a migração pode ser repetida)
+DEFAULT_LOCK_TIMEOUT = '5s'
+
+# Linhas atualizadas por lote e pausa entre lotes (segundos)
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_PAUSE = 0.1
+
+def has_table(table):
+    """Verifica se a tabela existe (bancos criados por db.create_all já podem tê-la)"""
+    return inspect(op.get_bind()).has_table(table)
+
+def has_column(table, column):
+    """Verifica se a coluna existe na tabela"""
+    return column in {c['name'] for c in inspect(op.get_bind()).get_columns(table)}
+
+def has_constraint(name):
+    """Verifica se existe uma constraint com o nome informado"""
+    return op.get_bind().execute(text(
+        'SELECT 1 FROM pg_constraint WHERE conname = :name'
+    ), {'name': name}).scalar() is not None
+
+@contextmanager
+def lock_timeout(timeout=DEFAULT_LOCK_TIMEOUT):
+    """Limita a espera por locks dos comandos DDL executados no bloco"""
+    op.execute(f"SET LOCAL lock_timeout = '{timeout}'")
+    yield
+    op.execute('SET LOCAL lock_timeout = DEFAULT')
+
+def create_index_concurrently(name, table, definition):
+    """
+    Cria um índice sem bloquear escrita na tabela
+    
+    Um índice inválido deixado por uma execução interrompida é removido e
+    recriado.
+    
+    Args:
+        name: Nome do índice
+        table: Tabela
+        definition: Colunas e predicado, ex.: "(created_at) WHERE status = 'PENDING'"
+    """
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        valid = bind.execute(text(
+            'SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name'
+        ), {'name': name}).scalar()
+        if valid is False:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}')
+
+def drop_index_concurrently(name):
+    """Remove um índice sem bloquear a tabela"""
+    with op.get_context().autocommit_block():
+        op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+def batched_backfill(table, assignments, condition, batch_size=DEFAULT_BATCH_SIZE,
+                     pause=DEFAULT_BATCH_PAUSE, key='id'):
+    """
+    Atualiza as linhas que atendem à condição em lotes, cada lote em sua própria transação
+    
+    Linhas bloqueadas por outras transações são puladas no lote e pegas
+    nos lotes seguintes.
+    
+    Args:
+        table: Tabela
+        assignments: Trecho SET, ex.: "unit = 'UN'"
+        condition: Condição das linhas pendentes, ex.: "unit IS NULL"
+        batch_size: Linhas por lote
+        pause: Pausa entre lotes (segundos) para não saturar I/O e réplicas
+        key: Coluna chave usada para selecionar o lote
+    
+    Returns:
+        Total de linhas atualizadas
+    """
+    statement = text(
+        f'UPDATE {table} SET {assignments} WHERE {key} IN ('
+        f'SELECT {key} FROM {table} WHERE {condition} LIMIT :batch_size FOR UPDATE SKIP LOCKED)'
+    )
+    total = 0
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            updated = bind.execute(statement, {'batch_size': batch_size}).rowcount
+            if not updated:
+                remaining = bind.execute(text(f'SELECT 1 FROM {table} WHERE {condition} LIMIT 1')).scalar()
+                if remaining is None:
+                    break
+            total += updated
+            time.sleep(pause)
+    return total
+
+def add_check_not_valid(table, name, condition):
+    """Adiciona uma CHECK constraint sem verificar as linhas existentes (lock breve)"""
+    if has_constraint(name):
+        return
+    with lock_timeout():
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} CHECK ({condition}) NOT VALID')
+
+def add_foreign_key_not_valid(name, table, column, ref_table, ref_column='id', ondelete=None):
+    """Adiciona uma FOREIGN KEY sem verificar as linhas existentes (lock breve)"""
+    if has_constraint(name):
+        return
+    on_delete = f' ON DELETE {ondelete}' if ondelete else ''
+    with lock_timeout():
+        op.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) '
+            f'REFERENCES {ref_table} ({ref_column}){on_delete} NOT VALID'
+        )
+
+def validate_constraint(table, name):
+    """Valida uma constraint NOT VALID (varre a tabela sem bloquear escrita)"""
+    with op.get_context().autocommit_block():
+        op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+def set_not_null(table, column):
+    """
+    Torna a coluna NOT NULL sem varrer a tabela sob lock exclusivo
+    
+    Usa uma CHECK (coluna IS NOT NULL) validada antes: a partir do
+    PostgreSQL 12 o SET NOT NULL aproveita a constraint e não relê a tabela.
+    """
+    name = f'ck_{table}_{column}_not_null'
+    add_check_not_valid(table, name, f'{column} IS NOT NULL')
+    validate_constraint(table, name)
+    with lock_timeout():
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
@@ -0,0 +1,164 @@
+"""
+Migração em massa de senhas (flask migrate-passwords)
+
+Percorre a tabela users em lotes por id (keyset), valida o formato de cada
+hash e redefine, em processos paralelos, as senhas de contas com hash vazio
+ou inválido. Cada lote é gravado em sua própria transação e o progresso fica
+em um arquivo de checkpoint, permitindo retomar a execução.
+
+Hashes válidos porém fora da política (bcrypt, custo antigo) não podem ser
+refeitos sem a senha: eles são apenas contados, e o login os atualiza.
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from sqlalchemy import and_, bindparam, select, update
+from app import db
+from app.models import User
+from app.utils.passwords import make_hash, get_hasher, identify
+
+BCRYPT_PATTERN = re.compile(r'^\$2[aby]\$(0[4-9]|[12][0-9]|3[01])\$[./A-Za-z0-9]{53}$')
+HEX_PATTERN = re.compile(r'^[0-9a-f]+$')
+
+# Tamanho da senha temporária gerada para contas com hash inválido
+TEMP_PASSWORD_BYTES = 12
+
+def _valid_werkzeug(password_hash):
+    """Confere método (pbkdf2:<digest>[:iterações] ou scrypt[:n:r:p]), salt e hash hexadecimal"""
+    parts = password_hash.split('$')
+    if len(parts) != 3 or not parts[1] or not HEX_PATTERN.match(parts[2]):
+        return False
+    method = parts[0].split(':')
+    if method[0] == 'pbkdf2':
+        if len(method) not in (2, 3) or method[1] not in hashlib.algorithms_available:
+            return False
+        return len(method) == 2 or method[2].isdigit()
+    if method[0] == 'scrypt':
+        return all(value.isdigit() for value in method[1:]) and len(method) in (1, 4)
+    return False
+
+def classify(password_hash, hasher=None):
+    """
+    Classifica o hash de uma conta
+    
+    Returns:
+        'ok' (política atual), 'outdated' (válido, será refeito no login) ou 'invalid'
+    """
+    hasher = hasher or get_hasher()
+    kind = identify(password_hash)
+    if kind == 'bcrypt':
+        return 'outdated' if BCRYPT_PATTERN.match(password_hash) else 'invalid'
+    if kind == 'werkzeug' and _valid_werkzeug(password_hash):
+        return 'outdated' if hasher.needs_rehash(password_hash) else 'ok'
+    return 'invalid'
+
+def load_checkpoint(path):
+    """Lê o checkpoint (último id processado e contadores) ou None"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_checkpoint(path, state):
+    """Grava o checkpoint de forma atômica (arquivo temporário + rename)"""
+    if not path:
+        return
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def _open_report(path):
+    """Abre o CSV de senhas temporárias (somente o dono pode ler)"""
+    is_new = not os.path.exists(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    f = os.fdopen(fd, 'a', newline='', encoding='utf-8')
+    writer = csv.writer(f)
+    if is_new:
+        writer.writerow(['username', 'temporary_password'])
+    return f, writer
+
+def migrate_passwords(batch_size=1000, workers=None, dry_run=False, checkpoint=None,
+                      resume=False, report_path='password_resets.csv', log=print):
+    """
+    Valida os hashes de todos os usuários e redefine as senhas das contas com hash inválido
+    
+    Args:
+        batch_size: Usuários por lote (uma transação por lote)
+        workers: Processos para gerar os hashes (padrão: do serviço de senhas)
+        dry_run: Apenas relata, sem gravar nada
+        checkpoint: Arquivo de progresso (None = sem checkpoint)
+        resume: Continua a partir do checkpoint
+        report_path: CSV com as senhas temporárias geradas
+        log: Função para mensagens de progresso
+    
+    Returns:
+        Dicionário com os contadores (ok, outdated, invalid, reset, skipped)
+    """
+    hasher = get_hasher()
+    state = {'last_id': 0, 'ok': 0, 'outdated': 0, 'invalid': 0, 'reset': 0, 'skipped': 0}
+    if resume:
+        state.update(load_checkpoint(checkpoint) or {})
+        log(f'Retomando a partir do usuário id > {state["last_id"]}')
+    
+    workers = workers or max(hasher.workers, 1)
+    users = User.__table__
+    # Só grava se o hash não mudou desde a leitura (usuário pode ter trocado a senha)
+    reset_statement = update(users).where(and_(
+        users.c.id == bindparam('user_id'),
+        users.c.password_hash == bindparam('old_hash')
+    )).values(password_hash=bindparam('new_hash'))
+    
+    report_file, report = (None, None) if dry_run else _open_report(report_path)
+    executor = None if dry_run else ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+    try:
+        while True:
+            rows = db.session.execute(
+                select(users.c.id, users.c.username, users.c.password_hash)
+                .where(users.c.id > state['last_id']).order_by(users.c.id).limit(batch_size)
+            ).all()
+            # Libera a transação de leitura antes de gerar os hashes
+            db.session.rollback()
+            if not rows:
+                break
+            
+            flagged = []
+            for row in rows:
+                status = classify(row.password_hash, hasher)
+                state[status] += 1
+                if status == 'invalid':
+                    flagged.append(row)
+                    if dry_run:
+                        log(f'  [inválido] {row.username}')
+            
+            if flagged and not dry_run:
+                passwords = [secrets.token_urlsafe(TEMP_PASSWORD_BYTES) for _ in flagged]
+                hashes = list(executor.map(make_hash, passwords, [hasher.method] * len(flagged)))
+                # Senhas registradas antes do commit: nenhuma conta fica com senha desconhecida
+                for row, password in zip(flagged, passwords):
+                    report.writerow([row.username, password])
+                report_file.flush()
+                result = db.session.execute(reset_statement, [
+                    {'user_id': row.id, 'old_hash': row.password_hash, 'new_hash': new_hash}
+                    for row, new_hash in zip(flagged, hashes)
+                ])
+                db.session.commit()
+                updated = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(flagged)
+                state['reset'] += updated
+                state['skipped'] += len(flagged) - updated
+            
+            state['last_id'] = rows[-1].id
+            if not dry_run:
+                save_checkpoint(checkpoint, state)
+            log(f'Lote até id {state["last_id"]}: {len(rows)} usuários, {len(flagged)} com hash inválido')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if report_file is not None:
+            report_file.close()
+    return state
@@ -0,0 +1,153 @@
+"""
+Serviço de hash de senhas
+
+As verificações e a geração de hashes (CPU intensivas) rodam em um pool de
+processos limitado, para não travar as demais requisições do worker quando
+muitos usuários fazem login ao mesmo tempo. Aceita hashes do werkzeug
+(pbkdf2/scrypt) e bcrypt; após um login bem-sucedido com hash fora da
+política atual (PASSWORD_HASH_METHOD), a senha é refeita no formato atual.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing import get_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Política padrão (mesmo padrão do werkzeug 2.3)
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:600000'
+
+# Tempo máximo aguardando uma vaga no pool ou o resultado (segundos)
+DEFAULT_HASH_TIMEOUT = 10
+
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+class HashingBusy(Exception):
+    """O pool de hash está saturado; a requisição deve ser repetida depois"""
+
+def identify(password_hash):
+    """Retorna o formato do hash: 'bcrypt', 'werkzeug' ou None (desconhecido/vazio)"""
+    if not password_hash:
+        return None
+    if password_hash.startswith(BCRYPT_PREFIXES):
+        return 'bcrypt'
+    if password_hash.count('$') >= 2 and password_hash.split('$', 1)[0].startswith(('pbkdf2:', 'scrypt')):
+        return 'werkzeug'
+    return None
+
+def _import_bcrypt():
+    """Importa o bcrypt sob demanda (dependência usada só por hashes legados)"""
+    try:
+        import bcrypt
+    except ImportError:
+        raise RuntimeError('Hashes bcrypt requerem o pacote "bcrypt" instalado')
+    return bcrypt
+
+# ==================== FUNÇÕES EXECUTADAS NO POOL ====================
+# Funções de módulo (precisam ser serializáveis para o ProcessPoolExecutor)
+
+def _verify(password_hash, password):
+    """Verifica a senha contra o hash (qualquer formato suportado)"""
+    kind = identify(password_hash)
+    if kind == 'bcrypt':
+        bcrypt = _import_bcrypt()
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    if kind == 'werkzeug':
+        return check_password_hash(password_hash, password)
+    return False
+
+def make_hash(password, method):
+    """Gera o hash no formato da política"""
+    return generate_password_hash(password, method=method)
+
+# ==================== SERVIÇO ====================
+
+class PasswordHasher:
+    """Executa hash/verificação em um pool de processos com fila limitada"""
+    
+    def __init__(self, method=DEFAULT_HASH_METHOD, workers=None, max_pending=None, timeout=DEFAULT_HASH_TIMEOUT):
+        self.method = method
+        if workers is None:
+            # Metade dos núcleos: o restante continua atendendo as demais requisições
+            workers = max((os.cpu_count() or 2) // 2, 1)
+        self.workers = workers
+        self.timeout = timeout
+        # Vagas = processos + fila; acima disso a requisição falha rápido (HashingBusy)
+        self._slots = threading.BoundedSemaphore(max_pending or max(self.workers, 1) * 4)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        """Pool criado sob demanda em cada processo (workers do gunicorn fazem fork)"""
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    # spawn: o processo pai tem threads (SSE, listener) e não deve ser copiado com fork
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+                    self._pid = os.getpid()
+        return self._executor
+    
+    def _run(self, fn, *args):
+        """Executa no pool (ou no próprio thread se workers=0)"""
+        if self.workers == 0:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusy()
+        try:
+            return self._get_executor().submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HashingBusy()
+        finally:
+            self._slots.release()
+    
+    def verify(self, password_hash, password):
+        """Verifica a senha (False para hash vazio ou de formato desconhecido)"""
+        if not password or identify(password_hash) is None:
+            return False
+        return self._run(_verify, password_hash, password)
+    
+    def hash(self, password):
+        """Gera o hash da senha na política atual"""
+        return self._run(make_hash, password, self.method)
+    
+    def needs_rehash(self, password_hash):
+        """Verifica se o hash está fora da política atual (bcrypt ou método/custo diferente)"""
+        if identify(password_hash) != 'werkzeug':
+            return True
+        return password_hash.split('$', 1)[0] != self.method
+    
+    def shutdown(self):
+        """Encerra o pool de processos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Serviço ativo (configurado em init_password_hasher)
+_hasher = PasswordHasher(workers=0)
+
+def init_password_hasher(app):
+    """Configura o serviço a partir da configuração da aplicação"""
+    global _hasher
+    _hasher.shutdown()
+    _hasher = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+        workers=app.config.get('PASSWORD_HASH_WORKERS'),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING'),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', DEFAULT_HASH_TIMEOUT)
+    )
+
+def get_hasher():
+    """Retorna o serviço ativo"""
+    return _hasher
+
+def hash_password(password):
+    """Gera o hash da senha na política atual"""
+    return _hasher.hash(password)
+
+def verify_password(password_hash, password):
+    """Verifica a senha contra o hash (werkzeug ou bcrypt)"""
+    return _hasher.verify(password_hash, password)
+
+def needs_rehash(password_hash):
+    """Verifica se o hash deve ser refeito na política atual"""
+    return _hasher.needs_rehash(password_hash)
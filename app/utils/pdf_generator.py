@@ -138,6 +138,14 @@ class PDFGenerator:
             ['Data da Requisição:', purchase_request.created_at.strftime('%d/%m/%Y')],
         ]
         
+        # Pedido consolidado: listar todas as requisições atendidas
+        source_requests = purchase_order.get_source_requests()
+        if len(source_requests) > 1:
+            request_data.append([
+                'Consolidadas:',
+                Paragraph(', '.join(r.request_number for r in source_requests), normal_style)
+            ])
+        
         request_table = Table(request_data, colWidths=[100, 350])
         request_table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
@@ -164,14 +172,20 @@ class PDFGenerator:
             ['SKU', 'Produto', 'Descrição', 'Qtd', 'Valor Unit.', 'Valor Total']
         ]
         
-        items_data.append([
-            product.sku,
-            product.product_name,
-            quotation_item.description or product.description or '',
-            str(quotation_item.quantity),
-            f"R$ {float(quotation_item.unit_value):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
-            f"R$ {float(quotation_item.total_value):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        ])
+        # Uma linha por item da requisição atendido pelo fornecedor
+        order_lines = purchase_order.get_order_lines()
+        for line in order_lines:
+            line_product = line.purchase_request_item.product if line.purchase_request_item else product
+            items_data.append([
+                line_product.sku,
+                line_product.product_name,
+                line.description or line_product.description or '',
+                str(line.quantity),
+                f"R$ {float(line.unit_value):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+                f"R$ {float(line.total_value):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            ])
+        
+        order_total = sum(float(line.total_value) for line in order_lines)
         
         items_table = Table(items_data, colWidths=[60, 120, 150, 40, 70, 80])
         items_table.setStyle(TableStyle([
@@ -196,7 +210,7 @@ class PDFGenerator:
         
         # Total
         total_data = [
-            ['VALOR TOTAL:', f"R$ {float(quotation_item.total_value):,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')]
+            ['VALOR TOTAL:', f"R$ {order_total:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')]
         ]
         
         total_table = Table(total_data, colWidths=[370, 150])
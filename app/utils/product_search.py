@@ -0,0 +1,299 @@
+"""
+Busca de produtos para autocomplete (SKU, nome e descrição)
+
+Em PostgreSQL com a extensão pg_trgm a busca é feita no banco (índices GIN
+de trigramas). Nos demais casos (SQLite, testes, banco sem a extensão) é
+usado um índice em memória com a mesma regra de ranking.
+"""
+import threading
+import time
+import unicodedata
+from sqlalchemy import case, func, literal, or_, text
+from app import db
+from app.models import Product
+
+# Limites de resultados do autocomplete
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+# Similaridade mínima (word_similarity) do índice em memória
+# (no PostgreSQL vale pg_trgm.word_similarity_threshold)
+MIN_SIMILARITY = 0.5
+
+# Intervalo (segundos) entre as verificações de versão do índice em memória:
+# produtos alterados em outro worker entram no índice após no máximo este tempo
+PRODUCT_INDEX_CHECK_INTERVAL = 30
+
+# Pesos do ranking (maior = mais relevante)
+RANK_SKU_EXACT = 100
+RANK_SKU_PREFIX = 80
+RANK_NAME_PREFIX = 60
+RANK_WORD_PREFIX = 40
+RANK_SUBSTRING = 20
+
+def normalize(value):
+    """Normaliza texto para busca (minúsculas, sem acentos)"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value))
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return value.lower().strip()
+
+def trigrams(value):
+    """Retorna o conjunto de trigramas de um texto (mesma regra do pg_trgm)"""
+    grams = set()
+    for word in normalize(value).split():
+        padded = f'  {word} '
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+def word_similarity(query_grams, text_grams):
+    """Fração dos trigramas do termo presentes no texto (equivalente ao word_similarity)"""
+    if not query_grams or not text_grams:
+        return 0.0
+    return len(query_grams & text_grams) / len(query_grams)
+
+class ProductSearchIndex:
+    """Índice de busca de produtos em memória"""
+    
+    def __init__(self):
+        self._entries = {}
+        self._trigram_map = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def add(self, product_id, sku, product_name, description=None, status='ATIVO', average_unit_value=None):
+        """Adiciona ou atualiza um produto no índice"""
+        with self._lock:
+            self._remove(product_id)
+            text_value = ' '.join(filter(None, [sku, product_name, description]))
+            entry = {
+                'id': product_id,
+                'sku': sku,
+                'product_name': product_name,
+                'status': status,
+                'average_unit_value': float(average_unit_value or 0),
+                'sku_norm': normalize(sku),
+                'name_norm': normalize(product_name),
+                'text_norm': normalize(text_value),
+                'grams': trigrams(text_value)
+            }
+            self._entries[product_id] = entry
+            for gram in entry['grams']:
+                self._trigram_map.setdefault(gram, set()).add(product_id)
+    
+    def remove(self, product_id):
+        """Remove um produto do índice"""
+        with self._lock:
+            self._remove(product_id)
+    
+    def _remove(self, product_id):
+        entry = self._entries.pop(product_id, None)
+        if entry:
+            for gram in entry['grams']:
+                ids = self._trigram_map.get(gram)
+                if ids:
+                    ids.discard(product_id)
+    
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT, include_inactive=False):
+        """
+        Busca produtos por prefixo e similaridade de trigramas
+        
+        Args:
+            query: Texto digitado pelo usuário
+            limit: Número máximo de resultados
+            include_inactive: Incluir produtos inativos
+        
+        Returns:
+            Lista de tuplas (score, entry) ordenada por relevância
+        """
+        term = normalize(query)
+        if not term:
+            return []
+        
+        query_grams = trigrams(term)
+        
+        # Candidatos: produtos que compartilham trigramas com o termo
+        with self._lock:
+            candidate_ids = set()
+            for gram in query_grams:
+                candidate_ids |= self._trigram_map.get(gram, set())
+            candidates = [self._entries[i] for i in candidate_ids if i in self._entries]
+        
+        results = []
+        for entry in candidates:
+            if not include_inactive and entry['status'] != 'ATIVO':
+                continue
+            score = self._score(entry, term, query_grams)
+            if score > 0:
+                results.append((score, entry))
+        
+        results.sort(key=lambda r: (-r[0], r[1]['name_norm']))
+        return results[:limit]
+    
+    @staticmethod
+    def _score(entry, term, query_grams):
+        """Calcula a relevância de um produto para o termo"""
+        if entry['sku_norm'] == term:
+            return RANK_SKU_EXACT
+        if entry['sku_norm'].startswith(term):
+            return RANK_SKU_PREFIX
+        if entry['name_norm'].startswith(term):
+            return RANK_NAME_PREFIX
+        if any(word.startswith(term) for word in entry['text_norm'].split()):
+            return RANK_WORD_PREFIX
+        if term in entry['text_norm']:
+            return RANK_SUBSTRING
+        sim = word_similarity(query_grams, entry['grams'])
+        return sim * RANK_SUBSTRING if sim >= MIN_SIMILARITY else 0
+
+# Índice em memória compartilhado pelo processo (carregado sob demanda)
+_memory_index = None
+_memory_index_version = None
+_memory_index_next_check = 0.0
+_memory_index_lock = threading.Lock()
+
+# Cache da detecção do pg_trgm por URL de banco
+_trgm_available = {}
+
+def _products_version():
+    """Versão da tabela de produtos: (quantidade, maior updated_at)"""
+    return tuple(db.session.query(func.count(Product.id), func.max(Product.updated_at)).one())
+
+def get_memory_index():
+    """
+    Retorna o índice em memória, carregando os produtos na primeira chamada
+    
+    A cada PRODUCT_INDEX_CHECK_INTERVAL segundos a versão da tabela é
+    comparada com a do índice; se outro worker alterou produtos, o índice
+    é recarregado.
+    """
+    global _memory_index, _memory_index_version, _memory_index_next_check
+    now = time.monotonic()
+    if _memory_index is not None and now < _memory_index_next_check:
+        return _memory_index
+    with _memory_index_lock:
+        if _memory_index is not None and now < _memory_index_next_check:
+            return _memory_index
+        version = _products_version()
+        if _memory_index is None or version != _memory_index_version:
+            index = ProductSearchIndex()
+            rows = db.session.query(
+                Product.id, Product.sku, Product.product_name, Product.description,
+                Product.status, Product.average_unit_value
+            ).yield_per(1000)
+            for row in rows:
+                index.add(row.id, row.sku, row.product_name, row.description,
+                          row.status, row.average_unit_value)
+            _memory_index = index
+            _memory_index_version = version
+        _memory_index_next_check = now + PRODUCT_INDEX_CHECK_INTERVAL
+    return _memory_index
+
+def invalidate_product_index(product=None):
+    """
+    Atualiza o índice em memória após criar/editar produtos
+    
+    Vale só para este processo; os demais workers percebem a alteração na
+    próxima verificação de versão (get_memory_index).
+    
+    Args:
+        product: Produto alterado (None descarta o índice inteiro)
+    """
+    global _memory_index
+    if _memory_index is None:
+        return
+    if product is None:
+        _memory_index = None
+    else:
+        _memory_index.add(product.id, product.sku, product.product_name, product.description,
+                          product.status, product.average_unit_value)
+
+def has_pg_trgm():
+    """Verifica (uma vez por banco) se o PostgreSQL possui a extensão pg_trgm"""
+    engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        return False
+    key = str(engine.url)
+    if key not in _trgm_available:
+        try:
+            _trgm_available[key] = db.session.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            ).scalar() is not None
+        except Exception:
+            db.session.rollback()
+            _trgm_available[key] = False
+    return _trgm_available[key]
+
+def _result(product_id, sku, product_name, average_unit_value, score):
+    """Monta o dicionário de resultado do autocomplete"""
+    return {
+        'id': product_id,
+        'sku': sku,
+        'product_name': product_name,
+        'average_unit_value': float(average_unit_value or 0),
+        'score': round(float(score), 4)
+    }
+
+def _search_pg_trgm(term, limit, include_inactive):
+    """Busca no PostgreSQL usando os índices GIN de trigramas (ILIKE e <%)"""
+    # Escapar curingas do LIKE digitados pelo usuário
+    pattern = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    prefix = f'{pattern}%'
+    contains = f'%{pattern}%'
+    name_similarity = func.word_similarity(term, Product.product_name)
+    score = case(
+        (func.lower(Product.sku) == term.lower(), RANK_SKU_EXACT),
+        (Product.sku.ilike(prefix, escape='\\'), RANK_SKU_PREFIX),
+        (Product.product_name.ilike(prefix, escape='\\'), RANK_NAME_PREFIX),
+        (Product.product_name.ilike(f'% {pattern}%', escape='\\'), RANK_WORD_PREFIX),
+        (or_(Product.product_name.ilike(contains, escape='\\'),
+             Product.description.ilike(contains, escape='\\')), RANK_SUBSTRING),
+        else_=name_similarity * RANK_SUBSTRING
+    ).label('score')
+    
+    query = db.session.query(
+        Product.id, Product.sku, Product.product_name, Product.average_unit_value, score
+    ).filter(
+        or_(
+            Product.sku.ilike(prefix, escape='\\'),
+            Product.product_name.ilike(contains, escape='\\'),
+            Product.description.ilike(contains, escape='\\'),
+            # term <% nome: word_similarity acima de pg_trgm.word_similarity_threshold
+            literal(term).op('<%')(Product.product_name)
+        )
+    )
+    if not include_inactive:
+        query = query.filter(Product.status == 'ATIVO')
+    
+    rows = query.order_by(score.desc(), Product.product_name).limit(limit).all()
+    return [_result(r.id, r.sku, r.product_name, r.average_unit_value, r.score) for r in rows]
+
+def search_products(query, limit=DEFAULT_SEARCH_LIMIT, include_inactive=False):
+    """
+    Busca produtos para o autocomplete
+    
+    Args:
+        query: Texto digitado (SKU, parte do nome ou da descrição)
+        limit: Número máximo de resultados (limitado a MAX_SEARCH_LIMIT)
+        include_inactive: Incluir produtos inativos
+    
+    Returns:
+        Lista de dicionários {id, sku, product_name, average_unit_value, score}
+        ordenada por relevância
+    """
+    term = (query or '').strip()
+    if not term:
+        return []
+    limit = max(1, min(int(limit or DEFAULT_SEARCH_LIMIT), MAX_SEARCH_LIMIT))
+    
+    if has_pg_trgm():
+        return _search_pg_trgm(term, limit, include_inactive)
+    
+    return [
+        _result(e['id'], e['sku'], e['product_name'], e['average_unit_value'], score)
+        for score, e in get_memory_index().search(term, limit, include_inactive)
+    ]
@@ -0,0 +1,94 @@
+"""
+Consultas de leitura para as páginas de lista
+
+Selecionam apenas as colunas exibidas (com joins no lugar de relacionamentos
+lazy) e retornam linhas leves com __slots__, sem identity map nem controle
+de alterações do ORM. Campos Text grandes (justificativa, observações) ficam
+de fora. Para editar um registro, carregue o modelo completo pelo id.
+
+Com stream=True as linhas são lidas do cursor em lotes (yield_per) durante a
+renderização do template (ver app.utils.streaming).
+"""
+from collections import namedtuple
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app import db
+from app.utils.streaming import StreamedRows, yield_per
+from app.models import User, Department, Product, PurchaseRequest, PurchaseOrder, QuotationItem
+
+class UserRow(namedtuple('UserRow', 'id username email role department_id department_name status last_login')):
+    """Linha da lista de usuários"""
+    __slots__ = ()
+
+class PurchaseRequestRow(namedtuple('PurchaseRequestRow',
+                                    'id request_number status quantity unit estimated_total created_at '
+                                    'product_name requester_name')):
+    """Linha da lista de requisições de compra"""
+    __slots__ = ()
+
+class PurchaseOrderRow(namedtuple('PurchaseOrderRow',
+                                  'id order_number status created_at request_number vendor_name '
+                                  'total_value purchaser_name')):
+    """Linha da lista de pedidos de compra"""
+    __slots__ = ()
+
+class QuotationItemRow(namedtuple('QuotationItemRow',
+                                  'id quotation_id description quantity unit_value total_value '
+                                  'is_selected created_at')):
+    """Linha do histórico de cotações de um fornecedor"""
+    __slots__ = ()
+
+def _rows(row_class, query, stream=False):
+    """Executa a consulta e converte cada linha na classe informada (lista ou StreamedRows)"""
+    if stream:
+        return StreamedRows(db.session.execute(query.execution_options(yield_per=yield_per())), row_class)
+    return [row_class(*row) for row in db.session.execute(query)]
+
+def list_users(stream=False):
+    """Lista de usuários com o nome do departamento (mais recentes primeiro)"""
+    query = select(
+        User.id, User.username, User.email, User.role, User.department_id,
+        Department.name, User.status, User.last_login
+    ).outerjoin(Department, User.department_id == Department.id).order_by(User.created_at.desc())
+    return _rows(UserRow, query, stream)
+
+def list_department_requests(department_id, stream=False):
+    """
+    Lista de requisições dos usuários de um departamento
+    
+    Args:
+        department_id: ID do departamento do gerente
+        stream: Ler as linhas sob demanda (render_listing)
+    
+    Returns:
+        Lista (ou StreamedRows) de PurchaseRequestRow, mais recentes primeiro
+    """
+    query = select(
+        PurchaseRequest.id, PurchaseRequest.request_number, PurchaseRequest.status,
+        PurchaseRequest.quantity, PurchaseRequest.unit, PurchaseRequest.estimated_total,
+        PurchaseRequest.created_at, Product.product_name, User.username
+    ).join(User, PurchaseRequest.user_id == User.id).outerjoin(
+        Product, PurchaseRequest.product_id == Product.id
+    ).where(User.department_id == department_id).order_by(PurchaseRequest.created_at.desc())
+    return _rows(PurchaseRequestRow, query, stream)
+
+def list_purchase_orders(stream=False):
+    """Lista de pedidos de compra com requisição, fornecedor e comprador (mais recentes primeiro)"""
+    purchaser = aliased(User)
+    query = select(
+        PurchaseOrder.id, PurchaseOrder.order_number, PurchaseOrder.status, PurchaseOrder.created_at,
+        PurchaseRequest.request_number, QuotationItem.vendor_name, QuotationItem.total_value,
+        purchaser.username
+    ).join(PurchaseRequest, PurchaseOrder.purchase_request_id == PurchaseRequest.id).join(
+        QuotationItem, PurchaseOrder.quotation_item_id == QuotationItem.id
+    ).outerjoin(purchaser, PurchaseOrder.purchaser_id == purchaser.id).order_by(PurchaseOrder.created_at.desc())
+    return _rows(PurchaseOrderRow, query, stream)
+
+def list_vendor_quotation_items(vendor_name, stream=False):
+    """Itens de cotação de um fornecedor (mais recentes primeiro)"""
+    query = select(
+        QuotationItem.id, QuotationItem.quotation_id, QuotationItem.description, QuotationItem.quantity,
+        QuotationItem.unit_value, QuotationItem.total_value, QuotationItem.is_selected,
+        QuotationItem.created_at
+    ).where(QuotationItem.vendor_name == vendor_name).order_by(QuotationItem.created_at.desc())
+    return _rows(QuotationItemRow, query, stream)
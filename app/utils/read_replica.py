@@ -0,0 +1,168 @@
+"""
+Roteamento de consultas somente leitura para a réplica do banco
+
+Views marcadas com @read_replica (dashboards, relatórios, exportações) leem da
+réplica do ambiente selecionado (BD_COMPRAS_<AMBIENTE>_RO). Escritas (flush)
+sempre vão para o primário. A réplica não é usada quando:
+    - o ambiente não tem réplica configurada
+    - o usuário fez uma escrita há menos de REPLICA_STICKY_SECONDS (read-your-writes)
+    - o atraso de replicação passa de REPLICA_MAX_LAG segundos (ou a réplica não responde)
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session as BaseSession
+
+# Padrões das configurações (segundos)
+DEFAULT_MAX_LAG = 5
+DEFAULT_STICKY_SECONDS = 15
+DEFAULT_LAG_CHECK_INTERVAL = 2
+
+# Chave na sessão do usuário com o fim do período de leitura no primário
+STICKY_SESSION_KEY = '_replica_sticky_until'
+
+# Atraso de replicação em segundos (0 quando a réplica já aplicou tudo que recebeu)
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class RoutingSession(Session):
+    """Sessão que envia as leituras da view para a réplica escolhida no request"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            replica = g.get('read_replica_engine')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+# Engines das réplicas (uma por URL) e último atraso medido: url -> (atraso, instante)
+_engines = {}
+_lag_cache = {}
+_lock = threading.Lock()
+
+def _current_environment():
+    """Ambiente selecionado na sessão"""
+    from app.utils.environment_context import current_environment
+    return current_environment()
+
+def _replica_url():
+    """URL da réplica do ambiente selecionado na sessão (None se não houver)"""
+    from environment_config import get_replica_url
+    return get_replica_url(_current_environment())
+
+def _get_engine(url, env_code=None):
+    """Retorna (criando na primeira vez) a engine da réplica, com o pool do ambiente"""
+    engine = _engines.get(url)
+    if engine is None:
+        from environment_config import get_engine_options
+        with _lock:
+            engine = _engines.get(url)
+            if engine is None:
+                options = get_engine_options(env_code or _current_environment())
+                engine = _engines[url] = create_engine(url, **options)
+    return engine
+
+def replica_engines():
+    """Engines de réplica já abertas neste processo (url -> engine)"""
+    return dict(_engines)
+
+def replication_lag(url):
+    """
+    Atraso da réplica em segundos, medido no máximo a cada REPLICA_LAG_CHECK_INTERVAL
+    
+    Returns:
+        Atraso em segundos ou None se a réplica não respondeu
+    """
+    interval = current_app.config.get('REPLICA_LAG_CHECK_INTERVAL', DEFAULT_LAG_CHECK_INTERVAL)
+    cached = _lag_cache.get(url)
+    if cached and time.monotonic() - cached[1] < interval:
+        return cached[0]
+    try:
+        with _get_engine(url).connect() as connection:
+            lag = float(connection.execute(LAG_QUERY).scalar() or 0)
+    except Exception:
+        lag = None
+    _lag_cache[url] = (lag, time.monotonic())
+    return lag
+
+def _is_sticky():
+    """O usuário escreveu recentemente e deve continuar lendo do primário"""
+    return session.get(STICKY_SESSION_KEY, 0) > time.time()
+
+def replica_engine():
+    """Retorna a engine da réplica a usar neste request ou None (primário)"""
+    url = _replica_url()
+    if not url or _is_sticky():
+        return None
+    lag = replication_lag(url)
+    if lag is None or lag > current_app.config.get('REPLICA_MAX_LAG', DEFAULT_MAX_LAG):
+        return None
+    return _get_engine(url)
+
+def read_replica(f):
+    """
+    Decorator para views somente leitura que podem ser atendidas pela réplica
+    
+    Deve ficar abaixo de @login_required (o usuário é carregado do primário).
+    
+    Usage:
+        @read_replica
+        def reports():
+            pass
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.read_replica_engine = replica_engine()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.pop('read_replica_engine', None)
+    return decorated_function
+
+@contextmanager
+def use_primary():
+    """Executa as consultas do bloco no primário, mesmo dentro de uma view @read_replica"""
+    engine = g.pop('read_replica_engine', None) if has_app_context() else None
+    try:
+        yield
+    finally:
+        if engine is not None:
+            g.read_replica_engine = engine
+
+# ==================== READ-YOUR-WRITES ====================
+
+def _flag_write(session_, flush_context):
+    """Marca a transação como de escrita (houve flush)"""
+    session_.info['replica_wrote'] = True
+
+def _mark_write(session_):
+    """Registra no request que houve commit com escrita (a resposta fixa o usuário no primário)"""
+    if session_.info.pop('replica_wrote', False) and has_request_context():
+        g.replica_sticky = True
+
+def _discard_write(session_):
+    """Escrita desfeita: não fixa o usuário no primário"""
+    session_.info.pop('replica_wrote', None)
+
+def init_read_replica(app):
+    """Registra o after_request que fixa no primário o usuário que acabou de escrever"""
+    @app.after_request
+    def stick_to_primary(response):
+        if g.get('replica_sticky'):
+            seconds = app.config.get('REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+            # Segundos inteiros: registro de sessão menor
+            session[STICKY_SESSION_KEY] = int(time.time()) + seconds + 1
+        return response
+
+event.listen(BaseSession, 'after_flush', _flag_write)
+event.listen(BaseSession, 'after_commit', _mark_write)
+event.listen(BaseSession, 'after_rollback', _discard_write)
@@ -0,0 +1,76 @@
+"""
+Leitura das linhas de requisição enviadas pelos formulários
+"""
+from app.models import Product
+
+def parse_request_lines(form):
+    """
+    Lê as linhas (produto, quantidade, unidade) de um formulário multi-linha
+    
+    Os campos são enviados como listas: product_id, quantity e unit
+    (uma posição por linha). Linhas sem produto são ignoradas.
+    
+    Args:
+        form: request.form
+    
+    Returns:
+        Lista de tuplas (Product, quantidade, unidade)
+    
+    Raises:
+        ValueError: se alguma linha for inválida ou nenhuma linha for informada
+    """
+    product_ids = form.getlist('product_id')
+    quantities = form.getlist('quantity')
+    units = form.getlist('unit')
+    
+    # Validar os IDs antes de consultar (campo alterado no navegador, por exemplo)
+    ids = {}
+    for index, product_id in enumerate(product_ids):
+        if not product_id:
+            continue
+        try:
+            ids[index] = int(product_id)
+        except ValueError:
+            raise ValueError(f'Produto da linha {index + 1} inválido.')
+    
+    # Carregar todos os produtos das linhas em uma única consulta
+    products = {p.id: p for p in Product.query.filter(Product.id.in_(set(ids.values()))).all()} if ids else {}
+    
+    lines = []
+    for index, product_id in ids.items():
+        product = products.get(product_id)
+        if not product:
+            raise ValueError(f'Produto da linha {index + 1} não encontrado.')
+        
+        try:
+            quantity = int(quantities[index])
+            if quantity <= 0:
+                raise ValueError()
+        except (IndexError, ValueError):
+            raise ValueError(f'Quantidade da linha {index + 1} deve ser um número inteiro positivo.')
+        
+        unit = units[index] if index < len(units) and units[index] else 'UN'
+        lines.append((product, quantity, unit))
+    
+    if not lines:
+        raise ValueError('Informe pelo menos um produto.')
+    
+    return lines
+
+def parse_approved_item_ids(form):
+    """
+    Lê os itens marcados na aprovação por linha
+    
+    Formulários com seleção por linha enviam o campo oculto line_selection;
+    nesse caso nenhum item marcado significa nenhum item aprovado.
+    
+    Args:
+        form: request.form
+    
+    Returns:
+        Conjunto de IDs dos itens aprovados, ou None (aprovar todos) quando
+        o formulário não tem seleção por linha
+    """
+    if not form.get('line_selection'):
+        return None
+    return set(form.getlist('item_ids', type=int))
@@ -0,0 +1,303 @@
+"""
+Sessão no servidor (opcional)
+
+Com SESSION_BACKEND diferente de 'cookie', o cookie do navegador leva apenas
+o id da sessão assinado; o conteúdo (ambiente selecionado, mensagens flash,
+estado do Flask-Login) fica em um registro compacto no servidor:
+    - 'file': um arquivo por sessão (desenvolvimento, um servidor)
+    - 'sqlite': tabela em um arquivo SQLite (vários workers no mesmo servidor)
+    - 'redis': compartilhado entre servidores (requer o pacote redis)
+
+O registro só é regravado quando a sessão muda, e o id é trocado quando o
+usuário da sessão muda (login/logout), evitando fixação de sessão.
+"""
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+# Nomes curtos das chaves mais comuns no registro gravado
+KEY_ALIASES = {
+    '_user_id': 'u',
+    '_fresh': 'f',
+    '_id': 'i',
+    '_remember': 'r',
+    '_flashes': 'm',
+    'selected_environment': 'e',
+    '_replica_sticky_until': 's'
+}
+KEY_NAMES = {alias: key for key, alias in KEY_ALIASES.items()}
+
+# Chaves sem alias ganham este prefixo (não colidem com os aliases de uma letra)
+PLAIN_KEY_PREFIX = '.'
+
+_serializer = TaggedJSONSerializer()
+
+def pack(data):
+    """Serializa a sessão no formato compacto (aliases + JSON sem espaços)"""
+    return _serializer.dumps({
+        KEY_ALIASES.get(key, PLAIN_KEY_PREFIX + key): value for key, value in data.items()
+    })
+
+def unpack(payload):
+    """Reconstrói o dicionário da sessão a partir do registro compacto"""
+    return {
+        KEY_NAMES.get(key, key[len(PLAIN_KEY_PREFIX):]): value
+        for key, value in _serializer.loads(payload).items()
+    }
+
+# ==================== ARMAZENAMENTO ====================
+
+class SessionStore:
+    """Interface dos armazenamentos de sessão"""
+    
+    def get(self, sid):
+        """Retorna o registro da sessão ou None (inexistente ou expirado)"""
+        raise NotImplementedError
+    
+    def set(self, sid, payload, ttl):
+        """Grava o registro com tempo de vida em segundos"""
+        raise NotImplementedError
+    
+    def delete(self, sid):
+        """Remove a sessão"""
+        raise NotImplementedError
+    
+    def purge(self):
+        """Remove as sessões expiradas e retorna quantas foram removidas"""
+        return 0
+
+class FileSessionStore(SessionStore):
+    """Um arquivo por sessão: primeira linha com o instante de expiração, depois o registro"""
+    
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, mode=0o700, exist_ok=True)
+    
+    def _file(self, sid):
+        return os.path.join(self.path, sid)
+    
+    def _read(self, file_path):
+        """Retorna (expiração, registro) ou None se o arquivo não existir"""
+        try:
+            with open(file_path, encoding='utf-8') as f:
+                expires_at = float(f.readline())
+                return expires_at, f.read()
+        except (OSError, ValueError):
+            return None
+    
+    def get(self, sid):
+        entry = self._read(self._file(sid))
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+    
+    def set(self, sid, payload, ttl):
+        file_path = self._file(sid)
+        tmp_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(f'{time.time() + ttl:.0f}\n{payload}')
+        os.replace(tmp_path, file_path)
+    
+    def delete(self, sid):
+        try:
+            os.remove(self._file(sid))
+        except FileNotFoundError:
+            pass
+    
+    def purge(self):
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.path):
+            if name.endswith('.tmp'):
+                continue
+            entry = self._read(self._file(name))
+            if entry is not None and entry[0] <= now:
+                self.delete(name)
+                removed += 1
+        return removed
+
+class SQLiteSessionStore(SessionStore):
+    """Sessões em uma tabela SQLite (uma conexão por thread, modo WAL)"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'sid TEXT PRIMARY KEY, expires_at INTEGER NOT NULL, payload TEXT NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)')
+    
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+    
+    def get(self, sid):
+        row = self._connection().execute(
+            'SELECT payload FROM sessions WHERE sid = ? AND expires_at > ?', (sid, int(time.time()))
+        ).fetchone()
+        return row[0] if row else None
+    
+    def set(self, sid, payload, ttl):
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO sessions (sid, expires_at, payload) VALUES (?, ?, ?)',
+                (sid, int(time.time() + ttl), payload)
+            )
+    
+    def delete(self, sid):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+    
+    def purge(self):
+        with self._connection() as connection:
+            return connection.execute('DELETE FROM sessions WHERE expires_at <= ?', (int(time.time()),)).rowcount
+
+class RedisSessionStore(SessionStore):
+    """Sessões compartilhadas em Redis (a expiração fica a cargo do próprio Redis)"""
+    
+    def __init__(self, url, prefix='session:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('SESSION_BACKEND=redis requer o pacote "redis" instalado')
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+    
+    def get(self, sid):
+        raw = self._client.get(self.prefix + sid)
+        return raw.decode('utf-8') if raw is not None else None
+    
+    def set(self, sid, payload, ttl):
+        self._client.set(self.prefix + sid, payload, ex=max(int(ttl), 1))
+    
+    def delete(self, sid):
+        self._client.delete(self.prefix + sid)
+
+# ==================== INTERFACE DO FLASK ====================
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Sessão cujo conteúdo fica no servidor; o cookie leva só o id"""
+    
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        # Usuário ao abrir a sessão (se mudar, o id é trocado ao salvar)
+        self.initial_user = self.get('_user_id')
+
+class ServerSessionInterface(SessionInterface):
+    """Grava a sessão no armazenamento configurado e envia o id assinado no cookie"""
+    
+    salt = 'server-session'
+    
+    def __init__(self, store):
+        self.store = store
+    
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt, key_derivation='hmac')
+    
+    def _new_session(self):
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+    
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return self._new_session()
+        try:
+            sid = self._signer(app).unsign(cookie).decode('utf-8')
+        except BadSignature:
+            return self._new_session()
+        payload = self.store.get(sid)
+        if payload is None:
+            # Sessão expirada ou removida: novo id em vez de reaproveitar o antigo
+            return self._new_session()
+        try:
+            return ServerSession(unpack(payload), sid=sid)
+        except ValueError:
+            return self._new_session()
+    
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+        
+        if session.accessed:
+            response.vary.add('Cookie')
+        
+        # Sessão esvaziada (logout): remove o registro e o cookie
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+        
+        if session.get('_user_id') != session.initial_user and not session.new:
+            self.store.delete(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+            session.modified = True
+        
+        if not self.should_set_cookie(app, session):
+            return
+        
+        ttl = app.permanent_session_lifetime.total_seconds()
+        self.store.set(session.sid, pack(dict(session)), ttl)
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode('utf-8'),
+            expires=self.get_expiration_time(app, session),
+            httponly=httponly,
+            domain=domain,
+            path=path,
+            secure=secure,
+            samesite=samesite
+        )
+
+# Armazenamento ativo (None = sessão padrão do Flask em cookie assinado)
+_store = None
+
+def init_server_session(app):
+    """Configura a sessão a partir da configuração da aplicação (SESSION_BACKEND)"""
+    global _store
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    path = app.config.get('SESSION_STORE_PATH')
+    if backend == 'cookie':
+        _store = None
+        return
+    if backend == 'file':
+        _store = FileSessionStore(path or os.path.join(app.instance_path, 'sessions'))
+    elif backend == 'sqlite':
+        _store = SQLiteSessionStore(path or os.path.join(app.instance_path, 'sessions.sqlite3'))
+    elif backend == 'redis':
+        _store = RedisSessionStore(app.config['SESSION_STORE_URL'])
+    else:
+        raise ValueError(f'SESSION_BACKEND inválido: {backend}')
+    app.session_interface = ServerSessionInterface(_store)
+
+def purge_expired_sessions():
+    """Remove as sessões expiradas do armazenamento ativo (0 com sessão em cookie)"""
+    return _store.purge() if _store is not None else 0
@@ -0,0 +1,221 @@
+"""
+Cache das estatísticas dos dashboards por escopo (global, departamento, usuário)
+
+Os valores são calculados sob demanda e invalidados após o commit de qualquer
+transação que crie, remova ou altere o status de um modelo relevante. O cálculo
+roda sempre no primário: uma réplica atrasada gravaria no cache, por um TTL
+inteiro, números anteriores ao commit que acabou de invalidá-lo.
+O backend é configurável (DASHBOARD_CACHE_BACKEND): 'memory' (padrão, por
+processo) ou 'redis' (compartilhado entre workers).
+"""
+import pickle
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.utils.read_replica import use_primary
+
+# Prefixo de todas as chaves do cache
+KEY_PREFIX = 'dashboard'
+
+# Conjuntos de estatísticas gravados em cada escopo (name de get_cached_stats)
+STATS_NAMES = ('stats',)
+
+# Tempo de vida padrão (segundos) - rede de segurança caso algum evento não seja capturado
+DEFAULT_CACHE_TTL = 300
+
+class CacheBackend:
+    """Interface dos backends de cache"""
+    
+    def get(self, key):
+        """Retorna o valor da chave ou None"""
+        raise NotImplementedError
+    
+    def set(self, key, value, ttl):
+        """Grava o valor com tempo de vida em segundos"""
+        raise NotImplementedError
+    
+    def delete(self, *keys):
+        """Remove as chaves informadas"""
+        raise NotImplementedError
+    
+    def delete_prefix(self, prefix):
+        """Remove todas as chaves que começam com o prefixo"""
+        raise NotImplementedError
+    
+    def clear(self):
+        """Remove todas as chaves do cache"""
+        self.delete_prefix(KEY_PREFIX)
+
+class MemoryCacheBackend(CacheBackend):
+    """Cache em memória do processo (dict protegido por lock)"""
+    
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+    
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+    
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+    
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+class RedisCacheBackend(CacheBackend):
+    """Cache compartilhado em Redis (requer o pacote redis)"""
+    
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('DASHBOARD_CACHE_BACKEND=redis requer o pacote "redis" instalado')
+        self._client = redis.Redis.from_url(url)
+    
+    def get(self, key):
+        raw = self._client.get(key)
+        return pickle.loads(raw) if raw is not None else None
+    
+    def set(self, key, value, ttl):
+        self._client.set(key, pickle.dumps(value), ex=int(ttl))
+    
+    def delete(self, *keys):
+        if keys:
+            self._client.delete(*keys)
+    
+    def delete_prefix(self, prefix):
+        batch = []
+        for key in self._client.scan_iter(match=f'{prefix}*', count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                self._client.delete(*batch)
+                batch = []
+        if batch:
+            self._client.delete(*batch)
+
+# Backend ativo e TTL (configurados em init_stats_cache)
+_backend = MemoryCacheBackend()
+_cache_ttl = DEFAULT_CACHE_TTL
+
+def init_stats_cache(app):
+    """Configura o backend do cache a partir da configuração da aplicação"""
+    global _backend, _cache_ttl
+    backend = app.config.get('DASHBOARD_CACHE_BACKEND', 'memory')
+    if backend == 'redis':
+        _backend = RedisCacheBackend(app.config['DASHBOARD_CACHE_URL'])
+    elif backend == 'memory':
+        _backend = MemoryCacheBackend()
+    else:
+        raise ValueError(f'DASHBOARD_CACHE_BACKEND inválido: {backend}')
+    _cache_ttl = app.config.get('DASHBOARD_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+def get_backend():
+    """Retorna o backend ativo"""
+    return _backend
+
+def cache_key(scope, scope_id=None, name='stats'):
+    """Monta a chave do cache: dashboard:<escopo>[:<id>]:<nome>"""
+    if scope_id is None:
+        return f'{KEY_PREFIX}:{scope}:{name}'
+    return f'{KEY_PREFIX}:{scope}:{scope_id}:{name}'
+
+def get_cached_stats(scope, scope_id, loader, name='stats'):
+    """
+    Retorna as estatísticas do escopo, calculando com loader() se não estiverem em cache
+    
+    Args:
+        scope: 'global', 'department' ou 'user'
+        scope_id: ID do departamento/usuário (None para global)
+        loader: Função sem argumentos que calcula o dicionário de estatísticas
+        name: Nome do conjunto de estatísticas dentro do escopo
+    
+    Returns:
+        Dicionário com as estatísticas
+    """
+    key = cache_key(scope, scope_id, name)
+    stats = _backend.get(key)
+    if stats is None:
+        with use_primary():
+            stats = loader()
+        _backend.set(key, stats, _cache_ttl)
+    return stats
+
+def invalidate_scope(scope, scope_id=None):
+    """Invalida as estatísticas de um escopo (chaves exatas, sem varrer o cache)"""
+    _backend.delete(*[cache_key(scope, scope_id, name) for name in STATS_NAMES])
+
+# ==================== INVALIDAÇÃO POR EVENTOS ====================
+
+def _status_changed(obj, attributes):
+    """Verifica se algum dos atributos do objeto foi alterado no flush"""
+    state = inspect(obj)
+    return any(name in state.attrs and state.attrs[name].history.has_changes() for name in attributes)
+
+def _department_ids(obj):
+    """IDs de departamento do usuário antes e depois do flush (troca de departamento afeta os dois)"""
+    history = inspect(obj).attrs.department_id.history
+    values = set(history.added) | set(history.deleted) | set(history.unchanged)
+    return values - {None}
+
+def _scopes_for(session, obj):
+    """Retorna os escopos afetados por um objeto (lista de (escopo, id))"""
+    from app.models import User, Department, Product, PurchaseRequest
+    
+    if isinstance(obj, PurchaseRequest):
+        # Solicitante normalmente já está no identity map (usuário logado): sem consulta
+        with session.no_autoflush:
+            requester = session.get(User, obj.user_id) if obj.user_id else None
+        scopes = [('global', None), ('user', obj.user_id)]
+        if requester is not None and requester.department_id is not None:
+            scopes.append(('department', requester.department_id))
+        return scopes
+    if isinstance(obj, User):
+        return [('global', None)] + [('department', d) for d in _department_ids(obj)]
+    if isinstance(obj, (Department, Product)):
+        return [('global', None)]
+    return []
+
+# Atributos cuja alteração invalida o cache (além de inserts e deletes)
+TRACKED_ATTRIBUTES = ('status', 'department_id', 'auto_approved', 'estimated_total')
+
+def _collect_dirty_scopes(session, flush_context, instances):
+    """Acumula em session.info os escopos afetados pelo flush"""
+    scopes = session.info.setdefault('dashboard_dirty_scopes', set())
+    for obj in session.new:
+        scopes.update(_scopes_for(session, obj))
+    for obj in session.deleted:
+        scopes.update(_scopes_for(session, obj))
+    for obj in session.dirty:
+        if _status_changed(obj, TRACKED_ATTRIBUTES):
+            scopes.update(_scopes_for(session, obj))
+
+def _invalidate_after_commit(session):
+    """Invalida os escopos afetados depois que a transação foi confirmada"""
+    scopes = session.info.pop('dashboard_dirty_scopes', None)
+    for scope, scope_id in scopes or ():
+        invalidate_scope(scope, scope_id)
+
+def _discard_after_rollback(session):
+    """Descarta os escopos acumulados de uma transação desfeita"""
+    session.info.pop('dashboard_dirty_scopes', None)
+
+event.listen(Session, 'before_flush', _collect_dirty_scopes)
+event.listen(Session, 'after_commit', _invalidate_after_commit)
+event.listen(Session, 'after_rollback', _discard_after_rollback)
@@ -0,0 +1,111 @@
+"""
+Renderização em streaming das páginas de lista
+
+O HTML é enviado em blocos à medida que o template é renderizado e as linhas
+são lidas do banco em lotes (yield_per), então o navegador começa a desenhar a
+página imediatamente e a memória do worker não cresce com o tamanho da lista.
+Controlado por STREAM_LISTINGS (desligado = render_template normal).
+"""
+from flask import current_app, render_template, session, stream_template
+from flask_login import current_user
+from app.utils.inbox import current_inbox_count
+
+# Linhas lidas do cursor por vez
+DEFAULT_YIELD_PER = 500
+
+# Tamanho mínimo (caracteres) de cada bloco enviado ao cliente
+STREAM_BUFFER_SIZE = 8192
+
+class StreamedRows:
+    """
+    Iterável de linhas lido sob demanda, com suporte a {% if rows %} no template
+    
+    O primeiro elemento é lido antecipadamente para responder ao teste de
+    verdade sem consumir o restante. Só pode ser percorrido uma vez.
+    """
+    
+    def __init__(self, iterable, row_class=None):
+        self._iterator = iter(iterable)
+        self._row_class = row_class
+        self._head = []
+    
+    def _next(self):
+        row = next(self._iterator)
+        return self._row_class(*row) if self._row_class else row
+    
+    def __bool__(self):
+        if not self._head:
+            try:
+                self._head.append(self._next())
+            except StopIteration:
+                return False
+        return True
+    
+    def __iter__(self):
+        while self._head:
+            yield self._head.pop()
+        while True:
+            try:
+                yield self._next()
+            except StopIteration:
+                return
+
+def yield_per():
+    """Tamanho do lote de leitura configurado"""
+    return current_app.config.get('STREAM_YIELD_PER', DEFAULT_YIELD_PER)
+
+def streaming_enabled():
+    """Verifica se as listas devem ser renderizadas em streaming"""
+    return current_app.config.get('STREAM_LISTINGS', True)
+
+def _buffered(chunks, size=STREAM_BUFFER_SIZE):
+    """Agrupa os pedaços gerados pelo Jinja em blocos de pelo menos `size` caracteres"""
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+def _preload_layout():
+    """
+    Carrega antes do stream os dados da navbar (usuário, departamento, caixa de entrada)
+    
+    O corpo é gerado depois que a view retorna; ler relacionamentos lazy do
+    usuário nesse momento depende de a sessão do banco ainda estar aberta.
+    """
+    if current_user.is_authenticated:
+        user = current_user._get_current_object()
+        user.department
+        current_inbox_count()
+
+def render_listing(template_name, **context):
+    """
+    Renderiza uma página de lista em streaming (ou de uma vez, se desligado)
+    
+    Erros devem ser tratados antes: depois que o primeiro bloco é enviado
+    não é mais possível redirecionar nem mudar o status. Com mensagens flash
+    pendentes a página é renderizada de uma vez, porque o cookie de sessão
+    (que registra que as mensagens foram exibidas) é gravado antes do corpo.
+    
+    Args:
+        template_name: Template da página
+        **context: Variáveis do template (listas podem ser StreamedRows)
+    
+    Returns:
+        Response com o HTML
+    """
+    if not streaming_enabled() or session.get('_flashes'):
+        return render_template(template_name, **context)
+    _preload_layout()
+    # stream_template mantém o contexto do request até o fim do stream (Flask < 3.1,
+    # ver requirements.txt): as linhas continuam sendo lidas pela sessão da view
+    return current_app.response_class(
+        _buffered(stream_template(template_name, **context)),
+        mimetype='text/html'
+    )
@@ -0,0 +1,47 @@
+"""
+Cache de bytecode dos templates Jinja
+
+Os templates compilados são gravados em disco (TEMPLATE_CACHE_DIR) e
+reaproveitados por todos os workers: um worker novo carrega o bytecode em
+vez de compilar o template no primeiro acesso. O comando
+`flask templates compile` pré-compila todos os templates no deploy.
+
+A chave do cache inclui o caminho absoluto do template e o checksum do
+fonte; a pré-compilação deve rodar no mesmo diretório em que a aplicação
+será executada, e um template alterado é recompilado automaticamente.
+"""
+import os
+from jinja2 import FileSystemBytecodeCache, TemplateSyntaxError
+
+def init_template_cache(app):
+    """Configura o cache de bytecode (deve rodar antes do primeiro uso de app.jinja_env)"""
+    if not app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        return
+    cache_dir = app.config.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(cache_dir)}
+
+def compile_templates(app):
+    """
+    Compila todos os templates da aplicação e dos blueprints, gravando o bytecode
+    
+    Returns:
+        Tupla (quantidade compilada, lista de (template, erro))
+    """
+    env = app.jinja_env
+    compiled = 0
+    errors = []
+    with app.app_context():
+        for name in sorted(set(env.list_templates())):
+            try:
+                env.get_template(name)
+                compiled += 1
+            except TemplateSyntaxError as e:
+                errors.append((name, f'linha {e.lineno}: {e.message}'))
+    return compiled, errors
+
+def clear_template_cache(app):
+    """Remove o bytecode gravado (ex.: após atualizar o Jinja)"""
+    cache = app.jinja_env.bytecode_cache
+    if cache is not None:
+        cache.clear()
@@ -0,0 +1,185 @@
+"""
+Miniaturas dos anexos de notas fiscais
+
+A geração (rasterizar a 1ª página do PDF, reduzir imagens) roda em um pool
+de processos, fora do request: o upload responde assim que o arquivo é
+gravado e a miniatura é registrada quando fica pronta. Se o pool estiver
+cheio (fechamento do mês), o anexo fica com a miniatura pendente e
+`flask documents thumbnails` a gera depois.
+
+PDFs usam o pdftoppm (poppler-utils) e imagens o Pillow; sem eles o anexo
+fica sem prévia.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait as futures_wait
+from multiprocessing import get_context
+
+# Tamanho máximo da miniatura (pixels)
+DEFAULT_THUMBNAIL_SIZE = 320
+
+# Tempo máximo do pdftoppm por arquivo (segundos)
+PDF_RENDER_TIMEOUT = 60
+
+# ==================== FUNÇÕES EXECUTADAS NO POOL ====================
+
+def render_thumbnail(source_path, content_type, target_path, size):
+    """
+    Gera a miniatura PNG do arquivo
+    
+    Returns:
+        True se gerou; False se não há ferramenta para o formato
+    """
+    if content_type == 'application/pdf':
+        if shutil.which('pdftoppm') is None:
+            return False
+        # pdftoppm grava <prefixo>.png com -singlefile
+        subprocess.run([
+            'pdftoppm', '-png', '-singlefile', '-f', '1', '-l', '1', '-scale-to', str(size),
+            source_path, os.path.splitext(target_path)[0]
+        ], check=True, capture_output=True, timeout=PDF_RENDER_TIMEOUT)
+        return True
+    try:
+        from PIL import Image
+    except ImportError:
+        return False
+    with Image.open(source_path) as image:
+        # draft: JPEGs grandes são decodificados já reduzidos
+        image.draft('RGB', (size, size))
+        image.thumbnail((size, size))
+        image.save(target_path, 'PNG', optimize=True)
+    return True
+
+# ==================== SERVIÇO ====================
+
+class ThumbnailService:
+    """Envia a geração de miniaturas para um pool de processos com fila limitada"""
+    
+    def __init__(self, app, workers=2, max_pending=None, size=DEFAULT_THUMBNAIL_SIZE):
+        self.app = app
+        self.workers = workers
+        self.size = size
+        self._slots = threading.BoundedSemaphore(max_pending or max(workers, 1) * 8)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        """Pool criado sob demanda em cada processo (workers do gunicorn fazem fork)"""
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    # spawn: o processo pai tem threads (SSE, listener) e não deve ser copiado com fork
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+                    self._pid = os.getpid()
+        return self._executor
+    
+    def submit(self, attachment, wait=False):
+        """
+        Agenda a miniatura do anexo (chamar depois do commit)
+        
+        Args:
+            attachment: InvoiceAttachment já gravado
+            wait: Aguarda a conclusão (comando de reprocessamento)
+        
+        Returns:
+            False se o pool estava cheio (a miniatura continua pendente)
+        """
+        from app.utils.document_store import get_document_store
+        store = get_document_store()
+        source_path = store.local_path(attachment.file)
+        if source_path is None:
+            self._finish(attachment.id, None, 'NONE')
+            return True
+        if not self._slots.acquire(blocking=wait):
+            return False
+        
+        attachment_id = attachment.id
+        try:
+            work_dir = tempfile.mkdtemp(dir=store.backend.temp_dir())
+        except Exception:
+            self._slots.release()
+            raise
+        target_path = os.path.join(work_dir, 'thumbnail.png')
+        args = (source_path, attachment.file.content_type, target_path, self.size)
+        
+        def done(future):
+            try:
+                if future.exception() is not None:
+                    status = 'FAILED'
+                elif future.result() and os.path.exists(target_path):
+                    status = 'READY'
+                else:
+                    status = 'NONE'
+                self._finish(attachment_id, target_path if status == 'READY' else None, status)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+                self._slots.release()
+        
+        if self.workers == 0:
+            future = Future()
+            try:
+                future.set_result(render_thumbnail(*args))
+            except Exception as e:
+                future.set_exception(e)
+            done(future)
+            return True
+        future = self._get_executor().submit(render_thumbnail, *args)
+        if wait:
+            # Reprocessamento: registra no próprio thread, um anexo por vez
+            futures_wait([future])
+            done(future)
+        else:
+            future.add_done_callback(done)
+        return True
+    
+    def _finish(self, attachment_id, thumbnail_path, status):
+        """Registra a miniatura no repositório e atualiza o anexo (roda fora do request)"""
+        from app import db
+        from app.models import InvoiceAttachment
+        from app.utils.document_store import get_document_store
+        with self.app.app_context():
+            attachment = db.session.get(InvoiceAttachment, attachment_id)
+            if attachment is None:
+                return
+            if thumbnail_path is not None:
+                attachment.thumbnail_file = get_document_store().save_path(thumbnail_path, 'image/png')
+            attachment.thumbnail_status = status
+            db.session.commit()
+    
+    def shutdown(self):
+        """Encerra o pool de processos"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Serviço ativo (configurado em init_thumbnails)
+_service = None
+
+def init_thumbnails(app):
+    """Configura o serviço a partir da configuração da aplicação"""
+    global _service
+    if _service is not None:
+        _service.shutdown()
+    _service = ThumbnailService(
+        app,
+        workers=app.config.get('THUMBNAIL_WORKERS', 2),
+        max_pending=app.config.get('THUMBNAIL_MAX_PENDING'),
+        size=app.config.get('THUMBNAIL_SIZE', DEFAULT_THUMBNAIL_SIZE)
+    )
+
+def schedule_thumbnail(attachment):
+    """Agenda a miniatura do anexo; False se ficou pendente (pool cheio)"""
+    return _service.submit(attachment)
+
+def process_pending_thumbnails(log=print):
+    """Gera as miniaturas pendentes, aguardando cada uma (flask documents thumbnails)"""
+    from app.models import InvoiceAttachment
+    pending = InvoiceAttachment.query.filter_by(thumbnail_status='PENDING').order_by(InvoiceAttachment.id).all()
+    for attachment in pending:
+        _service.submit(attachment, wait=True)
+        log(f'  {attachment.filename}')
+    return len(pending)
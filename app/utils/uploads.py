@@ -0,0 +1,95 @@
+"""
+Recebimento de arquivos enviados pelos usuários
+
+O tipo é identificado pelos primeiros bytes do conteúdo (assinatura do
+formato), não pela extensão nem pelo Content-Type informados pelo navegador,
+e conferido com ALLOWED_EXTENSIONS. O conteúdo é lido do stream em blocos
+e gravado direto no repositório de documentos, sem ficar inteiro em memória.
+"""
+import os
+from flask import current_app
+from werkzeug.utils import secure_filename
+from app.utils.document_store import get_document_store
+
+# Assinaturas aceitas: primeiros bytes -> (extensão, tipo do conteúdo)
+SIGNATURES = (
+    (b'%PDF-', ('pdf', 'application/pdf')),
+    (b'\x89PNG\r\n\x1a\n', ('png', 'image/png')),
+    (b'\xff\xd8\xff', ('jpg', 'image/jpeg'))
+)
+
+# Bytes lidos para identificar o formato
+SNIFF_SIZE = max(len(signature) for signature, _ in SIGNATURES)
+
+# Extensões equivalentes (a lista de permitidas usa as duas grafias do JPEG)
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+class UploadRejected(Exception):
+    """Arquivo recusado (tipo não permitido, vazio ou grande demais)"""
+
+def sniff(head):
+    """Retorna (extensão, tipo do conteúdo) a partir dos primeiros bytes, ou None"""
+    for signature, kind in SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    return None
+
+class _PrefixedStream:
+    """Stream que devolve primeiro os bytes já lidos para identificar o formato"""
+    
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+    
+    def read(self, size=-1):
+        if not self._prefix:
+            return self._stream.read(size)
+        if size is None or size < 0:
+            data, self._prefix = self._prefix + self._stream.read(), b''
+            return data
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        return data
+
+def _read_head(stream):
+    """Lê até SNIFF_SIZE bytes (streams em rede podem devolver menos por leitura)"""
+    head = b''
+    while len(head) < SNIFF_SIZE:
+        chunk = stream.read(SNIFF_SIZE - len(head))
+        if not chunk:
+            break
+        head += chunk
+    return head
+
+def store_upload(stream, filename):
+    """
+    Valida o tipo do arquivo pelo conteúdo e o grava no repositório de documentos
+    
+    Args:
+        stream: Stream do corpo da requisição (ou do arquivo do formulário)
+        filename: Nome informado pelo usuário (só para exibição)
+    
+    Returns:
+        Tupla (StoredFile, nome seguro com a extensão do tipo identificado)
+    
+    Raises:
+        UploadRejected: Arquivo vazio, de tipo não permitido ou acima de MAX_CONTENT_LENGTH
+    """
+    head = _read_head(stream)
+    if not head:
+        raise UploadRejected('Arquivo vazio.')
+    kind = sniff(head)
+    allowed = {EXTENSION_ALIASES.get(ext, ext) for ext in current_app.config['ALLOWED_EXTENSIONS']}
+    if kind is None or kind[0] not in allowed:
+        raise UploadRejected('Tipo de arquivo não permitido. Envie PDF, PNG ou JPG.')
+    extension, content_type = kind
+    
+    try:
+        stored_file = get_document_store().save_stream(
+            _PrefixedStream(head, stream), content_type, max_size=current_app.config.get('MAX_CONTENT_LENGTH')
+        )
+    except ValueError as e:
+        raise UploadRejected(str(e))
+    
+    # O nome segue o tipo real do conteúdo, não a extensão enviada
+    base = os.path.splitext(secure_filename(filename or ''))[0] or 'anexo'
+    return stored_file, f'{base[:200]}.{extension}'
@@ -0,0 +1,25 @@
+/**
+ * Configuração do Tailwind usada por `flask assets build`
+ *
+ * O build varre os templates e os módulos Python que montam classes CSS
+ * (filtros de status, cores dos modelos) e gera apenas as classes usadas.
+ */
+module.exports = {
+  // Caminhos relativos a este arquivo (o build roda a partir da raiz do projeto)
+  content: {
+    relative: true,
+    files: [
+      '../app/templates/**/*.html',
+      '../app/utils/filters.py',
+      '../app/models/*.py'
+    ]
+  },
+  // Classes montadas nos templates a partir de get_status_color(), ex.: bg-{{ cor }}-100
+  safelist: [
+    { pattern: /^(bg|text|border)-(gray|red|yellow|green|blue|indigo|purple|orange|teal|cyan)-(100|800)$/ }
+  ],
+  theme: {
+    extend: {}
+  },
+  plugins: []
+}
@@ -4,7 +4,7 @@ Configurações da aplicação Flask
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
-from environment_config import get_database_url, DEFAULT_ENVIRONMENT
+from environment_config import get_database_url, get_engine_options, DEFAULT_ENVIRONMENT
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -20,6 +20,8 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         get_database_url(DEFAULT_ENVIRONMENT)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool de conexões e timeouts no servidor (ver environment_config.POOL_DEFAULTS)
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options(DEFAULT_ENVIRONMENT)
     SQLALCHEMY_ECHO = False
     
     # Configuração de sessão
@@ -27,15 +29,98 @@ class Config:
     SESSION_COOKIE_SECURE = False  # True em produção com HTTPS
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+    # Onde fica o conteúdo da sessão: 'cookie' (padrão do Flask), 'file', 'sqlite' ou 'redis'
+    # (nos três últimos o cookie leva só o id; caminho padrão na pasta instance/)
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND') or 'cookie'
+    SESSION_STORE_PATH = os.environ.get('SESSION_STORE_PATH')
+    SESSION_STORE_URL = os.environ.get('SESSION_STORE_URL') or 'redis://localhost:6379/1'
+    
+    # Hash de senhas: política atual (hashes antigos são refeitos no login),
+    # processos do pool (0 = no próprio thread), fila máxima e timeout em segundos
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_WORKERS = int(os.environ['PASSWORD_HASH_WORKERS']) if os.environ.get('PASSWORD_HASH_WORKERS') else None
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING') or 0) or None
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT') or 10)
+    
+    # Limite de falhas de login (janela em segundos)
+    LOGIN_MAX_FAILURES_PER_USER = int(os.environ.get('LOGIN_MAX_FAILURES_PER_USER') or 5)
+    LOGIN_MAX_FAILURES_PER_IP = int(os.environ.get('LOGIN_MAX_FAILURES_PER_IP') or 30)
+    LOGIN_RATE_WINDOW = int(os.environ.get('LOGIN_RATE_WINDOW') or 300)
+    
+    # Proxies reversos confiáveis na frente da aplicação (X-Forwarded-For);
+    # 0 = acesso direto, request.remote_addr é o IP da conexão
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR') or 0)
+    
+    # Token (Authorization: Bearer) para o relatório completo do /health; sem ele,
+    # só administradores logados veem os detalhes
+    HEALTH_TOKEN = os.environ.get('HEALTH_TOKEN')
     
     # Configuração de upload
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
     
+    # Repositório de documentos (PDFs de pedidos, anexos), endereçado pelo SHA-256 do conteúdo
+    DOCUMENT_STORE_BACKEND = os.environ.get('DOCUMENT_STORE_BACKEND') or 'local'
+    DOCUMENT_STORE_PATH = os.environ.get('DOCUMENT_STORE_PATH') or \
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'storage', 'documents')
+    
+    # Envio de arquivos: 'app' (sendfile do servidor WSGI), 'x-accel-redirect' (nginx, location
+    # internal FILE_SERVING_ACCEL_PREFIX apontando para FILE_SERVING_ROOT) ou 'x-sendfile' (Apache)
+    FILE_SERVING_MODE = os.environ.get('FILE_SERVING_MODE') or 'app'
+    FILE_SERVING_ROOT = os.environ.get('FILE_SERVING_ROOT')  # padrão: DOCUMENT_STORE_PATH
+    FILE_SERVING_ACCEL_PREFIX = os.environ.get('FILE_SERVING_ACCEL_PREFIX') or '/protected-files'
+    
+    # Miniaturas dos anexos de notas fiscais (processos do pool, 0 = no próprio request;
+    # acima de THUMBNAIL_MAX_PENDING a miniatura fica pendente para flask documents thumbnails)
+    THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+    THUMBNAIL_MAX_PENDING = int(os.environ.get('THUMBNAIL_MAX_PENDING') or 0) or None
+    THUMBNAIL_SIZE = int(os.environ.get('THUMBNAIL_SIZE') or 320)
+    
     # Configuração de paginação
     ITEMS_PER_PAGE = 20
     
+    # Cache das estatísticas dos dashboards ('memory' por processo ou 'redis' compartilhado)
+    DASHBOARD_CACHE_BACKEND = os.environ.get('DASHBOARD_CACHE_BACKEND') or 'memory'
+    DASHBOARD_CACHE_URL = os.environ.get('DASHBOARD_CACHE_URL') or 'redis://localhost:6379/0'
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL') or 300)
+    
+    # Servidor WSGI: quantidade de processos (mesma variável lida pelo gunicorn) e
+    # classe do worker ('sync', 'gthread', 'gevent', 'eventlet' ou 'threaded')
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY') or 1)
+    WEB_WORKER_CLASS = os.environ.get('WEB_WORKER_CLASS') or 'sync'
+    
+    # Atualizações em tempo real ('memory' com um worker, 'postgres' com LISTEN/NOTIFY entre workers).
+    # Cada stream SSE ocupa um worker enquanto a página está aberta: sem LIVE_UPDATES_ENABLED
+    # explícito, só ficam ativas com workers em threads ou assíncronos
+    LIVE_UPDATES_BACKEND = os.environ.get('LIVE_UPDATES_BACKEND') or 'memory'
+    LIVE_UPDATES_ENABLED = (os.environ['LIVE_UPDATES_ENABLED'].lower() == 'true') \
+        if os.environ.get('LIVE_UPDATES_ENABLED') else None
+    
+    # Páginas de lista renderizadas em streaming, lendo o banco em lotes de STREAM_YIELD_PER linhas
+    STREAM_LISTINGS = (os.environ.get('STREAM_LISTINGS') or 'true').lower() == 'true'
+    STREAM_YIELD_PER = int(os.environ.get('STREAM_YIELD_PER') or 500)
+    
+    # Réplica somente leitura (BD_COMPRAS_<AMBIENTE>_RO): atraso máximo aceito,
+    # tempo lendo do primário após uma escrita e intervalo entre medições do atraso
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG') or 5)
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 15)
+    REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL') or 2)
+    
+    # Compressão das respostas: tamanho mínimo (bytes), nível do gzip e qualidade do brotli
+    COMPRESSION_ENABLED = (os.environ.get('COMPRESSION_ENABLED') or 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL') or 6)
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY') or 4)
+    
+    # Sem "flask assets build" as páginas usam as CDNs (Tailwind, Alpine, Font Awesome);
+    # desligado, páginas renderizadas sem o build falham com erro explícito
+    ASSETS_CDN_FALLBACK = (os.environ.get('ASSETS_CDN_FALLBACK') or 'true').lower() == 'true'
+    
+    # Templates compilados em disco, compartilhados entre workers (flask templates compile)
+    TEMPLATE_BYTECODE_CACHE = (os.environ.get('TEMPLATE_BYTECODE_CACHE') or 'true').lower() == 'true'
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+    
     # Configuração de timezone
     TIMEZONE = 'America/Sao_Paulo'
     
@@ -44,6 +129,9 @@ class Config:
     
     # Configuração da aplicação
     APP_NAME = 'Sistema de Compras'
+    # Versão do deploy (ex.: hash do commit); entra no ETag das páginas. Sem ela,
+    # usa-se uma assinatura dos templates e do manifest dos assets
+    APP_VERSION = os.environ.get('APP_VERSION')
     COMPANY_NAME = 'Empresa XYZ Ltda'
     
     @classmethod
@@ -56,12 +144,18 @@ class DevelopmentConfig(Config):
     """Configuração de desenvolvimento"""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    # Servidor de desenvolvimento do Flask: um processo, um thread por request
+    WEB_WORKER_CLASS = os.environ.get('WEB_WORKER_CLASS') or 'threaded'
 
 
 class ProductionConfig(Config):
     """Configuração de produção"""
     DEBUG = False
     SESSION_COOKIE_SECURE = True
+    # Produção serve só o bundle gerado no deploy (flask assets build)
+    ASSETS_CDN_FALLBACK = (os.environ.get('ASSETS_CDN_FALLBACK') or 'false').lower() == 'true'
+    # Vários workers: eventos distribuídos pelo PostgreSQL
+    LIVE_UPDATES_BACKEND = os.environ.get('LIVE_UPDATES_BACKEND') or 'postgres'
     
     def __init__(self):
         super().__init__()
@@ -8,12 +8,17 @@
 -- CREATE DATABASE purchase_system WITH ENCODING 'UTF8' LC_COLLATE='pt_BR.UTF-8' LC_CTYPE='pt_BR.UTF-8';
 
 -- Conectar ao banco: \c purchase_system
+--
+-- Depois de criar um banco novo com este script, marque a versão das
+-- migrações: flask db stamp head
+-- Alterações de esquema em bancos existentes: migrations/ (flask db upgrade)
 
 -- =====================================================
 -- EXTENSÕES
 -- =====================================================
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
 
 -- =====================================================
 -- TABELA: departments
@@ -22,6 +27,7 @@ CREATE TABLE departments (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) NOT NULL UNIQUE,
     status VARCHAR(20) NOT NULL DEFAULT 'ATIVO' CHECK (status IN ('ATIVO', 'INATIVO')),
+    auto_approve_limit DECIMAL(15, 2),
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
@@ -68,6 +74,11 @@ CREATE INDEX idx_products_sku ON products(sku);
 CREATE INDEX idx_products_status ON products(status);
 CREATE INDEX idx_products_name ON products(product_name);
 
+-- Índices de trigramas para o autocomplete de produtos (app/utils/product_search.py)
+CREATE INDEX idx_products_sku_trgm ON products USING GIN (sku gin_trgm_ops);
+CREATE INDEX idx_products_name_trgm ON products USING GIN (product_name gin_trgm_ops);
+CREATE INDEX idx_products_description_trgm ON products USING GIN (description gin_trgm_ops);
+
 -- =====================================================
 -- TABELA: purchase_requests
 -- =====================================================
@@ -77,6 +88,8 @@ CREATE TABLE purchase_requests (
     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
     quantity INTEGER NOT NULL CHECK (quantity > 0),
+    unit VARCHAR(20) NOT NULL DEFAULT 'UN',
+    justification TEXT NOT NULL,
     estimated_total DECIMAL(15, 2),
     status VARCHAR(30) NOT NULL DEFAULT 'PENDING' CHECK (status IN (
         'PENDING', 'APPROVED', 'REJECTED', 'IN_QUOTATION', 
@@ -90,6 +103,7 @@ CREATE TABLE purchase_requests (
     rejected_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
     rejected_at TIMESTAMP,
     rejected_reason TEXT,
+    auto_approved BOOLEAN NOT NULL DEFAULT FALSE,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -98,6 +112,33 @@ CREATE INDEX idx_purchase_requests_product ON purchase_requests(product_id);
 CREATE INDEX idx_purchase_requests_status ON purchase_requests(status);
 CREATE INDEX idx_purchase_requests_created ON purchase_requests(created_at);
 CREATE INDEX idx_purchase_requests_number ON purchase_requests(request_number);
+CREATE INDEX idx_purchase_requests_auto_approved ON purchase_requests(auto_approved) WHERE auto_approved;
+-- Caixa de entrada (app/utils/inbox.py): requisições aguardando aprovação / cotação
+CREATE INDEX idx_purchase_requests_pending ON purchase_requests(created_at) WHERE status = 'PENDING';
+CREATE INDEX idx_purchase_requests_awaiting_quotation ON purchase_requests(approved_at) WHERE status = 'APPROVED';
+-- Listas filtradas por status / por usuário, ordenadas por data (app/utils/index_advisor.py)
+CREATE INDEX idx_purchase_requests_status_created ON purchase_requests(status, created_at DESC);
+CREATE INDEX idx_purchase_requests_user_created ON purchase_requests(user_id, created_at DESC);
+
+-- =====================================================
+-- TABELA: purchase_request_items (linhas da requisição)
+-- =====================================================
+CREATE TABLE purchase_request_items (
+    id SERIAL PRIMARY KEY,
+    purchase_request_id INTEGER NOT NULL REFERENCES purchase_requests(id) ON DELETE CASCADE,
+    line_number INTEGER NOT NULL,
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    quantity INTEGER NOT NULL CHECK (quantity > 0),
+    unit VARCHAR(20) NOT NULL DEFAULT 'UN',
+    estimated_unit_value DECIMAL(15, 2) DEFAULT 0.00,
+    estimated_total DECIMAL(15, 2) DEFAULT 0.00,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'APPROVED', 'REJECTED')),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(purchase_request_id, line_number)
+);
+
+CREATE INDEX idx_purchase_request_items_product ON purchase_request_items(product_id);
 
 -- =====================================================
 -- TABELA: quotations
@@ -112,12 +153,29 @@ CREATE TABLE quotations (
     approved_at TIMESTAMP,
     approved_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
     notes TEXT,
+    quantity INTEGER CHECK (quantity > 0),
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX idx_quotations_request ON quotations(purchase_request_id);
 CREATE INDEX idx_quotations_purchaser ON quotations(purchaser_id);
 CREATE INDEX idx_quotations_status ON quotations(status);
+CREATE INDEX idx_quotations_status_purchaser ON quotations(status, purchaser_id);
+CREATE INDEX idx_quotations_released ON quotations(released_at) WHERE status = 'RELEASED';
+CREATE INDEX idx_quotations_approved ON quotations(approved_at) WHERE status = 'APPROVED';
+CREATE INDEX idx_quotations_purchaser_draft ON quotations(purchaser_id, created_at DESC) WHERE status = 'DRAFT';
+CREATE INDEX idx_quotations_created ON quotations(created_at DESC);
+
+-- =====================================================
+-- TABELA: quotation_requests (cotações consolidadas)
+-- =====================================================
+CREATE TABLE quotation_requests (
+    quotation_id INTEGER NOT NULL REFERENCES quotations(id) ON DELETE CASCADE,
+    purchase_request_id INTEGER NOT NULL REFERENCES purchase_requests(id) ON DELETE CASCADE,
+    PRIMARY KEY (quotation_id, purchase_request_id)
+);
+
+CREATE INDEX idx_quotation_requests_request ON quotation_requests(purchase_request_id);
 
 -- =====================================================
 -- TABELA: quotation_items
@@ -125,6 +183,7 @@ CREATE INDEX idx_quotations_status ON quotations(status);
 CREATE TABLE quotation_items (
     id SERIAL PRIMARY KEY,
     quotation_id INTEGER NOT NULL REFERENCES quotations(id) ON DELETE CASCADE,
+    purchase_request_item_id INTEGER REFERENCES purchase_request_items(id) ON DELETE CASCADE,
     vendor_name VARCHAR(200) NOT NULL,
     vendor_cnpj VARCHAR(18),
     description TEXT,
@@ -138,6 +197,23 @@ CREATE TABLE quotation_items (
 
 CREATE INDEX idx_quotation_items_quotation ON quotation_items(quotation_id);
 CREATE INDEX idx_quotation_items_selected ON quotation_items(is_selected);
+CREATE INDEX idx_quotation_items_request_item ON quotation_items(purchase_request_item_id);
+-- Fornecedores (supplier.*): agrupamento por nome/CNPJ, histórico e CNPJ duplicado
+CREATE INDEX idx_quotation_items_vendor ON quotation_items(vendor_name, vendor_cnpj);
+CREATE INDEX idx_quotation_items_vendor_created ON quotation_items(vendor_name, created_at DESC);
+CREATE INDEX idx_quotation_items_cnpj ON quotation_items(vendor_cnpj) WHERE vendor_cnpj IS NOT NULL;
+
+-- =====================================================
+-- TABELA: stored_files (repositório de documentos, um registro por conteúdo)
+-- =====================================================
+CREATE TABLE stored_files (
+    id SERIAL PRIMARY KEY,
+    sha256 VARCHAR(64) NOT NULL UNIQUE,
+    size BIGINT NOT NULL CHECK (size >= 0),
+    content_type VARCHAR(100) NOT NULL,
+    backend VARCHAR(20) NOT NULL DEFAULT 'local',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
 
 -- =====================================================
 -- TABELA: purchase_orders
@@ -149,6 +225,7 @@ CREATE TABLE purchase_orders (
     quotation_item_id INTEGER NOT NULL REFERENCES quotation_items(id) ON DELETE CASCADE,
     purchaser_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     pdf_path VARCHAR(500),
+    pdf_file_id INTEGER CONSTRAINT fk_purchase_orders_pdf_file REFERENCES stored_files(id),
     status VARCHAR(20) NOT NULL DEFAULT 'CREATED' CHECK (status IN ('CREATED', 'SENT', 'CONFIRMED', 'CANCELLED')),
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
@@ -157,6 +234,20 @@ CREATE TABLE purchase_orders (
 CREATE INDEX idx_purchase_orders_request ON purchase_orders(purchase_request_id);
 CREATE INDEX idx_purchase_orders_purchaser ON purchase_orders(purchaser_id);
 CREATE INDEX idx_purchase_orders_number ON purchase_orders(order_number);
+CREATE INDEX idx_purchase_orders_status_purchaser ON purchase_orders(status, purchaser_id);
+CREATE INDEX idx_purchase_orders_created ON purchase_orders(created_at DESC);
+CREATE INDEX idx_purchase_orders_pdf_file ON purchase_orders(pdf_file_id) WHERE pdf_file_id IS NOT NULL;
+
+-- =====================================================
+-- TABELA: purchase_order_requests (pedidos consolidados)
+-- =====================================================
+CREATE TABLE purchase_order_requests (
+    purchase_order_id INTEGER NOT NULL REFERENCES purchase_orders(id) ON DELETE CASCADE,
+    purchase_request_id INTEGER NOT NULL REFERENCES purchase_requests(id) ON DELETE CASCADE,
+    PRIMARY KEY (purchase_order_id, purchase_request_id)
+);
+
+CREATE INDEX idx_purchase_order_requests_request ON purchase_order_requests(purchase_request_id);
 
 -- =====================================================
 -- TABELA: invoices
@@ -177,6 +268,25 @@ CREATE TABLE invoices (
 
 CREATE INDEX idx_invoices_order ON invoices(purchase_order_id);
 CREATE INDEX idx_invoices_number ON invoices(invoice_number);
+CREATE INDEX idx_invoices_created ON invoices(created_at DESC);
+
+-- =====================================================
+-- TABELA: invoice_attachments (arquivos da NF-e, conteúdo em stored_files)
+-- =====================================================
+CREATE TABLE invoice_attachments (
+    id SERIAL PRIMARY KEY,
+    invoice_id INTEGER NOT NULL REFERENCES invoices(id) ON DELETE CASCADE,
+    file_id INTEGER NOT NULL REFERENCES stored_files(id),
+    filename VARCHAR(255) NOT NULL,
+    thumbnail_file_id INTEGER REFERENCES stored_files(id),
+    thumbnail_status VARCHAR(20) NOT NULL DEFAULT 'PENDING' CHECK (thumbnail_status IN ('PENDING', 'READY', 'FAILED', 'NONE')),
+    uploaded_by INTEGER NOT NULL REFERENCES users(id),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_invoice_attachments_invoice ON invoice_attachments(invoice_id);
+CREATE INDEX idx_invoice_attachments_pending ON invoice_attachments(id) WHERE thumbnail_status = 'PENDING';
 
 -- =====================================================
 -- TABELA: payments
@@ -196,6 +306,35 @@ CREATE TABLE payments (
 
 CREATE INDEX idx_payments_invoice ON payments(invoice_id);
 CREATE INDEX idx_payments_status ON payments(status);
+CREATE INDEX idx_payments_pending ON payments(created_at) WHERE status = 'PENDING';
+CREATE INDEX idx_payments_released ON payments(released_at) WHERE status = 'RELEASED';
+
+-- =====================================================
+-- TABELA: payment_requests (solicitações de pagamento)
+-- =====================================================
+CREATE TABLE payment_requests (
+    id SERIAL PRIMARY KEY,
+    request_number VARCHAR(20) NOT NULL UNIQUE,
+    invoice_id INTEGER NOT NULL REFERENCES invoices(id) ON DELETE CASCADE,
+    purchase_order_id INTEGER NOT NULL REFERENCES purchase_orders(id) ON DELETE CASCADE,
+    approved_value DECIMAL(15, 2) NOT NULL CONSTRAINT ck_payment_requests_approved_value CHECK (approved_value >= 0),
+    cost_center VARCHAR(100),
+    accounting_account VARCHAR(100),
+    status VARCHAR(30) NOT NULL DEFAULT 'AGUARDANDO_PAGAMENTO' CONSTRAINT ck_payment_requests_status CHECK (status IN (
+        'AGUARDANDO_PAGAMENTO', 'PAGO', 'CANCELADO'
+    )),
+    payment_date DATE,
+    payment_method VARCHAR(50),
+    notes TEXT,
+    created_by INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_payment_requests_awaiting ON payment_requests(created_at) WHERE status = 'AGUARDANDO_PAGAMENTO';
+CREATE INDEX idx_payment_requests_status_created ON payment_requests(status, created_at DESC);
+CREATE INDEX idx_payment_requests_order ON payment_requests(purchase_order_id);
+CREATE INDEX idx_payment_requests_invoice ON payment_requests(invoice_id);
 
 -- =====================================================
 -- TABELA: audit_log
@@ -230,6 +369,25 @@ CREATE TABLE system_parameters (
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- =====================================================
+-- TABELA: document_lookup (busca global por número de documento)
+-- Mantida pela aplicação a cada insert/update; recriar com
+-- "flask rebuild-document-lookup" após cargas feitas direto no banco
+-- =====================================================
+CREATE TABLE document_lookup (
+    id SERIAL PRIMARY KEY,
+    document_number VARCHAR(50) NOT NULL,
+    document_type VARCHAR(30) NOT NULL CHECK (document_type IN ('PURCHASE_REQUEST', 'PURCHASE_ORDER', 'INVOICE', 'PAYMENT_REQUEST')),
+    document_id INTEGER NOT NULL,
+    status VARCHAR(30),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_document_lookup_document UNIQUE (document_type, document_id)
+);
+
+-- varchar_pattern_ops: permite usar o índice em LIKE 'RC-2024%'
+CREATE INDEX idx_document_lookup_number ON document_lookup(document_number varchar_pattern_ops);
+
 -- =====================================================
 -- FUNÇÕES E TRIGGERS
 -- =====================================================
@@ -256,6 +414,9 @@ CREATE TRIGGER update_products_updated_at BEFORE UPDATE ON products
 CREATE TRIGGER update_purchase_requests_updated_at BEFORE UPDATE ON purchase_requests
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_purchase_request_items_updated_at BEFORE UPDATE ON purchase_request_items
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 CREATE TRIGGER update_quotations_updated_at BEFORE UPDATE ON quotations
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
@@ -268,12 +429,21 @@ CREATE TRIGGER update_purchase_orders_updated_at BEFORE UPDATE ON purchase_order
 CREATE TRIGGER update_invoices_updated_at BEFORE UPDATE ON invoices
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_invoice_attachments_updated_at BEFORE UPDATE ON invoice_attachments
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 CREATE TRIGGER update_payments_updated_at BEFORE UPDATE ON payments
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_payment_requests_updated_at BEFORE UPDATE ON payment_requests
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 CREATE TRIGGER update_system_parameters_updated_at BEFORE UPDATE ON system_parameters
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_document_lookup_updated_at BEFORE UPDATE ON document_lookup
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 -- Função para gerar número de requisição
 CREATE OR REPLACE FUNCTION generate_request_number()
 RETURNS TRIGGER AS $$
@@ -341,8 +511,9 @@ INSERT INTO system_parameters (param_key, param_value, description) VALUES
     ('company_name', 'Empresa XYZ Ltda', 'Nome da empresa'),
     ('company_cnpj', '00.000.000/0001-00', 'CNPJ da empresa'),
     ('min_quotations', '3', 'Número mínimo de cotações obrigatórias'),
-    ('auto_approve_limit', '1000.00', 'Valor limite para aprovação automática'),
-    ('currency', 'BRL', 'Moeda padrão do sistema');
+    ('auto_approve_limit', '1000.00', 'Valor limite para aprovação automática (pode ser sobreposto por departamento)'),
+    ('currency', 'BRL', 'Moeda padrão do sistema'),
+    ('consolidation_window_days', '7', 'Janela (dias) para consolidar requisições do mesmo produto');
 
 -- Inserir produtos de exemplo
 INSERT INTO products (sku, product_name, description, average_unit_value, status) VALUES
@@ -420,6 +591,8 @@ COMMENT ON TABLE purchase_orders IS 'Ordens de compra geradas após aprovação'
 COMMENT ON TABLE invoices IS 'Notas fiscais informadas pelos solicitantes';
 COMMENT ON TABLE payments IS 'Controle de pagamentos pelo financeiro';
 COMMENT ON TABLE audit_log IS 'Log de auditoria de todas as ações no sistema';
+COMMENT ON TABLE stored_files IS 'Metadados do repositório de documentos (arquivos endereçados pelo SHA-256)';
+COMMENT ON TABLE invoice_attachments IS 'Arquivos anexados às notas fiscais (PDF/imagem) e suas miniaturas';
 
 -- =====================================================
 -- FIM DO SCRIPT
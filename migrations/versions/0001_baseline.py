@@ -0,0 +1,33 @@
+"""Esquema inicial (database_schema.sql)
+
+Marca o ponto de partida do histórico. Bancos já criados com
+database_schema.sql ou "flask init-db" devem ser marcados com
+"flask db stamp 0001_baseline" e depois atualizados com "flask db upgrade".
+Bancos novos: executar database_schema.sql e "flask db stamp head".
+
+Revision ID: 0001_baseline
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.online_migrations import has_table
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('users'):
+        raise RuntimeError(
+            'Banco vazio: crie o esquema com database_schema.sql e execute "flask db stamp head"'
+        )
+
+
+def downgrade():
+    pass
@@ -0,0 +1,245 @@
+"""Alinha o banco aos modelos
+
+Todas as alterações são seguras com a aplicação no ar:
+- payment_requests, purchase_request_items, quotation_requests,
+  purchase_order_requests, document_lookup: tabelas novas; os índices são
+  criados na mesma transação, com as tabelas ainda vazias
+- purchase_requests.unit e auto_approved: colunas com default constante
+  (só metadados a partir do PostgreSQL 11)
+- purchase_requests.justification: coluna nula, preenchida em lotes e só
+  então NOT NULL (via CHECK NOT VALID validada, sem varrer a tabela sob lock
+  exclusivo)
+- departments.auto_approve_limit, quotations.quantity: colunas nulas (só metadados)
+- quotation_items.purchase_request_item_id: coluna nula, FK NOT VALID validada
+  depois, índices com CONCURRENTLY
+- Preenchimento em lotes: uma linha (line_number 1) por requisição existente
+  e o índice de documentos a partir das requisições, pedidos, notas e
+  solicitações de pagamento
+
+Revision ID: 0002_reconcile_models
+Revises: 0001_baseline
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+import time
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+from app.utils.online_migrations import (has_table, has_column, lock_timeout, batched_backfill,
+                                         set_not_null, add_check_not_valid, add_foreign_key_not_valid,
+                                         validate_constraint, create_index_concurrently,
+                                         drop_index_concurrently, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_PAUSE)
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_reconcile_models'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+# Linha única das requisições anteriores às requisições com vários itens
+# (status da linha derivado do status da requisição)
+BACKFILL_REQUEST_ITEMS = """
+INSERT INTO purchase_request_items (purchase_request_id, line_number, product_id, quantity, unit,
+                                    estimated_unit_value, estimated_total, status)
+SELECT pr.id, 1, pr.product_id, pr.quantity, pr.unit,
+       ROUND(COALESCE(pr.estimated_total, 0) / pr.quantity, 2), COALESCE(pr.estimated_total, 0),
+       CASE WHEN pr.status = 'PENDING' THEN 'PENDING'
+            WHEN pr.status IN ('REJECTED', 'CANCELLED') THEN 'REJECTED'
+            ELSE 'APPROVED' END
+FROM purchase_requests pr
+WHERE NOT EXISTS (SELECT 1 FROM purchase_request_items i WHERE i.purchase_request_id = pr.id)
+ORDER BY pr.id
+LIMIT :batch_size
+"""
+
+# Documentos indexados: (tipo, tabela, coluna do número, expressão do status)
+LOOKUP_DOCUMENTS = [
+    ('PURCHASE_REQUEST', 'purchase_requests', 'request_number', 'd.status'),
+    ('PURCHASE_ORDER', 'purchase_orders', 'order_number', 'd.status'),
+    ('INVOICE', 'invoices', 'invoice_number', 'NULL'),  # notas não têm status
+    ('PAYMENT_REQUEST', 'payment_requests', 'request_number', 'd.status'),
+]
+
+BACKFILL_LOOKUP = """
+INSERT INTO document_lookup (document_number, document_type, document_id, status)
+SELECT UPPER(TRIM(d.{number_column})), '{document_type}', d.id, {status}
+FROM {table} d
+WHERE NOT EXISTS (SELECT 1 FROM document_lookup l
+                  WHERE l.document_type = '{document_type}' AND l.document_id = d.id)
+ORDER BY d.id
+LIMIT :batch_size
+"""
+
+
+def batched_insert(statement, batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_BATCH_PAUSE):
+    """Executa o INSERT ... SELECT ... LIMIT em lotes, cada lote em sua própria transação"""
+    total = 0
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            inserted = bind.execute(text(statement), {'batch_size': batch_size}).rowcount
+            if not inserted:
+                break
+            total += inserted
+            time.sleep(pause)
+    return total
+
+
+def upgrade():
+    if not has_table('payment_requests'):
+        op.create_table(
+            'payment_requests',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('request_number', sa.String(20), nullable=False, unique=True),
+            sa.Column('invoice_id', sa.Integer(), sa.ForeignKey('invoices.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('purchase_order_id', sa.Integer(), sa.ForeignKey('purchase_orders.id', ondelete='CASCADE'),
+                      nullable=False),
+            sa.Column('approved_value', sa.Numeric(15, 2), nullable=False),
+            sa.Column('cost_center', sa.String(100)),
+            sa.Column('accounting_account', sa.String(100)),
+            sa.Column('status', sa.String(30), nullable=False, server_default='AGUARDANDO_PAGAMENTO'),
+            sa.Column('payment_date', sa.Date()),
+            sa.Column('payment_method', sa.String(50)),
+            sa.Column('notes', sa.Text()),
+            sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.CheckConstraint("approved_value >= 0", name='ck_payment_requests_approved_value'),
+            sa.CheckConstraint("status IN ('AGUARDANDO_PAGAMENTO', 'PAGO', 'CANCELADO')",
+                               name='ck_payment_requests_status'),
+        )
+        op.execute(
+            'CREATE TRIGGER update_payment_requests_updated_at BEFORE UPDATE ON payment_requests '
+            'FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()'
+        )
+    
+    if not has_column('purchase_requests', 'unit'):
+        with lock_timeout():
+            op.add_column('purchase_requests',
+                          sa.Column('unit', sa.String(20), nullable=False, server_default='UN'))
+    
+    if not has_column('purchase_requests', 'justification'):
+        with lock_timeout():
+            op.add_column('purchase_requests', sa.Column('justification', sa.Text(), nullable=True))
+        batched_backfill('purchase_requests', "justification = 'Não informada'", 'justification IS NULL')
+        set_not_null('purchase_requests', 'justification')
+    
+    if not has_column('departments', 'auto_approve_limit'):
+        with lock_timeout():
+            op.add_column('departments', sa.Column('auto_approve_limit', sa.Numeric(15, 2), nullable=True))
+    
+    if not has_column('purchase_requests', 'auto_approved'):
+        with lock_timeout():
+            op.add_column('purchase_requests',
+                          sa.Column('auto_approved', sa.Boolean(), nullable=False, server_default=sa.false()))
+    
+    if not has_column('quotations', 'quantity'):
+        with lock_timeout():
+            op.add_column('quotations', sa.Column('quantity', sa.Integer(), nullable=True))
+        add_check_not_valid('quotations', 'ck_quotations_quantity', 'quantity > 0')
+        validate_constraint('quotations', 'ck_quotations_quantity')
+    
+    if not has_table('purchase_request_items'):
+        op.create_table(
+            'purchase_request_items',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('purchase_request_id', sa.Integer(),
+                      sa.ForeignKey('purchase_requests.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('line_number', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('unit', sa.String(20), nullable=False, server_default='UN'),
+            sa.Column('estimated_unit_value', sa.Numeric(15, 2), server_default='0.00'),
+            sa.Column('estimated_total', sa.Numeric(15, 2), server_default='0.00'),
+            sa.Column('status', sa.String(20), nullable=False, server_default='PENDING'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.UniqueConstraint('purchase_request_id', 'line_number'),
+            sa.CheckConstraint('quantity > 0', name='ck_purchase_request_items_quantity'),
+            sa.CheckConstraint("status IN ('PENDING', 'APPROVED', 'REJECTED')",
+                               name='ck_purchase_request_items_status'),
+        )
+        op.create_index('idx_purchase_request_items_product', 'purchase_request_items', ['product_id'])
+        op.execute(
+            'CREATE TRIGGER update_purchase_request_items_updated_at BEFORE UPDATE ON purchase_request_items '
+            'FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()'
+        )
+    
+    if not has_column('quotation_items', 'purchase_request_item_id'):
+        with lock_timeout():
+            op.add_column('quotation_items', sa.Column('purchase_request_item_id', sa.Integer(), nullable=True))
+    add_foreign_key_not_valid('fk_quotation_items_request_item', 'quotation_items', 'purchase_request_item_id',
+                              'purchase_request_items', ondelete='CASCADE')
+    validate_constraint('quotation_items', 'fk_quotation_items_request_item')
+    
+    if not has_table('quotation_requests'):
+        op.create_table(
+            'quotation_requests',
+            sa.Column('quotation_id', sa.Integer(), sa.ForeignKey('quotations.id', ondelete='CASCADE'),
+                      primary_key=True),
+            sa.Column('purchase_request_id', sa.Integer(),
+                      sa.ForeignKey('purchase_requests.id', ondelete='CASCADE'), primary_key=True),
+        )
+        op.create_index('idx_quotation_requests_request', 'quotation_requests', ['purchase_request_id'])
+    
+    if not has_table('purchase_order_requests'):
+        op.create_table(
+            'purchase_order_requests',
+            sa.Column('purchase_order_id', sa.Integer(), sa.ForeignKey('purchase_orders.id', ondelete='CASCADE'),
+                      primary_key=True),
+            sa.Column('purchase_request_id', sa.Integer(),
+                      sa.ForeignKey('purchase_requests.id', ondelete='CASCADE'), primary_key=True),
+        )
+        op.create_index('idx_purchase_order_requests_request', 'purchase_order_requests', ['purchase_request_id'])
+    
+    if not has_table('document_lookup'):
+        op.create_table(
+            'document_lookup',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('document_number', sa.String(50), nullable=False),
+            sa.Column('document_type', sa.String(30), nullable=False),
+            sa.Column('document_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(30)),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.UniqueConstraint('document_type', 'document_id', name='uq_document_lookup_document'),
+            sa.CheckConstraint(
+                "document_type IN ('PURCHASE_REQUEST', 'PURCHASE_ORDER', 'INVOICE', 'PAYMENT_REQUEST')",
+                name='ck_document_lookup_document_type'
+            ),
+        )
+        op.create_index('idx_document_lookup_number', 'document_lookup', ['document_number'],
+                        postgresql_ops={'document_number': 'varchar_pattern_ops'})
+        op.execute(
+            'CREATE TRIGGER update_document_lookup_updated_at BEFORE UPDATE ON document_lookup '
+            'FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()'
+        )
+    
+    create_index_concurrently('idx_purchase_requests_auto_approved', 'purchase_requests',
+                              '(auto_approved) WHERE auto_approved')
+    create_index_concurrently('idx_quotation_items_request_item', 'quotation_items', '(purchase_request_item_id)')
+    
+    batched_insert(BACKFILL_REQUEST_ITEMS)
+    for document_type, table, number_column, status in LOOKUP_DOCUMENTS:
+        batched_insert(BACKFILL_LOOKUP.format(document_type=document_type, table=table,
+                                              number_column=number_column, status=status))
+
+
+def downgrade():
+    drop_index_concurrently('idx_quotation_items_request_item')
+    drop_index_concurrently('idx_purchase_requests_auto_approved')
+    op.drop_table('document_lookup')
+    op.drop_table('purchase_order_requests')
+    op.drop_table('quotation_requests')
+    with lock_timeout():
+        op.drop_column('quotation_items', 'purchase_request_item_id')
+    op.drop_table('purchase_request_items')
+    with lock_timeout():
+        op.drop_column('quotations', 'quantity')
+        op.drop_column('purchase_requests', 'auto_approved')
+        op.drop_column('departments', 'auto_approve_limit')
+    with lock_timeout():
+        op.drop_column('purchase_requests', 'justification')
+        op.drop_column('purchase_requests', 'unit')
+    op.drop_table('payment_requests')
@@ -0,0 +1,55 @@
+"""Índices compostos/parciais alinhados às consultas das rotas
+
+Mesmo conjunto de app/utils/index_advisor.py (INDEX_PACK), copiado aqui para
+que a migração não mude se o pacote evoluir. Criados com CONCURRENTLY.
+
+Revision ID: 0003_index_pack
+Revises: 0002_reconcile_models
+Create Date: 2026-10-19 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.online_migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_index_pack'
+down_revision = '0002_reconcile_models'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('idx_purchase_requests_pending', 'purchase_requests', "(created_at) WHERE status = 'PENDING'"),
+    ('idx_purchase_requests_awaiting_quotation', 'purchase_requests', "(approved_at) WHERE status = 'APPROVED'"),
+    ('idx_purchase_requests_status_created', 'purchase_requests', '(status, created_at DESC)'),
+    ('idx_purchase_requests_user_created', 'purchase_requests', '(user_id, created_at DESC)'),
+    ('idx_quotations_released', 'quotations', "(released_at) WHERE status = 'RELEASED'"),
+    ('idx_quotations_approved', 'quotations', "(approved_at) WHERE status = 'APPROVED'"),
+    ('idx_quotations_purchaser_draft', 'quotations', "(purchaser_id, created_at DESC) WHERE status = 'DRAFT'"),
+    ('idx_quotations_created', 'quotations', '(created_at DESC)'),
+    ('idx_quotation_items_vendor', 'quotation_items', '(vendor_name, vendor_cnpj)'),
+    ('idx_quotation_items_vendor_created', 'quotation_items', '(vendor_name, created_at DESC)'),
+    ('idx_quotation_items_cnpj', 'quotation_items', '(vendor_cnpj) WHERE vendor_cnpj IS NOT NULL'),
+    ('idx_purchase_orders_created', 'purchase_orders', '(created_at DESC)'),
+    ('idx_invoices_created', 'invoices', '(created_at DESC)'),
+    ('idx_payment_requests_awaiting', 'payment_requests', "(created_at) WHERE status = 'AGUARDANDO_PAGAMENTO'"),
+    ('idx_payment_requests_status_created', 'payment_requests', '(status, created_at DESC)'),
+    ('idx_payment_requests_order', 'payment_requests', '(purchase_order_id)'),
+    ('idx_payment_requests_invoice', 'payment_requests', '(invoice_id)'),
+    ('idx_payments_pending', 'payments', "(created_at) WHERE status = 'PENDING'"),
+    ('idx_payments_released', 'payments', "(released_at) WHERE status = 'RELEASED'"),
+]
+
+
+def upgrade():
+    for name, table, definition in INDEXES:
+        create_index_concurrently(name, table, definition)
+
+
+def downgrade():
+    # Os índices das tabelas do esquema base já constam de database_schema.sql;
+    # só os de payment_requests (tabela criada em 0002) são removidos
+    for name, table, _ in reversed(INDEXES):
+        if table == 'payment_requests':
+            drop_index_concurrently(name)
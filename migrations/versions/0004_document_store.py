@@ -0,0 +1,55 @@
+"""Repositório de documentos: stored_files e purchase_orders.pdf_file_id
+
+- stored_files: tabela nova (sem impacto nas demais)
+- pdf_file_id: coluna nula (só metadados), FK adicionada NOT VALID e validada
+  depois, índice criado com CONCURRENTLY
+
+Os PDFs já gerados continuam em UPLOAD_FOLDER/pdfs até rodar
+flask documents import-legacy.
+
+Revision ID: 0004_document_store
+Revises: 0003_index_pack
+Create Date: 2026-10-19 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.online_migrations import (has_table, has_column, lock_timeout, add_foreign_key_not_valid,
+                                         validate_constraint, create_index_concurrently,
+                                         drop_index_concurrently)
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_document_store'
+down_revision = '0003_index_pack'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table('stored_files'):
+        op.create_table(
+            'stored_files',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('sha256', sa.String(64), nullable=False, unique=True),
+            sa.Column('size', sa.BigInteger(), nullable=False),
+            sa.Column('content_type', sa.String(100), nullable=False),
+            sa.Column('backend', sa.String(20), nullable=False, server_default='local'),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.CheckConstraint('size >= 0', name='ck_stored_files_size'),
+        )
+    
+    if not has_column('purchase_orders', 'pdf_file_id'):
+        with lock_timeout():
+            op.add_column('purchase_orders', sa.Column('pdf_file_id', sa.Integer(), nullable=True))
+    add_foreign_key_not_valid('fk_purchase_orders_pdf_file', 'purchase_orders', 'pdf_file_id', 'stored_files')
+    validate_constraint('purchase_orders', 'fk_purchase_orders_pdf_file')
+    create_index_concurrently('idx_purchase_orders_pdf_file', 'purchase_orders',
+                              '(pdf_file_id) WHERE pdf_file_id IS NOT NULL')
+
+
+def downgrade():
+    drop_index_concurrently('idx_purchase_orders_pdf_file')
+    with lock_timeout():
+        op.drop_column('purchase_orders', 'pdf_file_id')
+    op.drop_table('stored_files')
@@ -0,0 +1,47 @@
+"""Anexos de notas fiscais: invoice_attachments
+
+- invoice_attachments: tabela nova (sem impacto nas demais); os índices são
+  criados na mesma transação, com a tabela ainda vazia
+- Conteúdo dos arquivos e miniaturas em stored_files (0004_document_store)
+
+Revision ID: 0005_invoice_attachments
+Revises: 0004_document_store
+Create Date: 2026-10-19 15:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.utils.online_migrations import has_table
+
+# revision identifiers, used by Alembic.
+revision = '0005_invoice_attachments'
+down_revision = '0004_document_store'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if not has_table('invoice_attachments'):
+        op.create_table(
+            'invoice_attachments',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('invoice_id', sa.Integer(), sa.ForeignKey('invoices.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('file_id', sa.Integer(), sa.ForeignKey('stored_files.id'), nullable=False),
+            sa.Column('filename', sa.String(255), nullable=False),
+            sa.Column('thumbnail_file_id', sa.Integer(), sa.ForeignKey('stored_files.id'), nullable=True),
+            sa.Column('thumbnail_status', sa.String(20), nullable=False, server_default='PENDING'),
+            sa.Column('uploaded_by', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+            sa.CheckConstraint("thumbnail_status IN ('PENDING', 'READY', 'FAILED', 'NONE')",
+                               name='ck_invoice_attachments_thumbnail_status'),
+        )
+        op.create_index('idx_invoice_attachments_invoice', 'invoice_attachments', ['invoice_id'])
+        op.create_index('idx_invoice_attachments_pending', 'invoice_attachments', ['id'],
+                        postgresql_where=sa.text("thumbnail_status = 'PENDING'"))
+        op.execute(
+            'CREATE TRIGGER update_invoice_attachments_updated_at BEFORE UPDATE ON invoice_attachments '
+            'FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()'
+        )
+
+def downgrade():
+    op.drop_table('invoice_attachments')
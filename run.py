@@ -2,6 +2,7 @@
 Ponto de entrada da aplicação Flask
 """
 import os
+import click
 from app import create_app, db
 from app.models import User, Department, Product, PurchaseRequest, Quotation, QuotationItem, PurchaseOrder, Invoice, Payment
 
@@ -69,6 +70,172 @@ def init_db():
     db.create_all()
     print('Banco de dados inicializado!')
 
+# Comando CLI para recriar o índice global de documentos
+@app.cli.command()
+def rebuild_document_lookup():
+    """Recria a tabela document_lookup a partir dos documentos existentes"""
+    from app.models import DocumentLookup
+    
+    total = DocumentLookup.rebuild()
+    print(f'Índice de documentos recriado: {total} documentos.')
+
+# Comando CLI para criar os índices compostos/parciais sem bloquear as tabelas
+@app.cli.command()
+@click.option('--dry-run', is_flag=True, help='Apenas mostra os comandos')
+def apply_index_pack(dry_run):
+    """Cria os índices do pacote com CREATE INDEX CONCURRENTLY"""
+    from app.utils.index_advisor import apply_index_pack as apply_pack
+    
+    total = apply_pack(dry_run=dry_run)
+    print(f'{total} índice(s) {"a criar" if dry_run else "criado(s)"}.')
+
+# Comando CLI para verificar os planos das consultas das rotas
+@app.cli.command()
+@click.option('--top', default=10, help='Consultas de pg_stat_statements a listar')
+@click.option('--min-rows', default=1000, help='Linhas estimadas a partir das quais Seq Scan/Sort são apontados')
+def index_advisor(top, min_rows):
+    """Executa EXPLAIN no catálogo de consultas e lista as consultas mais caras"""
+    from app.utils.index_advisor import explain_catalog, top_statements, unused_pack_indexes
+    
+    findings = explain_catalog(min_rows=min_rows)
+    print('== Planos do catálogo de consultas ==')
+    if not findings:
+        print('Nenhuma varredura sequencial ou ordenação em conjunto grande.')
+    for finding in findings:
+        print(f'[{finding.problem}] {finding.query}: {finding.detail}')
+    
+    print()
+    print('== pg_stat_statements ==')
+    statements = top_statements(limit=top)
+    if statements is None:
+        print('Extensão pg_stat_statements não instalada.')
+    for row in statements or []:
+        query = ' '.join(row['query'].split())[:120]
+        print(f"{row['total_ms']:>12.1f} ms  {row['calls']:>8} chamadas  {row['mean_ms']:>9.2f} ms/chamada  {query}")
+    
+    unused = unused_pack_indexes()
+    if unused:
+        print()
+        print('== Índices do pacote ainda não utilizados ==')
+        for name in unused:
+            print(name)
+
+# Comando CLI para validar/redefinir senhas em massa (substitui fix_user_passwords.py)
+@app.cli.command()
+@click.option('--batch-size', default=1000, help='Usuários por lote (uma transação por lote)')
+@click.option('--workers', default=None, type=int, help='Processos para gerar os hashes')
+@click.option('--dry-run', is_flag=True, help='Apenas relata, sem gravar')
+@click.option('--checkpoint', default='password_migration.checkpoint.json', help='Arquivo de progresso')
+@click.option('--resume', is_flag=True, help='Continua a partir do checkpoint')
+@click.option('--report', default='password_resets.csv', help='CSV com as senhas temporárias geradas')
+def migrate_passwords(batch_size, workers, dry_run, checkpoint, resume, report):
+    """Valida os hashes de senha e redefine as contas com hash inválido"""
+    from app.utils.password_migration import migrate_passwords as run_migration
+    
+    state = run_migration(batch_size=batch_size, workers=workers, dry_run=dry_run,
+                          checkpoint=checkpoint, resume=resume, report_path=report)
+    print('=' * 50)
+    print(f"Na política atual: {state['ok']}")
+    print(f"Desatualizados (refeitos no próximo login): {state['outdated']}")
+    print(f"Hash vazio/inválido: {state['invalid']}")
+    if dry_run:
+        print('Simulação: nenhuma senha foi alterada.')
+    else:
+        print(f"Senhas redefinidas: {state['reset']} (senhas temporárias em {report})")
+        if state['skipped']:
+            print(f"Ignorados (senha alterada durante a execução): {state['skipped']}")
+
+# Comandos CLI dos templates (flask templates compile / clear)
+@app.cli.group()
+def templates():
+    """Cache de bytecode dos templates Jinja"""
+
+@templates.command('compile')
+def compile_templates():
+    """Pré-compila todos os templates (rodar no deploy)"""
+    from app.utils.template_cache import compile_templates as run_compile
+    
+    if app.jinja_env.bytecode_cache is None:
+        raise click.ClickException('TEMPLATE_BYTECODE_CACHE está desativado.')
+    compiled, errors = run_compile(app)
+    for name, error in errors:
+        print(f'Erro em {name}: {error}')
+    print(f'{compiled} templates compilados.')
+    if errors:
+        raise click.ClickException(f'{len(errors)} templates com erro de sintaxe.')
+
+@templates.command('clear')
+def clear_templates():
+    """Remove o bytecode gravado dos templates"""
+    from app.utils.template_cache import clear_template_cache
+    clear_template_cache(app)
+    print('Cache de templates removido.')
+
+# Comandos CLI do bundle de CSS/JS (flask assets vendor / build)
+@app.cli.group()
+def assets():
+    """Bundle de CSS/JS servido em static/dist"""
+
+@assets.command('vendor')
+def vendor_assets():
+    """Baixa as bibliotecas de terceiros (Alpine, Font Awesome) para assets/vendor"""
+    from app.utils.assets import vendor_assets as run_vendor
+    run_vendor()
+    print('Bibliotecas baixadas. Versione a pasta assets/vendor.')
+
+@assets.command('build')
+@click.option('--tailwind-bin', default='tailwindcss', envvar='TAILWIND_BIN', help='CLI standalone do Tailwind')
+@click.option('--clean', is_flag=True, help='Remove arquivos de builds anteriores')
+def build_assets(tailwind_bin, clean):
+    """Gera o CSS/JS minificado, com hash no nome e variantes .gz/.br"""
+    from app.utils.assets import build_assets as run_build
+    
+    try:
+        manifest = run_build(app, tailwind_bin=tailwind_bin, clean=clean)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    print(f'{len(manifest)} arquivos gerados em app/static/dist.')
+
+# Comandos CLI do repositório de documentos
+@app.cli.group()
+def documents():
+    """Repositório de documentos (PDFs e anexos)"""
+
+@documents.command('import-legacy')
+def import_legacy_documents():
+    """Move os PDFs de pedidos de UPLOAD_FOLDER/pdfs para o repositório"""
+    from app.utils.document_store import import_legacy_purchase_order_pdfs
+    imported = import_legacy_purchase_order_pdfs(os.path.join(app.config['UPLOAD_FOLDER'], 'pdfs'))
+    print(f'{imported} PDFs de pedidos migrados para o repositório.')
+
+@documents.command('gc')
+@click.option('--dry-run', is_flag=True, help='Apenas conta os arquivos que seriam removidos')
+def collect_documents(dry_run):
+    """Remove arquivos sem registro em stored_files e temporários abandonados"""
+    from app.utils.document_store import get_document_store
+    removed = get_document_store().collect_garbage(dry_run=dry_run)
+    print(f"{removed} arquivos {'a remover' if dry_run else 'removidos'}.")
+
+@documents.command('thumbnails')
+def generate_thumbnails():
+    """Gera as miniaturas de anexos que ficaram pendentes (pool cheio ou reinício)"""
+    from app.utils.thumbnails import process_pending_thumbnails
+    processed = process_pending_thumbnails()
+    print(f'{processed} miniaturas processadas.')
+
+# Comando CLI para limpar sessões expiradas (SESSION_BACKEND file/sqlite)
+@app.cli.command()
+def purge_sessions():
+    """Remove as sessões expiradas do armazenamento no servidor"""
+    from app.utils.server_session import purge_expired_sessions
+    print(f'{purge_expired_sessions()} sessões expiradas removidas.')
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    import sys
+    if '--import-profile' in sys.argv:
+        # Relatório de tempo de inicialização (medido em um interpretador novo)
+        from app.utils.import_profile import profile_startup, format_report
+        print(format_report(profile_startup(os.getenv('FLASK_ENV') or 'development')))
+    else:
+        app.run(host='0.0.0.0', port=5000, debug=True)
 